@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+
+"""Benchmarks for Chronyk.
+
+Run all of them with `python bench_chronyk.py`, or only some by passing
+their names, e.g. `python bench_chronyk.py import first_parse`.
+"""
+
+import os
+import sys
+import time
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+BENCHMARKS = []
+
+
+def benchmark(func):
+    BENCHMARKS.append(func)
+    return func
+
+
+def _python(*args):
+    """Runs a fresh interpreter in the repo root and returns its stderr and
+    stdout.
+    """
+    proc = subprocess.run(
+        [sys.executable] + list(args), cwd=ROOT,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+    return proc.stderr, proc.stdout
+
+
+def _report(name, value, unit):
+    print("{:<40} {:>12.3f} {}".format(name, value, unit))
+
+
+###############################################################################
+
+@benchmark
+def bench_import(runs=5):
+    """Cumulative import time of the chronyk package (python -X importtime).
+    """
+    best = None
+    for _ in range(runs):
+        stderr, _ = _python("-X", "importtime", "-c", "import chronyk")
+        for line in stderr.splitlines():
+            fields = [f.strip() for f in line.split("|")]
+            if len(fields) == 3 and fields[2] == "chronyk":
+                cumulative = int(fields[1]) / 1000
+                best = cumulative if best is None else min(best, cumulative)
+    _report("import chronyk", best, "ms")
+
+
+@benchmark
+def bench_first_parse(runs=5):
+    """Latency of the first and second parse in a fresh interpreter.
+    """
+    code = "\n".join([
+        "import time, chronyk",
+        "for timestr in {!r}:",
+        "    t = time.perf_counter()",
+        "    try:",
+        "        chronyk.Chronyk(timestr)",
+        "    except ValueError:",
+        "        pass",
+        "    print(time.perf_counter() - t)"
+    ])
+    samples = {
+        "iso date": ["2014-09-18", "2014-09-19"],
+        "written date": ["May 2nd, 2015", "June 3rd, 2014"],
+        "time only": ["17:14:32", "11:14 am"],
+        "garbage": ["warglblargl", "asdf qwer"]
+    }
+    for name, timestrs in samples.items():
+        first, second = None, None
+        for _ in range(runs):
+            _, stdout = _python("-c", code.format(timestrs))
+            a, b = [float(x) * 1000 for x in stdout.split()]
+            first = a if first is None else min(first, a)
+            second = b if second is None else min(second, b)
+        _report("first parse ({})".format(name), first, "ms")
+        _report("second parse ({})".format(name), second, "ms")
+
+
+def _timeit(func, runs=3):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@benchmark
+def bench_exact_mode(count=200000):
+    """Sort, merge and dedup throughput of float and exact (int nanosecond)
+    Chronyk objects and of the raw float64 / int64 columns.
+    """
+    import heapq
+    import random
+    import array
+    from chronyk import Chronyk
+
+    rand = random.Random(1)
+    base = 1410508814 * 10 ** 9
+    nanos = [base + rand.randrange(0, 10 ** 12) // 1000 * 1000
+             for _ in range(count)]
+    nanos += nanos[:count // 10]
+
+    modes = {
+        "float": [Chronyk(n / 10 ** 9, timezone=0) for n in nanos],
+        "exact": [Chronyk.fromns(n, timezone=0) for n in nanos]
+    }
+    columns = {
+        "float64": array.array("d", [n / 10 ** 9 for n in nanos]),
+        "int64": array.array("q", nanos)
+    }
+
+    def dedup(values):
+        result = []
+        for value in sorted(values):
+            if not result or result[-1] != value:
+                result.append(value)
+        return result
+
+    for name, values in list(modes.items()) + list(columns.items()):
+        half = len(values) // 2
+        left, right = sorted(values[:half]), sorted(values[half:])
+        rows = len(values)
+        _report("sort ({})".format(name),
+                rows / _timeit(lambda: sorted(values)), "rows/s")
+        _report("merge ({})".format(name),
+                rows / _timeit(lambda: list(heapq.merge(left, right))),
+                "rows/s")
+        _report("dedup ({})".format(name),
+                rows / _timeit(lambda: dedup(values)), "rows/s")
+        _report("unique after dedup ({})".format(name),
+                len(dedup(values)), "rows")
+
+
+@benchmark
+def bench_rejection(count=2000):
+    """Latency of rejecting unparseable strings, with and without the cache
+    of recently rejected strings.
+    """
+    from chronyk import Chronyk, setrejectcache
+
+    samples = {
+        "letters": "asdf qwer",
+        "digits": "1 2 3 4 5 6 7 8",
+        "punctuation": "12/12/12/12",
+        "out of range": "2014-13-45"
+    }
+
+    def parse(timestr):
+        for _ in range(count):
+            try:
+                Chronyk(timestr)
+            except ValueError:
+                pass
+
+    for size in [0, 1024]:
+        setrejectcache(size)
+        cache = "cached" if size else "uncached"
+        for name, timestr in samples.items():
+            parse(timestr)
+            elapsed = _timeit(lambda: parse(timestr))
+            _report("reject {} ({})".format(name, cache),
+                    elapsed / count * 10 ** 6, "us")
+
+
+@benchmark
+def bench_writers(count=200000):
+    """Throughput of formatting sorted timestamps one by one with
+    Chronyk.timestring() and with the bulk writers.
+    """
+    import io
+    from chronyk import Chronyk, writecsv, writejsonl
+
+    timestamps = [1410508814 + i * 0.5 for i in range(count)]
+    chronyks = [Chronyk(t, timezone=0) for t in timestamps]
+
+    def timestrings():
+        out = io.StringIO()
+        for c in chronyks:
+            out.write(c.timestring(timezone=0) + "\n")
+
+    _report("timestring()", count / _timeit(timestrings), "rows/s")
+    _report("writecsv()", count / _timeit(
+        lambda: writecsv(io.StringIO(), timestamps, timezone=0)), "rows/s")
+    _report("writejsonl()", count / _timeit(
+        lambda: writejsonl(io.StringIO(), timestamps, timezone=0)), "rows/s")
+
+
+@benchmark
+def bench_window(count=200000):
+    """Events in the last 5 minutes: filtering a list of Chronyk objects
+    against Chronyk("5 minutes ago") versus a SlidingWindow.
+    """
+    from chronyk import Chronyk, SlidingWindow
+
+    timestamps = [1410508814 + i * 0.01 for i in range(count)]
+    queries = 100
+
+    def filtering():
+        events = []
+        for i, t in enumerate(timestamps):
+            events.append(Chronyk(t, timezone=0))
+            if i % (count // queries) == 0:
+                cutoff = Chronyk(t - 300, timezone=0)
+                events = [e for e in events if e > cutoff]
+                len(events)
+
+    def window():
+        w = SlidingWindow("5 minutes", resolution="1 second")
+        for i, t in enumerate(timestamps):
+            w.add(t)
+            if i % (count // queries) == 0:
+                w.count(t)
+
+    _report("list of Chronyk objects", count / _timeit(filtering), "events/s")
+    _report("SlidingWindow", count / _timeit(window), "events/s")
+
+
+@benchmark
+def bench_wheel(count=200000):
+    """Schedule, cancel and expire throughput of a heap of deadlines (with
+    lazy cancellation) and a TimingWheel.
+    """
+    import heapq
+    import random
+    from chronyk import TimingWheel
+
+    rand = random.Random(1)
+    start = 1410508814.0
+    deadlines = [start + rand.uniform(0, 24 * 3600) for _ in range(count)]
+    end = start + 25 * 3600
+
+    def heap():
+        entries = []
+        cancelled = set()
+        for i, deadline in enumerate(deadlines):
+            heapq.heappush(entries, (deadline, i))
+        for i in range(0, count, 2):
+            cancelled.add(i)
+        now = start
+        while now < end:
+            now += 60
+            while entries and entries[0][0] <= now:
+                deadline, i = heapq.heappop(entries)
+                if i in cancelled:
+                    cancelled.discard(i)
+
+    def wheel():
+        w = TimingWheel(clock=lambda: start)
+        timers = [w.schedule(deadline) for deadline in deadlines]
+        for timer in timers[::2]:
+            timer.cancel()
+        now = start
+        while now < end:
+            now += 60
+            w.advance(now)
+
+    _report("heapq", count / _timeit(heap), "timers/s")
+    _report("TimingWheel", count / _timeit(wheel), "timers/s")
+
+
+@benchmark
+def bench_business(count=20000):
+    """Business hours between two instants: walking day by day with
+    datetime versus BusinessCalendar.
+    """
+    import random
+    import datetime
+    from chronyk import BusinessCalendar
+
+    rand = random.Random(1)
+    start = 1388534400
+    pairs = []
+    for _ in range(count):
+        a = start + rand.randrange(0, 365 * 24 * 3600)
+        pairs.append((a, a + rand.randrange(0, 60 * 24 * 3600)))
+    holidays = [datetime.date(2014, 12, 25), datetime.date(2015, 1, 1)]
+
+    epoch = datetime.datetime(1970, 1, 1)
+
+    def daybyday():
+        for a, b in pairs:
+            total = 0
+            begin = epoch + datetime.timedelta(seconds=a)
+            end = epoch + datetime.timedelta(seconds=b)
+            day = begin.date()
+            while day <= end.date():
+                if day.weekday() < 5 and day not in holidays:
+                    opens = datetime.datetime(day.year, day.month, day.day, 9)
+                    closes = opens + datetime.timedelta(hours=8)
+                    lo = max(opens, begin)
+                    hi = min(closes, end)
+                    if hi > lo:
+                        total += (hi - lo).total_seconds()
+                day += datetime.timedelta(days=1)
+
+    cal = BusinessCalendar(holidays=holidays, timezone=0)
+    starts = [a for a, b in pairs]
+    ends = [b for a, b in pairs]
+
+    _report("day by day", count / _timeit(daybyday), "pairs/s")
+    _report("BusinessCalendar.betweenbatch()", count / _timeit(
+        lambda: cal.betweenbatch(starts, ends)), "pairs/s")
+
+
+@benchmark
+def bench_recurrence(count=2000, horizon=500):
+    """Next occurrences across many rules: expanding every rule into a list
+    up front versus merging the lazily expanded Recurrence objects.
+    """
+    import heapq
+    import random
+    import itertools
+    from chronyk import Recurrence, occurrences
+
+    rand = random.Random(1)
+    start = 1388534400
+    days = ["monday", "tuesday", "wednesday", "thursday", "friday"]
+    rules = []
+    for _ in range(count):
+        rules.append(Recurrence("every {} at {}:{:02d}".format(
+            rand.choice(days), rand.randrange(24), rand.randrange(60)),
+            timezone=0))
+    end = start + 365 * 24 * 3600
+
+    def pregenerated():
+        lists = [list(rule.timestamps(start, end)) for rule in rules]
+        return list(itertools.islice(heapq.merge(*lists), horizon))
+
+    def merged():
+        return list(itertools.islice(occurrences(rules, start), horizon))
+
+    _report("pregenerated lists", horizon / _timeit(pregenerated, 3),
+            "occurrences/s")
+    _report("merged occurrences()", horizon / _timeit(merged, 3),
+            "occurrences/s")
+
+@benchmark
+def bench_mergelogs(count=100000, sources=8):
+    """Interleaving log files: reading and sorting everything versus
+    streaming them through mergelogs().
+    """
+    import time as _time
+    from chronyk import LogSource, mergelogs, compile_format
+
+    start = 1388534400
+    pattern = "%Y-%m-%d %H:%M:%S"
+    files = []
+    for i in range(sources):
+        files.append([
+            _time.strftime(pattern, _time.gmtime(start + j * sources + i)) +
+            " source {} line {}\n".format(i, j)
+            for j in range(count // sources)])
+    parser = compile_format(pattern)
+
+    def readandsort():
+        lines = []
+        for f in files:
+            for line in f:
+                lines.append((parser.timestamp(line[:19], 0), line))
+        lines.sort()
+
+    def merged():
+        for _ in mergelogs(LogSource(f, pattern, 0) for f in files):
+            pass
+
+    _report("read and sort", count / _timeit(readandsort), "lines/s")
+    _report("mergelogs()", count / _timeit(merged), "lines/s")
+
+@benchmark
+def bench_relativecache(count=5000, requests=20):
+    """Rendering a page of relative times on every request versus serving
+    them from a RelativeStringCache.
+    """
+    import random
+    from chronyk import Chronyk, RelativeStringCache
+
+    rand = random.Random(1)
+    now = 1400000000
+    items = [Chronyk(now - rand.randrange(0, 60 * 24 * 3600), timezone=0)
+             for _ in range(count)]
+    cache = RelativeStringCache(size=count, clock=None, timezone=0)
+
+    def rerender():
+        for i in range(requests):
+            for item in items:
+                item.relativestring(now + i, timezone=0)
+
+    def cached():
+        for i in range(requests):
+            for item in items:
+                cache.relativestring(item, now + i)
+
+    total = count * requests
+    _report("relativestring() per request", total / _timeit(rerender),
+            "strings/s")
+    cache.clear()
+    _report("RelativeStringCache", total / _timeit(cached), "strings/s")
+
+@benchmark
+def bench_sessions(count=200000, users=200):
+    """Sessionizing (user, timestamp) events: grouping per user and sorting
+    in batch versus the streaming Sessionizer.
+    """
+    import random
+    from chronyk import sessionize
+
+    rand = random.Random(1)
+    gap = 1800
+    events = []
+    t = 1388534400
+    for _ in range(count):
+        t += rand.expovariate(1 / 5)
+        events.append((rand.randrange(users), t))
+
+    def batch():
+        peruser = {}
+        for user, timestamp in events:
+            peruser.setdefault(user, []).append(timestamp)
+        sessions = []
+        for user, times in peruser.items():
+            times.sort()
+            start = last = times[0]
+            n = 0
+            for timestamp in times:
+                if timestamp - last > gap:
+                    sessions.append((user, start, last, n))
+                    start, n = timestamp, 0
+                last = timestamp
+                n += 1
+            sessions.append((user, start, last, n))
+
+    def streaming():
+        for _ in sessionize(events, gap):
+            pass
+
+    _report("group and sort", count / _timeit(batch), "events/s")
+    _report("sessionize()", count / _timeit(streaming), "events/s")
+
+@benchmark
+def bench_buffers(count=20000):
+    """Parsing timestamps out of raw log lines: slicing and decoding every
+    line versus passing the buffer with offset and length. Also reports the
+    peak of temporary memory allocated per line.
+    """
+    import tracemalloc
+    from chronyk import Chronyk
+
+    start = 1388534400
+    lines = [
+        "{} INFO request {}\n".format(
+            Chronyk(start + i * 7, timezone=0).timestring(), i).encode()
+        for i in range(count)]
+
+    def decoded():
+        for line in lines:
+            Chronyk(line[:19].decode(), timezone=0)
+
+    def buffered():
+        for line in lines:
+            Chronyk(line, timezone=0, offset=0, length=19)
+
+    def peak(parse):
+        tracemalloc.start()
+        total = 0
+        for line in lines[:1000]:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            parse(line)
+            total += tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+        return total / 1000
+
+    _report("slice and decode", count / _timeit(decoded), "lines/s")
+    _report("buffer with offset", count / _timeit(buffered), "lines/s")
+    _report("slice and decode, peak memory", peak(
+        lambda line: Chronyk(line[:19].decode(), timezone=0)), "bytes/line")
+    _report("buffer with offset, peak memory", peak(
+        lambda line: Chronyk(line, timezone=0, length=19)), "bytes/line")
+
+@benchmark
+def bench_logindex(count=200000, queries=20):
+    """Reading an hour of a log file: scanning and parsing from the start
+    versus seeking with a LogIndex.
+    """
+    import os
+    import random
+    import tempfile
+    from chronyk import Chronyk, LogIndex, compile_format
+
+    rand = random.Random(1)
+    start = 1388534400
+    pattern = "%Y-%m-%d %H:%M:%S"
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "app.log")
+    with open(path, "w") as file:
+        for i in range(count):
+            file.write("{} request {} took {} ms\n".format(
+                Chronyk(start + i * 5, timezone=0).timestring(), i,
+                rand.randrange(1000)))
+    bounds = [start + rand.randrange(count * 5 - 3600) for _ in range(queries)]
+    parser = compile_format(pattern)
+
+    def scan():
+        for begin in bounds:
+            with open(path) as file:
+                for line in file:
+                    timestamp = parser.timestamp(line[:19], 0)
+                    if timestamp >= begin + 3600:
+                        break
+
+    index = LogIndex(path, pattern, timezone=0, indexpath=False)
+
+    def seek():
+        for begin in bounds:
+            for line in index.lines(begin, begin + 3600):
+                pass
+
+    _report("scan from start", queries / _timeit(scan, 1), "queries/s")
+    _report("LogIndex.lines()", queries / _timeit(seek), "queries/s")
+    _report("LogIndex build", os.path.getsize(path) / 2 ** 20 / _timeit(
+        lambda: LogIndex(path, pattern, timezone=0, indexpath=False)),
+        "MB/s")
+    os.remove(path)
+    os.rmdir(directory)
+
+@benchmark
+def bench_epochs(count=100000):
+    """Numeric epoch strings: the same instants as ISO strings through the
+    format search, as epoch strings through Chronyk's fast path, and as a
+    column through parseepochs().
+    """
+    from chronyk import Chronyk, parseepochs
+
+    start = 1388534400
+    isostrings = [Chronyk(start + i * 37, timezone=0).timestring()
+                  for i in range(count)]
+    epochs = [str((start + i * 37) * 1000 + i % 1000) for i in range(count)]
+
+    _report("Chronyk(iso string)", count / _timeit(
+        lambda: [Chronyk(s, timezone=0) for s in isostrings]), "values/s")
+    _report("Chronyk(epoch string)", count / _timeit(
+        lambda: [Chronyk(s, timezone=0) for s in epochs]), "values/s")
+    _report("parseepochs()", count / _timeit(
+        lambda: parseepochs(epochs)), "values/s")
+
+###############################################################################
+
+def main(names):
+    for func in BENCHMARKS:
+        name = func.__name__[len("bench_"):]
+        if not names or name in names:
+            func()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -46,6 +46,7 @@ __license__ = "MIT"
 __copyright__ = "Copyright 2014 Felix Wiegand"
 
 from .chronyk import LOCALTZ
+from .chronyk import TIMEZONES
 
 from .chronyk import Chronyk
 from .chronyk import ChronykDelta
@@ -53,3 +54,46 @@ from .chronyk import DateRangeError
 
 from .chronyk import currentutc
 from .chronyk import guesstype
+from .chronyk import setrejectcache
+from .chronyk import setepochrange
+
+from .bucketing import Bucketer
+from .bucketing import BucketAggregator
+from .bucketing import truncate
+from .bucketing import bucket
+
+from .intervals import ChronykInterval
+from .intervals import IntervalIndex
+
+from .arrays import ChronykArray
+from .arrays import parseepochs
+
+from .extraction import extract
+
+from .formats import CompiledFormat
+from .formats import FormatError
+from .formats import compile_format
+
+from .writers import TimestringFormatter
+from .writers import writecsv
+from .writers import writejsonl
+
+from .windows import SlidingWindow
+
+from .scheduler import TimingWheel
+
+from .business import BusinessCalendar
+
+from .recurrence import Recurrence
+from .recurrence import occurrences
+
+from .merging import LogSource
+from .merging import mergelogs
+
+from .relative import RelativeStringCache
+
+from .sessions import Session
+from .sessions import Sessionizer
+from .sessions import sessionize
+
+from .seeking import LogIndex
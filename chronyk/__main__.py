@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+"""Command-line converter for human-written times and dates.
+
+Reads one time string per line from the given files (or stdin) and writes
+the converted value for every line to stdout:
+
+$ tail -f app.log | cut -c1-19 | python -m chronyk -o string -p "%H:%M"
+$ python -m chronyk --timezone 0 --stats dates.txt > timestamps.txt
+"""
+
+import io
+import sys
+import time
+import argparse
+import itertools
+import multiprocessing
+
+from . import __version__
+from .chronyk import LOCALTZ, Chronyk
+
+# Number of lines converted and written out at once
+CHUNKSIZE = 4096
+
+# Size of the buffers wrapped around stdin / stdout
+BUFFERSIZE = 1 << 20
+
+
+class Converter:
+    """Converts single lines, picklable so it can be shipped to workers.
+    Returns the output line, or None if the line couldn't be parsed.
+    """
+
+    def __init__(self, output, pattern, timezone, outtimezone):
+        self.output = output
+        self.pattern = pattern
+        self.timezone = timezone
+        self.outtimezone = outtimezone
+        self.__lastline__ = None
+        self.__lastresult__ = None
+
+    def __call__(self, line):
+        line = line.strip()
+        # Log lines often share their timestamps with the previous one.
+        if line == self.__lastline__:
+            return self.__lastresult__
+
+        try:
+            t = Chronyk(line, timezone=self.timezone)
+        except ValueError:
+            result = None
+        else:
+            if self.output == "timestamp":
+                result = str(t.timestamp(timezone=self.outtimezone))
+            elif self.output == "string":
+                result = t.timestring(self.pattern, timezone=self.outtimezone)
+            else:
+                result = t.relativestring(timezone=self.outtimezone)
+
+        self.__lastline__ = line
+        self.__lastresult__ = result
+        return result
+
+    def chunk(self, lines):
+        return [self(line) for line in lines]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _lines(paths):
+    if not paths:
+        paths = ["-"]
+    for path in paths:
+        if path == "-":
+            stream = io.TextIOWrapper(
+                io.BufferedReader(sys.stdin.buffer, BUFFERSIZE),
+                encoding=sys.stdin.encoding, errors="replace")
+        else:
+            stream = open(path, buffering=BUFFERSIZE, errors="replace")
+        try:
+            for line in stream:
+                yield line
+        finally:
+            if path == "-":
+                # Closing the wrappers would close stdin as well.
+                stream.detach().detach()
+            else:
+                stream.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m chronyk",
+        description="Converts human-written times and dates, one per line.")
+    parser.add_argument(
+        "files", nargs="*", metavar="FILE",
+        help="files to read from, stdin is used if none (or -) is given")
+    parser.add_argument(
+        "-o", "--output", choices=["timestamp", "string", "relative"],
+        default="timestamp",
+        help="what to write for every line (default: timestamp)")
+    parser.add_argument(
+        "-p", "--pattern", default="%Y-%m-%d %H:%M:%S",
+        help="strftime pattern used with --output string")
+    parser.add_argument(
+        "-t", "--timezone", type=int, default=LOCALTZ,
+        help="timezone of the input in seconds west of UTC (default: local)")
+    parser.add_argument(
+        "-T", "--output-timezone", type=int, default=None,
+        help="timezone of the output in seconds west of UTC "
+             "(default: same as --timezone)")
+    parser.add_argument(
+        "-e", "--errors", choices=["strict", "skip", "empty", "keep"],
+        default="strict",
+        help="what to do with unparseable lines: abort, drop them, write an "
+             "empty line or write the input unchanged (default: strict)")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=1,
+        help="number of worker processes (default: 1)")
+    parser.add_argument(
+        "--stats", action="store_true",
+        help="report rows/sec and parse failures on stderr")
+    parser.add_argument(
+        "--version", action="version",
+        version="%(prog)s {}".format(__version__))
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("argument -j/--workers: has to be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    outtimezone = args.output_timezone
+    if outtimezone is None:
+        outtimezone = args.timezone
+    converter = Converter(args.output, args.pattern, args.timezone, outtimezone)
+
+    stdout = io.TextIOWrapper(
+        io.BufferedWriter(sys.stdout.buffer, BUFFERSIZE),
+        encoding=sys.stdout.encoding, line_buffering=False)
+
+    pool = None
+    if args.workers > 1:
+        pool = multiprocessing.Pool(args.workers)
+    # Only a bounded number of chunks is in flight at any time.
+    batches = _chunks(_chunks(_lines(args.files), CHUNKSIZE), args.workers * 4)
+
+    rows = 0
+    failures = 0
+    status = 0
+    start = time.time()
+    try:
+        for batch in batches:
+            if pool is not None:
+                results = pool.map(converter.chunk, batch)
+            else:
+                results = [converter.chunk(lines) for lines in batch]
+            for lines, outputs in zip(batch, results):
+                out = []
+                for i, output in enumerate(outputs):
+                    if output is not None:
+                        out.append(output)
+                        continue
+                    failures += 1
+                    if args.errors == "strict":
+                        sys.stderr.write(
+                            "chronyk: line {}: Failed to parse time string.\n"
+                            .format(rows + i + 1))
+                        status = 1
+                        break
+                    if args.errors == "empty":
+                        out.append("")
+                    elif args.errors == "keep":
+                        out.append(lines[i].rstrip("\r\n"))
+                rows += len(outputs) if not status else i
+                if out:
+                    stdout.write("\n".join(out) + "\n")
+                if status:
+                    break
+            if status:
+                break
+    except BrokenPipeError:
+        status = 1
+    finally:
+        if pool is not None:
+            pool.terminate()
+        try:
+            # Closing the wrappers would close stdout as well.
+            stdout.detach().detach()
+        except BrokenPipeError:
+            pass
+
+    if args.stats:
+        elapsed = max(time.time() - start, 1e-9)
+        sys.stderr.write(
+            "rows: {}\nfailures: {}\nseconds: {:.3f}\nrows/sec: {:.0f}\n"
+            .format(rows, failures, elapsed, rows / elapsed))
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+import sys
+import array
+
+from .chronyk import (
+    LOCALTZ, Chronyk, _monthshift, _epochexponent, _epochns, _NS)
+
+# memoryview formats that can be taken over without converting every value
+_FORMATS = {
+    "d": "d",
+    "f": "d",
+    "q": "q",
+    "l": "q",
+    "i": "q"
+}
+
+# array.array typecodes by item size, for buffers with explicit byte order
+_FLOATCODES = {4: "f", 8: "d"}
+_INTCODES = {
+    array.array(code).itemsize: code for code in ["q", "l", "i"]}
+
+_TYPESTRS = {
+    "d": "f8",
+    "q": "i8"
+}
+
+
+class ChronykArray(array.array):
+    """Contiguous batch of UTC timestamps (as used by Chronyk comparisons,
+    i.e. float(Chronyk(...))).
+
+    :param values = ()
+        An iterable of timestamps or Chronyk objects.
+
+    :param typecode = "d"
+        "d" stores float64 seconds, "q" stores int64 seconds.
+
+    Since this is an array.array, it supports the buffer protocol, so
+    memoryview(), numpy.frombuffer(), numpy.asarray() and
+    pyarrow.py_buffer() all wrap it without copying. __array_interface__ is
+    provided as well.
+    """
+
+    def __new__(cls, values=(), typecode="d"):
+        if typecode not in _TYPESTRS:
+            raise ValueError("Only the typecodes 'd' and 'q' are supported.")
+        self = array.array.__new__(cls, typecode)
+        if type(values) == str:
+            raise TypeError("Failed to recognize given type.")
+        self.extend(values)
+        return self
+
+    def __repr__(self):
+        return "ChronykArray({}, typecode={!r})".format(
+            self.tolist(), self.typecode)
+
+    def __contains__(self, value):
+        if type(value) == Chronyk:
+            value = value.timestamp(timezone=0)
+        return array.array.__contains__(self, value)
+
+    def append(self, value):
+        if type(value) == Chronyk:
+            value = value.timestamp(timezone=0)
+            if self.typecode == "q":
+                value = int(value)
+        array.array.append(self, value)
+
+    def extend(self, values):
+        if isinstance(values, array.array):
+            if values.typecode == self.typecode:
+                return array.array.extend(self, values)
+            values = values.tolist()
+        if self.typecode == "q":
+            convert = int
+        else:
+            convert = float
+        array.array.extend(self, (
+            convert(value.timestamp(timezone=0)) if type(value) == Chronyk
+            else value for value in values))
+
+    @property
+    def __array_interface__(self):
+        byteorder = "<" if sys.byteorder == "little" else ">"
+        return {
+            "version": 3,
+            "shape": (len(self),),
+            "typestr": byteorder + _TYPESTRS[self.typecode],
+            "data": (self.buffer_info()[0], False)
+        }
+
+    @classmethod
+    def frombuffer(cls, buffer):
+        """Creates a ChronykArray from any object supporting the buffer
+        protocol (NumPy arrays, array.array, memoryview, ...) holding float or
+        integer timestamps. The data is copied in one block, no Chronyk
+        objects are created.
+        """
+        view = memoryview(buffer)
+        if view.ndim != 1:
+            raise ValueError("Only one-dimensional buffers are supported.")
+        fmt = view.format.lstrip("@=<>!")
+        if fmt not in _FORMATS:
+            raise TypeError("Unsupported buffer format: {}".format(fmt))
+        self = cls(typecode=_FORMATS[fmt])
+        order = view.format[0]
+        if order in "<>!":
+            # memoryview can't convert explicit byte orders itself, so copy
+            # the raw values and swap them if they aren't in native order.
+            if fmt in "df":
+                raw = array.array(_FLOATCODES[view.itemsize])
+            else:
+                raw = array.array(_INTCODES[view.itemsize])
+            raw.frombytes(view.tobytes())
+            if (order == "<") != (sys.byteorder == "little"):
+                raw.byteswap()
+            self.extend(raw)
+        elif fmt in "dql" and view.itemsize == self.itemsize:
+            if view.c_contiguous:
+                self.frombytes(view.cast("B"))
+            else:
+                self.frombytes(view.tobytes())
+        else:
+            self.fromlist(view.tolist())
+        return self
+
+    def timestamps(self, timezone=LOCALTZ):
+        """Returns a ChronykArray with the values as returned by
+        Chronyk.timestamp(timezone=timezone).
+        """
+        if timezone == 0:
+            return ChronykArray(self, typecode=self.typecode)
+        return ChronykArray(
+            (value - timezone for value in self), typecode=self.typecode)
+
+    def chronyks(self, timezone=LOCALTZ):
+        """Yields a Chronyk object (using the given timezone) for every value.
+        """
+        for value in self:
+            yield Chronyk(value - timezone, timezone=timezone)
+
+    def addmonths(self, months, timezone=LOCALTZ):
+        """Returns a new ChronykArray with every timestamp moved by the given
+        number of calendar months (negative values move backwards). Days are
+        clamped to the length of the resulting month, just like adding a
+        ChronykDelta("1 month") to a Chronyk object.
+
+        :param months (required)
+            The number of months (int) to add.
+
+        :param timezone = local timezone
+            The timezone (in seconds west of UTC) whose calendar is used.
+        """
+        if type(months) != int:
+            raise TypeError("Months have to be integers.")
+        offset = timezone + LOCALTZ
+        values = []
+        lastday = None
+        shift = 0
+        for value in self:
+            if value != value:
+                # NaN marks missing values.
+                values.append(value)
+                continue
+            # Sorted input mostly stays on the same day.
+            day = (value - offset) // (3600 * 24)
+            if day != lastday:
+                shift = _monthshift(value, months, offset)
+                lastday = day
+            values.append(value + shift)
+        result = ChronykArray(typecode=self.typecode)
+        result.fromlist(values)
+        return result
+
+
+def parseepochs(values, unit=None, errors="strict"):
+    """Parses a column of numeric epoch timestamps and returns a ChronykArray
+    with their UTC timestamps.
+
+    :param values (required)
+        An iterable of strings (or bytes) like "1410508814" or
+        "1410508814295.5", ints or floats.
+
+    :param unit = None
+        "s", "ms", "us" or "ns". By default, the unit is inferred for every
+        value, see chronyk.setepochrange.
+
+    :param errors = "strict"
+        "strict" raises a ValueError for the first value that isn't a
+        timestamp, "nan" stores NaN for it instead and "skip" leaves it out.
+
+    Strings are converted with integer arithmetic directly, without going
+    through Chronyk or any format matching.
+    """
+    if errors not in ["strict", "nan", "skip"]:
+        raise ValueError("Unknown value for errors: {}".format(errors))
+    if unit is not None:
+        _epochexponent(0, unit)
+    results = []
+    append = results.append
+    nan = float("nan")
+    for value in values:
+        if type(value) in [bytes, bytearray]:
+            value = value.decode("ascii", "replace")
+        if type(value) == str:
+            ns = _epochns(value, unit)
+            if ns is not None:
+                append(ns / _NS + LOCALTZ)
+                continue
+            value = None
+        elif type(value) not in [int, float]:
+            raise TypeError("Failed to recognize given type.")
+
+        exponent = None
+        if value is not None:
+            exponent = _epochexponent(value, unit)
+        if exponent is None:
+            if errors == "strict":
+                raise ValueError("Failed to parse epoch timestamp.")
+            if errors == "nan":
+                append(nan)
+            continue
+        append(value / 10 ** exponent + LOCALTZ)
+
+    result = ChronykArray()
+    result.fromlist(results)
+    return result
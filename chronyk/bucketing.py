@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+import re
+import calendar
+import datetime
+import collections
+
+from .chronyk import LOCALTZ, Chronyk, ChronykDelta, _toutc
+from .arrays import ChronykArray
+
+_UNITS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": 3600 * 24,
+    "week": 3600 * 24 * 7,
+    "month": 0,
+    "year": 0
+}
+
+_WIDTHRE = re.compile(
+    r"^\s*([0-9]+)?\s*(second|minute|hour|day|week|month|year)s?\s*$")
+
+# 1970-01-01 was a thursday, weeks are aligned to the monday before that.
+_WEEKORIGIN = -3 * 3600 * 24
+
+_EPOCHORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def _parsewidth(width):
+    """Turns a bucket width into a (seconds, months) tuple, exactly one of
+    which is non-zero.
+    """
+    if type(width) == ChronykDelta:
+        months = width.years * 12 + width.months
+        if months and width.seconds:
+            raise ValueError("Bucket widths can't mix months and seconds.")
+        if months:
+            if months <= 0:
+                raise ValueError("Bucket widths have to be positive.")
+            return (0, months)
+        width = width.seconds
+    if type(width) in [int, float]:
+        if width <= 0:
+            raise ValueError("Bucket widths have to be positive.")
+        return (width, 0)
+    if type(width) != str:
+        raise TypeError("Failed to recognize given type.")
+
+    match = _WIDTHRE.match(width.lower())
+    if match is None:
+        raise ValueError("Failed to parse bucket width.")
+    amount = int(match.group(1)) if match.group(1) is not None else 1
+    if amount <= 0:
+        raise ValueError("Bucket widths have to be positive.")
+    if match.group(2) == "month":
+        return (0, amount)
+    if match.group(2) == "year":
+        return (0, amount * 12)
+    return (amount * _UNITS[match.group(2)], 0)
+
+
+class Bucketer:
+    """Truncates UTC timestamps (as used by Chronyk comparisons, i.e.
+    float(Chronyk(...))) to the start of the bucket they fall into.
+
+    :param width (required)
+        The width of a bucket. This can be either a number of seconds, a
+        ChronykDelta or a string like "15 minutes", "hour" or "3 months".
+        Fixed-size units use plain integer arithmetic, months and years
+        follow the calendar.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) the bucket boundaries are
+        aligned to. To use UTC, use timezone=0.
+
+    Bucket starts are returned as UTC timestamps, so
+    Chronyk(start, timezone=0).timestring(timezone=timezone) yields the
+    familiar wall clock label.
+    """
+
+    def __init__(self, width, timezone=LOCALTZ):
+        self.seconds, self.months = _parsewidth(width)
+        self.timezone = timezone
+        # Same shift Chronyk.timestring() applies to get to the wall clock.
+        self.__offset__ = timezone + LOCALTZ
+        self.__origin__ = 0
+        if self.seconds and self.seconds % _UNITS["week"] == 0:
+            self.__origin__ = _WEEKORIGIN
+        self.__lastday__ = None
+        self.__lastmonth__ = None
+
+    def __month__(self, local):
+        day = int(local // (3600 * 24))
+        if day == self.__lastday__:
+            return self.__lastmonth__
+
+        dati = datetime.date.fromordinal(day + _EPOCHORDINAL)
+        index = (dati.year * 12 + dati.month - 1) // self.months * self.months
+        start = calendar.timegm((index // 12, index % 12 + 1, 1, 0, 0, 0))
+
+        self.__lastday__ = day
+        self.__lastmonth__ = start
+        return start
+
+    def truncate(self, timestamp):
+        """Returns the start of the bucket the given UTC timestamp (or
+        Chronyk object) falls into.
+        """
+        local = _toutc(timestamp, self.timezone) - self.__offset__
+        if self.months:
+            return self.__month__(local) + self.__offset__
+        origin = self.__origin__
+        start = (local - origin) // self.seconds * self.seconds + origin
+        return start + self.__offset__
+
+    def bucket(self, timestamps):
+        """Returns a ChronykArray with the bucket start of every given UTC
+        timestamp (or Chronyk object).
+        """
+        starts = []
+        if not self.months and self.__origin__ == 0:
+            # Inlined version of truncate() for the common case.
+            offset = self.__offset__
+            width = self.seconds
+            for timestamp in timestamps:
+                if type(timestamp) == Chronyk:
+                    timestamp = timestamp.timestamp(timezone=0)
+                local = timestamp - offset
+                starts.append(local - local % width + offset)
+        else:
+            truncate = self.truncate
+            for timestamp in timestamps:
+                starts.append(truncate(timestamp))
+        result = ChronykArray()
+        result.fromlist(starts)
+        return result
+
+
+def truncate(timestamp, width, timezone=LOCALTZ):
+    """Returns the start of the bucket the given UTC timestamp (or Chronyk
+    object) falls into. See chronyk.Bucketer for the parameters.
+    """
+    return Bucketer(width, timezone).truncate(timestamp)
+
+
+def bucket(timestamps, width, timezone=LOCALTZ):
+    """Returns a ChronykArray with the bucket start of every given UTC
+    timestamp (or Chronyk object). See chronyk.Bucketer for the parameters.
+    """
+    return Bucketer(width, timezone).bucket(timestamps)
+
+
+Bucket = collections.namedtuple(
+    "Bucket", ["start", "count", "sum", "min", "max"])
+
+
+class BucketAggregator:
+    """Streaming group-by over time buckets, keeping exactly one accumulator
+    (count, sum, min, max) per bucket.
+
+    :param width (required)
+        The bucket width, see chronyk.Bucketer.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) the buckets are aligned to.
+
+    >>> agg = BucketAggregator("1 hour", timezone=0)
+    >>> agg.update(timestamps, values)
+    >>> for b in agg.buckets():
+    ...     print(Chronyk(b.start, timezone=0).timestring(), b.count, b.sum)
+    """
+
+    def __init__(self, width, timezone=LOCALTZ):
+        self.bucketer = Bucketer(width, timezone)
+        self.__accumulators__ = {}
+
+    def __len__(self):
+        return len(self.__accumulators__)
+
+    def add(self, timestamp, value=1):
+        """Adds a single value to the bucket of the given timestamp.
+        """
+        start = self.bucketer.truncate(timestamp)
+        acc = self.__accumulators__.get(start)
+        if acc is None:
+            self.__accumulators__[start] = [1, value, value, value]
+        else:
+            acc[0] += 1
+            acc[1] += value
+            if value < acc[2]:
+                acc[2] = value
+            if value > acc[3]:
+                acc[3] = value
+
+    def update(self, timestamps, values=None):
+        """Adds many values at once. If no values are given, every timestamp
+        counts as 1.
+        """
+        starts = self.bucketer.bucket(timestamps)
+        if values is None:
+            values = [1] * len(starts)
+        accs = self.__accumulators__
+        for start, value in zip(starts, values):
+            acc = accs.get(start)
+            if acc is None:
+                accs[start] = [1, value, value, value]
+            else:
+                acc[0] += 1
+                acc[1] += value
+                if value < acc[2]:
+                    acc[2] = value
+                if value > acc[3]:
+                    acc[3] = value
+
+    def get(self, timestamp):
+        """Returns the Bucket the given timestamp falls into, or None.
+        """
+        start = self.bucketer.truncate(timestamp)
+        acc = self.__accumulators__.get(start)
+        if acc is None:
+            return None
+        return Bucket(start, *acc)
+
+    def buckets(self):
+        """Yields all non-empty Buckets in chronological order.
+        """
+        for start in sorted(self.__accumulators__):
+            yield Bucket(start, *self.__accumulators__[start])
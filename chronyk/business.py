@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+import math
+import array
+import bisect
+import datetime
+
+from .chronyk import LOCALTZ, Chronyk, ChronykDelta, _toutc, _toseconds
+from .arrays import ChronykArray
+
+_DAY = 3600 * 24
+
+_EPOCHORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+# 1970-01-01 was a thursday, weeks are counted from the monday before that.
+_WEEKSHIFT = 3
+
+
+def _clock(value):
+    """Turns "9:00", "17:30" or a number of seconds into seconds since
+    midnight.
+    """
+    if type(value) in [int, float]:
+        return value
+    if type(value) != str:
+        raise TypeError("Failed to recognize given type.")
+    try:
+        parts = [int(x) for x in value.strip().split(":")]
+    except ValueError:
+        raise ValueError("Failed to parse working hours.")
+    if not 1 <= len(parts) <= 3:
+        raise ValueError("Failed to parse working hours.")
+    parts += [0] * (3 - len(parts))
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+
+class BusinessCalendar:
+    """Working time arithmetic for SLA style calculations.
+
+    :param weekends = (5, 6)
+        The days of the week nobody works on, with monday as 0.
+
+    :param holidays = ()
+        An iterable of further days off, as datetime.date objects, Chronyk
+        objects, UTC timestamps or strings like "2014-12-25".
+
+    :param hours = ("9:00", "17:00")
+        The working hours of every workday, as two times of the day (strings
+        or seconds since midnight). None means the whole day.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) days and working hours are
+        in. To use UTC, use timezone=0.
+
+    The weekly pattern is kept as a bitmap with prefix sums and the holidays
+    as a sorted list, so counting workdays or working time up to any instant
+    is a bit of arithmetic and a binary search, no matter how far apart the
+    two ends of a query are.
+    """
+
+    def __init__(
+            self, weekends=(5, 6), holidays=(), hours=("9:00", "17:00"),
+            timezone=LOCALTZ):
+        self.timezone = timezone
+        # Same shift Chronyk.timestring() applies to get to the wall clock.
+        self.__offset__ = timezone + LOCALTZ
+
+        self.weekends = frozenset(weekends)
+        if not self.weekends <= set(range(7)):
+            raise ValueError("Weekdays have to be between 0 and 6.")
+        self.__week__ = [day not in self.weekends for day in range(7)]
+        # Workdays among the first n days of a week, and the weekday of the
+        # n-th workday of a week.
+        self.__prefix__ = [0]
+        for workday in self.__week__:
+            self.__prefix__.append(self.__prefix__[-1] + workday)
+        self.__nth__ = [day for day in range(7) if self.__week__[day]]
+        self.__perweek__ = len(self.__nth__)
+        if not self.__perweek__:
+            raise ValueError("There has to be at least one workday a week.")
+
+        if hours is None:
+            hours = (0, _DAY)
+        self.opens, self.closes = [_clock(h) for h in hours]
+        if not 0 <= self.opens < self.closes <= _DAY:
+            raise ValueError("Working hours have to lie within one day.")
+        self.__length__ = self.closes - self.opens
+
+        days = set()
+        for holiday in holidays:
+            day = self.__day__(holiday)
+            if self.__week__[(day + _WEEKSHIFT) % 7]:
+                days.add(day)
+        self.__holidays__ = sorted(days)
+
+    def __day__(self, value):
+        """Returns the local day number (days since 1970-01-01) of a date or
+        instant.
+        """
+        if type(value) == datetime.date:
+            return value.toordinal() - _EPOCHORDINAL
+        if type(value) == datetime.datetime:
+            return value.date().toordinal() - _EPOCHORDINAL
+        return int((_toutc(value, self.timezone) - self.__offset__) // _DAY)
+
+    def __result__(self, utc):
+        return Chronyk(utc - self.timezone, timezone=self.timezone)
+
+    def __isworkday__(self, day):
+        if not self.__week__[(day + _WEEKSHIFT) % 7]:
+            return False
+        i = bisect.bisect_left(self.__holidays__, day)
+        return i == len(self.__holidays__) or self.__holidays__[i] != day
+
+    def __workdays__(self, day):
+        """Returns the number of workdays before the given day, counted from
+        an arbitrary origin.
+        """
+        weeks, weekday = divmod(day + _WEEKSHIFT, 7)
+        periodic = weeks * self.__perweek__ + self.__prefix__[weekday]
+        return periodic - bisect.bisect_left(self.__holidays__, day)
+
+    def __workday__(self, index):
+        """Returns the day with the given __workdays__ count that is a
+        workday, the inverse of __workdays__.
+        """
+        holidays = 0
+        while True:
+            # The index-th workday is the (index + holidays before it)-th
+            # day of the weekly pattern.
+            weeks, nth = divmod(index + holidays, self.__perweek__)
+            day = weeks * 7 + self.__nth__[nth] - _WEEKSHIFT
+            before = bisect.bisect_right(self.__holidays__, day)
+            if before == holidays:
+                return day
+            holidays = before
+
+    def __worktime__(self, utc):
+        """Returns the working time in seconds before the given UTC
+        timestamp, counted from an arbitrary origin.
+        """
+        local = utc - self.__offset__
+        day = int(local // _DAY)
+        within = 0
+        if self.__isworkday__(day):
+            within = min(max(local - day * _DAY - self.opens, 0),
+                         self.__length__)
+        return self.__workdays__(day) * self.__length__ + within
+
+    def __atworktime__(self, worktime):
+        """Returns the earliest UTC timestamp with the given __worktime__.
+        A full day of work ends at closing time, not on the next morning.
+        """
+        length = self.__length__
+        index = int(math.ceil(worktime / length)) - 1
+        day = self.__workday__(index)
+        within = worktime - index * length
+        return day * _DAY + self.opens + within + self.__offset__
+
+    def isworkday(self, value):
+        """Returns True if the given date, Chronyk object, UTC timestamp or
+        string falls on a workday.
+        """
+        return self.__isworkday__(self.__day__(value))
+
+    def workdays(self, start, end):
+        """Returns the number of workdays from the day of start up to, but
+        not including, the day of end.
+        """
+        return self.__workdays__(self.__day__(end)) - \
+            self.__workdays__(self.__day__(start))
+
+    def between(self, start, end):
+        """Returns the working time between two instants (Chronyk objects,
+        UTC timestamps or strings) as a ChronykDelta. It is negative if end
+        lies before start.
+        """
+        return ChronykDelta(
+            self.__worktime__(_toutc(end, self.timezone)) -
+            self.__worktime__(_toutc(start, self.timezone)))
+
+    def add(self, value, delta):
+        """Adds working time to an instant and returns a Chronyk object.
+
+        :param value (required)
+            A Chronyk object, UTC timestamp or string.
+
+        :param delta (required)
+            A ChronykDelta, a string like "4 hours" or a number of seconds,
+            counted as working time. Note that "3 days" means 72 hours of
+            work here, use adddays() for business days.
+        """
+        seconds = _toseconds(delta, "Working time", positive=False)
+        utc = _toutc(value, self.timezone)
+        worktime = self.__worktime__(utc) + seconds
+        return self.__result__(self.__atworktime__(worktime))
+
+    def adddays(self, value, days):
+        """Moves an instant by the given number of workdays, keeping the
+        time of day, and returns a Chronyk object. Instants on days off are
+        moved to the next workday first, so saturday plus one business day
+        is monday.
+        """
+        if type(days) != int:
+            raise TypeError("Failed to recognize given type.")
+        utc = _toutc(value, self.timezone)
+        local = utc - self.__offset__
+        day = int(local // _DAY)
+        index = self.__workdays__(day) + days
+        if days > 0 and not self.__isworkday__(day):
+            index -= 1
+        target = self.__workday__(index)
+        return self.__result__(utc + (target - day) * _DAY)
+
+    def betweenbatch(self, starts, ends):
+        """Returns an array.array of the working seconds between every pair
+        of starts and ends (UTC timestamps or Chronyk objects).
+        """
+        worktime = self.__worktime__
+        timezone = self.timezone
+        return array.array("d", [
+            worktime(_toutc(end, timezone)) - worktime(_toutc(start, timezone))
+            for start, end in zip(starts, ends)])
+
+    def addbatch(self, timestamps, delta):
+        """Adds the same working time to every given UTC timestamp (or
+        Chronyk object) and returns a ChronykArray with the results.
+        """
+        seconds = _toseconds(delta, "Working time", positive=False)
+        worktime = self.__worktime__
+        atworktime = self.__atworktime__
+        timezone = self.timezone
+        result = ChronykArray()
+        result.fromlist([
+            float(atworktime(worktime(_toutc(t, timezone)) + seconds))
+            for t in timestamps])
+        return result
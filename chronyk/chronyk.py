@@ -10,6 +10,81 @@ import calendar
 LOCALTZ = time.altzone
 
 
+_NS = 10 ** 9
+
+
+def _tons(seconds):
+    """Converts seconds (int or float) to integer nanoseconds. Only the
+    fractional part goes through float multiplication.
+    """
+    if type(seconds) == int:
+        return seconds * _NS
+    whole = math.floor(seconds)
+    return int(whole) * _NS + int(round((seconds - whole) * _NS))
+
+
+# Lengths ChronykDelta uses where calendar months and years need to be
+# expressed in seconds
+_MONTH = 3600 * 24 * 30
+_YEAR = 3600 * 24 * 365
+
+_MONTHDAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _monthdays(year, month):
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _MONTHDAYS[month - 1]
+
+
+def _daysfromcivil(year, month, day):
+    """Days since 1970-01-01 for a proleptic gregorian date, in O(1).
+    """
+    if month <= 2:
+        year -= 1
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _civilfromdays(days):
+    """Inverse of _daysfromcivil, returns a (year, month, day) tuple.
+    """
+    days += 719468
+    era = days // 146097
+    doe = days - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    day = doy - (153 * mp + 2) // 5 + 1
+    month = mp + 3 if mp < 10 else mp - 9
+    year = yoe + era * 400 + (1 if month <= 2 else 0)
+    return (year, month, day)
+
+
+def _shiftmonth(year, month, day, months):
+    """Moves a date by a number of calendar months, clamping the day to the
+    length of the resulting month.
+    """
+    index = year * 12 + month - 1 + months
+    year = index // 12
+    month = index % 12 + 1
+    return (year, month, min(day, _monthdays(year, month)))
+
+
+def _monthshift(timestamp, months, offset):
+    """Returns the number of seconds (a multiple of a day) that moves the
+    given timestamp by a number of calendar months. offset is the amount of
+    seconds subtracted from the timestamp to get to the wall clock.
+    """
+    days = int((timestamp - offset) // (3600 * 24))
+    year, month, day = _civilfromdays(days)
+    year, month, day = _shiftmonth(year, month, day, months)
+    return (_daysfromcivil(year, month, day) - days) * 3600 * 24
+
+
 def _isdst(dt):
     """Check if date is in dst.
     """
@@ -128,6 +203,38 @@ def guesstype(timestr):
     return Chronyk(timestr)
 
 
+def _toutc(value, timezone=LOCALTZ):
+    """Returns the UTC timestamp (as used by Chronyk comparisons, i.e.
+    float(Chronyk(...))) of a Chronyk object, a UTC timestamp or a string,
+    which is parsed in the given timezone.
+    """
+    if type(value) == Chronyk:
+        return value.timestamp(timezone=0)
+    if type(value) in [int, float]:
+        return value
+    if type(value) == str:
+        return Chronyk(value, timezone=timezone).timestamp(timezone=0)
+    raise TypeError("Failed to recognize given type.")
+
+
+def _toseconds(delta, name="Durations", positive=True):
+    """Turns a ChronykDelta, a string like "15 minutes" or a number of
+    seconds into a number of seconds. The name is used in error messages.
+    """
+    if type(delta) == str:
+        delta = ChronykDelta(delta)
+    if type(delta) == ChronykDelta:
+        if delta.months or delta.years:
+            raise ValueError(
+                "{} can't be measured in months or years.".format(name))
+        delta = delta.seconds
+    if type(delta) not in [int, float]:
+        raise TypeError("Failed to recognize given type.")
+    if positive and delta <= 0:
+        raise ValueError("{} have to be positive.".format(name))
+    return delta
+
+
 def _round(num):
     """A custom rounding function that's a bit more 'strict'.
     """
@@ -138,6 +245,49 @@ def _round(num):
         return int(math.floor(num))
 
 
+# Units ChronykDelta.timestring() counts in, largest first.
+_UNITLENGTHS = (3600 * 24 * 365, 3600 * 24 * 30, 3600 * 24, 3600, 60, 1)
+
+
+def _nextchange(seconds, maxunits, downwards=False):
+    """Returns the closest amount of seconds (above the given one, or below
+    it if downwards) at which ChronykDelta(seconds).timestring(maxunits)
+    changes, or None if it doesn't change anymore.
+
+    timestring() splits the amount up unit by unit with _round, whose result
+    changes whenever the remainder crosses k + 0.8 units. Units after the
+    ones that are shown don't matter.
+    """
+    remainder = seconds
+    first = None
+    closest = None
+    for level, length in enumerate(_UNITLENGTHS):
+        threshold = (math.floor(remainder / length) + 0.8) * length
+        if not downwards:
+            if threshold < remainder:
+                threshold += length
+            # Values below 1 aren't shown (or clamped to 0).
+            threshold = max(threshold, 0.8 * length)
+            change = seconds + threshold - remainder
+            closest = change if closest is None else min(closest, change)
+        else:
+            if threshold >= remainder:
+                threshold -= length
+            if threshold >= 0.8 * length:
+                change = seconds - (remainder - threshold)
+                closest = change if closest is None else max(closest, change)
+
+        value = _round(remainder / length)
+        if value < 0 and length != 1:
+            value = 0
+        remainder -= value * length
+        if first is None and value != 0:
+            first = level
+        if first is not None and level >= first + maxunits - 1:
+            break
+    return closest
+
+
 def _pluralstr(string, value):
     if value == 1:
         return "1 {}".format(string)
@@ -145,6 +295,696 @@ def _pluralstr(string, value):
         return "{} {}s".format(value, string)
 
 
+# Digit-only strings, optionally with a fraction, read as epoch timestamps.
+_EPOCHRE = re.compile(r"\s*([+-]?)([0-9]+)(?:\.([0-9]*))?\s*\Z")
+
+# Units of epoch timestamps, as powers of ten per second, in the order they
+# are tried.
+_EPOCHUNITS = collections.OrderedDict(
+    [("s", 0), ("ms", 3), ("us", 6), ("ns", 9)])
+
+# Instants (in seconds since the epoch) numeric strings are expected in, from
+# 1973-03-03 to 2286-11-20. The unit that puts a value in here is used.
+_epochrange = (10 ** 8, 10 ** 10)
+
+
+def setepochrange(minimum, maximum):
+    """Sets the range of instants numeric strings like "1410508814" or
+    "1410508814295" are recognized in, as Chronyk objects or seconds since
+    the epoch. A number is read in the first of seconds, milliseconds,
+    microseconds and nanoseconds that puts it into the range; numbers that
+    don't fit any are parsed like other strings. The default is 1973-03-03
+    to 2286-11-20. Ranges wider than a factor of 1000 make the units
+    ambiguous, smaller units then lose.
+    """
+    global _epochrange
+    bounds = []
+    for bound in [minimum, maximum]:
+        if type(bound) == Chronyk:
+            bound = bound.timestamp(timezone=0) - LOCALTZ
+        if type(bound) not in [int, float]:
+            raise TypeError("Failed to recognize given type.")
+        bounds.append(bound)
+    if bounds[0] >= bounds[1]:
+        raise ValueError("The minimum has to lie before the maximum.")
+    _epochrange = tuple(bounds)
+
+
+def _epochexponent(value, unit=None):
+    """Returns the power of ten per second of the unit ("s", "ms", "us" or
+    "ns") a number is in, inferred from _epochrange unless given. None if
+    it doesn't fit any.
+    """
+    if unit is not None:
+        if unit not in _EPOCHUNITS:
+            raise ValueError("Unknown unit: {}".format(unit))
+        return _EPOCHUNITS[unit]
+    minimum, maximum = _epochrange
+    for exponent in _EPOCHUNITS.values():
+        if minimum <= value / 10 ** exponent < maximum:
+            return exponent
+    return None
+
+
+def _epochns(timestr, unit=None):
+    """Returns the integer nanoseconds since the epoch a numeric string
+    stands for, or None if it isn't one, see _epochexponent.
+    """
+    match = _EPOCHRE.match(timestr)
+    if match is None:
+        return None
+    sign, whole, fraction = match.groups()
+    fraction = fraction or ""
+    value = float(whole + "." + fraction)
+    exponent = _epochexponent(-value if sign == "-" else value, unit)
+    if exponent is None:
+        return None
+    # Exact integer arithmetic, digits below a nanosecond are dropped.
+    digits = int(whole + fraction)
+    shift = 9 - exponent - len(fraction)
+    if shift >= 0:
+        ns = digits * 10 ** shift
+    else:
+        ns = digits // 10 ** -shift
+    return -ns if sign == "-" else ns
+
+
+# http://en.wikipedia.org/wiki/Date_format_by_country
+_DATETIMEFORMATS = (
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S%Z",
+    "%c",
+    "%s"
+)
+
+_DATEFORMATS = (
+    # ISO
+    "%Y-%m-%d",
+    # YMD other than ISO
+    "%Y%m%d",
+    "%Y.%m.%d",
+    # Popular MDY formats
+    "%m/%d/%Y",
+    "%m/%d/%y",
+    # DMY with full year
+    "%d %m %Y",
+    "%d-%m-%Y",
+    "%d/%m/%Y",
+    "%d/%m %Y",
+    "%d.%m.%Y",
+    "%d. %m. %Y",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%d. %b %Y",
+    "%d. %B %Y",
+    # MDY with full year
+    "%b %d %Y",
+    "%b %dst %Y",
+    "%b %dnd %Y",
+    "%b %drd %Y",
+    "%b %dth %Y",
+    "%b %d, %Y",
+    "%b %dst, %Y",
+    "%b %dnd, %Y",
+    "%b %drd, %Y",
+    "%b %dth, %Y",
+    "%B %d %Y",
+    "%B %dst %Y",
+    "%B %dnd %Y",
+    "%B %drd %Y",
+    "%B %dth %Y",
+    "%B %d, %Y",
+    "%B %dst, %Y",
+    "%B %dnd, %Y",
+    "%B %drd, %Y",
+    "%B %dth, %Y",
+    # DMY with 2-digit year
+    "%d %m %y",
+    "%d-%m-%y",
+    "%d/%m/%y",
+    "%d/%m-%y",  # why denmark?
+    "%d.%m.%y",
+    "%d. %m. %y",
+    "%d %b %y",
+    "%d %B %y",
+    "%d. %b %y",
+    "%d. %B %y",
+    # MDY with 2-digit year
+    "%b %dst %y",
+    "%b %dnd %y",
+    "%b %drd %y",
+    "%b %dth %y",
+    "%B %dst %y",
+    "%B %dnd %y",
+    "%B %drd %y",
+    "%B %dth %y",
+)
+
+_TIMEFORMATS = (
+    # 24 hour clock with seconds
+    "%H:%M:%S %z",
+    "%H:%M:%S %z",
+    "%H:%M:%S",
+    # 24 hour clock without seconds
+    "%H:%M %z",
+    "%H:%M %Z",
+    "%H:%M",
+    # 12 hour clock with seconds
+    "%I:%M:%S %p %z",
+    "%I:%M:%S %p %Z",
+    "%I:%M:%S %p",
+    # 12 hour clock without seconds
+    "%I:%M %p %z",
+    "%I:%M %p %Z",
+    "%I:%M %p"
+)
+
+
+# Directives whose output depends on the locale (month and day names, am/pm)
+_LOCALEDIRECTIVES = "aAbBp"
+
+# Punctuation the locale-independent directives can match on their own
+_DIRECTIVEPUNCT = {
+    "z": frozenset("+-:."),
+    "Z": frozenset("+-")
+}
+
+# (min, max) number of digits the numeric directives match
+_DIRECTIVEDIGITS = {
+    "Y": (4, 4),
+    "y": (2, 2),
+    "m": (1, 2),
+    "d": (1, 2),
+    "H": (1, 2),
+    "I": (1, 2),
+    "M": (1, 2),
+    "S": (1, 2),
+    "f": (1, 6),
+    "j": (1, 3)
+}
+
+# (digits, digit runs, letter runs) the other directives can match, as
+# (min, max) tuples. Locale names and timezone names may contain digits in
+# some locales.
+_DIRECTIVECOUNTS = {
+    "a": ((0, 4), (0, 2), (1, 3)),
+    "A": ((0, 4), (0, 2), (1, 3)),
+    "b": ((0, 4), (0, 2), (1, 3)),
+    "B": ((0, 4), (0, 2), (1, 3)),
+    "p": ((0, 4), (0, 2), (0, 3)),
+    "z": ((0, 12), (0, 4), (0, 1)),
+    "Z": ((0, 4), (0, 2), (0, 3))
+}
+
+# Counts above this are treated alike, no format can match them.
+_MAXCOUNT = 64
+
+# Number of input families whose candidate lists are kept
+_FORMATCACHESIZE = 4096
+
+_formatcache = {}
+_formatshapes = {}
+_localepunct = None
+_letterwords = None
+
+_LETTERRE = re.compile(r"[^\W\d_]+")
+
+_rejected = collections.OrderedDict()
+_rejectcachesize = 1024
+
+
+def setrejectcache(size):
+    """Sets how many recently rejected strings are remembered, so that
+    parsing them again fails without searching the formats. Use size=0 to
+    disable the cache. The default is 1024.
+    """
+    global _rejectcachesize
+    if type(size) != int:
+        raise TypeError("Failed to recognize given type.")
+    if size < 0:
+        raise ValueError("The cache size can't be negative.")
+    _rejectcachesize = size
+    while len(_rejected) > size:
+        _rejected.popitem(last=False)
+
+
+def _reject(timestr):
+    if _rejectcachesize:
+        _rejected[timestr] = True
+        if len(_rejected) > _rejectcachesize:
+            _rejected.popitem(last=False)
+
+
+def _getlocalepunct():
+    """Returns the punctuation used in the current locale's month names, day
+    names and am/pm designators (e.g. "janv." in French).
+    """
+    global _localepunct
+    if _localepunct is None:
+        names = []
+        for month in range(1, 13):
+            struct = (2014, month, month, month, 0, 0, 0, 1, 0)
+            names.append(time.strftime("%a %A %b %B %p", struct))
+        _localepunct = frozenset(
+            c for c in "".join(names) if not c.isalnum() and not c.isspace())
+    return _localepunct
+
+
+def _getletterwords():
+    """Returns every run of letters a format can match: the current
+    locale's month names, day names and am/pm designators, the zone names
+    strptime knows for %Z and the literal letters of the formats ("t", "st",
+    ...).
+    """
+    global _letterwords
+    if _letterwords is None:
+        names = ["utc", "gmt"] + [name.lower() for name in time.tzname]
+        for month in range(1, 13):
+            struct = (2014, month, 1, month, 0, 0, month % 7, 1, 0)
+            names.append(time.strftime("%a %A %b %B %p", struct).lower())
+        for pattern in _DATETIMEFORMATS + _DATEFORMATS + _TIMEFORMATS:
+            names.append(re.sub("%.", " ", pattern).lower())
+        _letterwords = frozenset(_LETTERRE.findall(" ".join(names)))
+    return _letterwords
+
+
+def _formatshape(pattern):
+    """Returns (required, allowed, letters, counts) for a strptime pattern:
+    the punctuation any matching string has to contain, the punctuation it
+    may contain, whether it has to (True), may (None) or must not (False)
+    contain letters and the (min, max) number of digits, runs of digits and
+    runs of letters it can contain. None is returned for patterns that can
+    match anything.
+    """
+    shape = _formatshapes.get(pattern)
+    if shape is not None or pattern in _formatshapes:
+        return shape
+
+    required = set()
+    allowed = set()
+    letters = False
+    counts = [[0, 0], [0, 0], [0, 0]]
+    # What the previous token ended with: "digit", "alpha", None for
+    # neither, or "any" if it can't be told.
+    last = None
+
+    def run(index, kind):
+        # Adjacent runs of the same kind merge into one.
+        if last != kind and last != "any":
+            counts[index][0] += 1
+        if last != kind:
+            counts[index][1] += 1
+
+    chars = iter(pattern)
+    for char in chars:
+        if char == "%":
+            directive = next(chars, "")
+            if directive in _DIRECTIVEDIGITS:
+                low, high = _DIRECTIVEDIGITS[directive]
+                counts[0][0] += low
+                counts[0][1] += high
+                run(1, "digit")
+                last = "digit"
+                continue
+            if directive not in _DIRECTIVECOUNTS:
+                _formatshapes[pattern] = None
+                return None
+            if directive in _LOCALEDIRECTIVES:
+                letters = True if directive != "p" else letters or None
+                allowed |= _getlocalepunct()
+            else:
+                letters = letters or None
+                allowed |= _DIRECTIVEPUNCT[directive]
+            digits, digitruns, alpharuns = _DIRECTIVECOUNTS[directive]
+            counts[0][1] += digits[1]
+            counts[1][1] += digitruns[1]
+            counts[2][1] += alpharuns[1]
+            # Only names have a minimum, one run of letters, which may merge
+            # with letters right before it.
+            if last not in ["alpha", "any"]:
+                counts[2][0] += alpharuns[0]
+            last = "any"
+        elif char.isalpha():
+            letters = True
+            run(2, "alpha")
+            last = "alpha"
+        elif char.isalnum():
+            # Literal digits aren't used in any of the formats.
+            _formatshapes[pattern] = None
+            return None
+        else:
+            if not char.isspace():
+                required.add(char)
+            last = None
+
+    shape = (required, required | allowed, letters,
+             tuple(tuple(c) for c in counts))
+    _formatshapes[pattern] = shape
+    return shape
+
+
+def _matchesshape(shape, letters, punct, counts):
+    if shape is None:
+        return True
+    required, allowed, needsletters, bounds = shape
+    if needsletters is True and not letters:
+        return False
+    if needsletters is False and letters:
+        return False
+    for count, (low, high) in zip(counts, bounds):
+        if not low <= count <= high:
+            return False
+    return required <= punct and punct <= allowed
+
+
+def _formatsfor(timestr):
+    """Returns the (datetimeformats, timeformats) that could possibly match
+    the given string, in the order they should be tried.
+
+    Strings are grouped into families by whether they contain letters, which
+    punctuation they use and how many digits, runs of digits and runs of
+    letters they contain. The candidate lists for a family are only built the
+    first time a string of that family is parsed, so strptime only ever
+    compiles the regexes for formats that have a chance to match, and strings
+    no format can match are rejected without calling strptime at all.
+    """
+    letters = False
+    punct = set()
+    digits = 0
+    digitruns = 0
+    alpharuns = 0
+    last = None
+    for char in timestr:
+        if char.isdecimal():
+            digits += 1
+            if last != "digit":
+                digitruns += 1
+            last = "digit"
+        elif char.isalpha():
+            letters = True
+            if last != "alpha":
+                alpharuns += 1
+            last = "alpha"
+        else:
+            if not char.isalnum() and not char.isspace():
+                punct.add(char)
+            last = None
+    counts = (min(digits, _MAXCOUNT), min(digitruns, _MAXCOUNT),
+              min(alpharuns, _MAXCOUNT))
+    family = (letters, frozenset(punct), counts)
+
+    formats = _formatcache.get(family)
+    if formats is None:
+        datetimeformats = []
+        for pattern in _DATETIMEFORMATS:
+            datetimeformats.append(pattern)
+        for dateformat in _DATEFORMATS:
+            for timeformat in _TIMEFORMATS:
+                datetimeformats.append("{} {}".format(dateformat, timeformat))
+            datetimeformats.append(dateformat)
+        datetimeformats = tuple(
+            f for f in datetimeformats
+            if _matchesshape(_formatshape(f), letters, punct, counts))
+        # The date part is prepended as "%Y-%m-%d " later on, so time-only
+        # strings are checked against the time formats alone.
+        timeformats = tuple(
+            f for f in _TIMEFORMATS
+            if _matchesshape(_formatshape(f), letters, punct, counts))
+        formats = (datetimeformats, timeformats)
+        if len(_formatcache) >= _FORMATCACHESIZE:
+            _formatcache.clear()
+        _formatcache[family] = formats
+    return formats
+
+
+# Functions called whenever TIMEZONES changes, e.g. to drop caches built from
+# the zone names
+_zonelisteners = []
+
+
+class _ZoneTable(dict):
+    """dict that forgets the rejected strings whenever it is changed, since
+    they might parse with the new zone names.
+    """
+
+    def __changed__(self):
+        _rejected.clear()
+        for listener in _zonelisteners:
+            listener()
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self.__changed__()
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.__changed__()
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self.__changed__()
+
+    def setdefault(self, key, default=None):
+        value = dict.setdefault(self, key, default)
+        self.__changed__()
+        return value
+
+    def pop(self, *args):
+        value = dict.pop(self, *args)
+        self.__changed__()
+        return value
+
+    def popitem(self):
+        item = dict.popitem(self)
+        self.__changed__()
+        return item
+
+    def clear(self):
+        dict.clear(self)
+        self.__changed__()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+
+# Common timezone abbreviations, in seconds west of UTC. Some of them are
+# ambiguous, those map to the zone listed first in the comment and can be
+# changed here, e.g. chronyk.TIMEZONES["ist"] = -7200 for Israel.
+TIMEZONES = _ZoneTable({
+    "utc": 0,
+    "ut": 0,
+    "gmt": 0,
+    "z": 0,
+    "wet": 0,
+    "west": -3600,
+    "bst": -3600,  # British, Bangladesh
+    "ist": -19800,  # India, Ireland, Israel
+    "cet": -3600,
+    "cest": -7200,
+    "met": -3600,
+    "mest": -7200,
+    "wat": -3600,
+    "eet": -7200,
+    "eest": -10800,
+    "cat": -7200,
+    "sast": -7200,
+    "eat": -10800,
+    "msk": -10800,
+    "gst": -14400,
+    "pkt": -18000,
+    "npt": -20700,
+    "ict": -25200,
+    "wib": -25200,
+    "hkt": -28800,
+    "sgt": -28800,
+    "pht": -28800,
+    "awst": -28800,
+    "jst": -32400,
+    "kst": -32400,
+    "acst": -34200,
+    "acdt": -37800,
+    "aest": -36000,
+    "aedt": -39600,
+    "nzst": -43200,
+    "nzdt": -46800,
+    "hst": 36000,
+    "akst": 32400,
+    "akdt": 28800,
+    "pst": 28800,
+    "pdt": 25200,
+    "mst": 25200,
+    "mdt": 21600,
+    "cst": 21600,  # US Central, China, Cuba
+    "cdt": 18000,
+    "est": 18000,
+    "edt": 14400,
+    "ast": 14400,  # Atlantic, Arabia
+    "adt": 10800,
+    "nst": 12600,
+    "ndt": 9000,
+    "brt": 10800,
+    "art": 10800
+})
+
+# A zone name or numeric offset (+0200, +02:00, +02) at the end of a string,
+# after a digit or am/pm.
+_ZONERE = re.compile(r"""
+    ^(?P<rest>.*?\d(?:\s*[ap]\.?m\.?)?)\s*
+    (?:
+        (?P<name>[a-z]{1,5})
+      | (?P<sign>[+-])(?P<hours>\d\d)(?::?(?P<minutes>\d\d))?
+    )$""", re.VERBOSE)
+
+
+_BUFFERTYPES = (bytes, bytearray, memoryview)
+
+# Whitespace and the characters of ISO dates, as byte values.
+_SPACEBYTES = frozenset(b" \t\r\n\x0b\x0c")
+_TBYTES = frozenset(b"Tt ")
+_ZBYTES = frozenset(b"Zz")
+
+
+def _bufferepochns(buffer, offset=0, length=None):
+    """Returns the integer nanoseconds since the epoch the given part of a
+    buffer stands for, or None if it isn't a numeric epoch, see _epochns.
+    """
+    view = memoryview(buffer)
+    if view.format != "B":
+        view = view.cast("B")
+    end = len(view) if length is None else offset + length
+    try:
+        timestr = bytes(view[offset:end]).decode("ascii")
+    except UnicodeDecodeError:
+        return None
+    return _epochns(timestr)
+
+
+def _twodigits(buffer, i):
+    """Returns the number written in buffer[i:i + 2], or -1.
+    """
+    high = buffer[i] - 48
+    low = buffer[i + 1] - 48
+    if 0 <= high <= 9 and 0 <= low <= 9:
+        return high * 10 + low
+    return -1
+
+
+def _scanbuffer(buffer, start, end):
+    """Reads an ISO date, optionally followed by a time and a UTC offset
+    ("2014-09-18", "2014-09-18 12:00", "2014-09-18T12:00:00+02:00", ...)
+    straight from the bytes of a buffer, without creating any strings.
+
+    Returns (year, month, day, hour, minute, second, offset in seconds west
+    of UTC or None), or None if buffer[start:end] is anything else. Only
+    covers what the string formats parse the same way.
+    """
+    while start < end and buffer[start] in _SPACEBYTES:
+        start += 1
+    while end > start and buffer[end - 1] in _SPACEBYTES:
+        end -= 1
+    if end - start < 10 or buffer[start + 4] != 45 or \
+            buffer[start + 7] != 45:
+        return None
+    century = _twodigits(buffer, start)
+    year = _twodigits(buffer, start + 2)
+    month = _twodigits(buffer, start + 5)
+    day = _twodigits(buffer, start + 8)
+    if century < 0 or year < 0 or month < 0 or day < 0:
+        return None
+    year += century * 100
+    hour = minute = second = 0
+    west = None
+
+    i = start + 10
+    if i < end:
+        if end - i < 6 or buffer[i] not in _TBYTES or buffer[i + 3] != 58:
+            return None
+        hour = _twodigits(buffer, i + 1)
+        minute = _twodigits(buffer, i + 4)
+        if hour < 0 or minute < 0:
+            return None
+        i += 6
+        if i < end and buffer[i] == 58:
+            if end - i < 3:
+                return None
+            second = _twodigits(buffer, i + 1)
+            if second < 0:
+                return None
+            i += 3
+        elif buffer[start + 10] != 32:
+            # The string formats only know "T" with seconds.
+            return None
+        while i < end and buffer[i] in _SPACEBYTES:
+            i += 1
+        if i < end:
+            sign = buffer[i]
+            if sign in _ZBYTES and end - i == 1:
+                west = 0
+            elif sign in [43, 45] and end - i in [3, 5, 6]:
+                hours = _twodigits(buffer, i + 1)
+                minutes = 0
+                if end - i == 5:
+                    minutes = _twodigits(buffer, i + 3)
+                elif end - i == 6:
+                    if buffer[i + 3] != 58:
+                        return None
+                    minutes = _twodigits(buffer, i + 4)
+                if not 0 <= hours <= 14 or not 0 <= minutes <= 59:
+                    return None
+                west = hours * 3600 + minutes * 60
+                if sign == 43:
+                    west = -west
+            else:
+                return None
+
+    if not 1 <= month <= 12 or not 1 <= day <= _monthdays(year, month) or \
+            hour > 23 or minute > 59 or second > 61:
+        return None
+    return (year, month, day, hour, minute, second, west)
+
+
+def _zonewest(name):
+    """Returns the offset in seconds west of UTC for a (lowercase) zone
+    name, or None if it is unknown. The names of the local zone are known as
+    well.
+    """
+    west = TIMEZONES.get(name)
+    if west is None:
+        if name == time.tzname[0].lower():
+            west = time.timezone
+        elif time.daylight and name == time.tzname[1].lower():
+            west = time.altzone
+    return west
+
+
+def _findzone(timestr):
+    """Splits a trailing timezone name or numeric offset off a string.
+    Returns (rest, offset in seconds west of UTC), or None if the string
+    doesn't end in one.
+    """
+    match = _ZONERE.match(timestr)
+    if match is None:
+        return None
+    if match.group("name") is not None:
+        west = _zonewest(match.group("name"))
+        if west is None:
+            return None
+        return (match.group("rest"), west)
+    # Numeric offsets only follow times, so dates like 2014-09-18 are left
+    # alone.
+    hours = int(match.group("hours"))
+    minutes = int(match.group("minutes") or 0)
+    if ":" not in match.group("rest") or hours > 14 or minutes > 59:
+        return None
+    west = hours * 3600 + minutes * 60
+    if match.group("sign") == "+":
+        west = -west
+    return (match.group("rest"), west)
+
+
 class DateRangeError(Exception):
     """Exception thrown when the value passed to the chronyk.Chronyk
     constructor exceeds the range permitted with allowpast and allowfuture.
@@ -172,6 +1012,25 @@ class Chronyk:
         Determines if values from the future are allowed. This can be handy
         when parsing direct user input.
 
+    :param exact = False
+        Stores the time as integer nanoseconds instead of a float, so that
+        comparisons and arithmetic with other exact values don't lose any
+        precision. Values are only converted to floats at the edges
+        (timestamp(), datetime(), float(), ...).
+
+    :param maxattempts = None
+        The maximum number of formats tried when parsing an absolute time
+        string. Most strings that can't be parsed are rejected before any
+        format is tried, this puts a hard limit on the rest. A ValueError is
+        raised when the limit is reached.
+
+    :param offset = 0
+    :param length = None
+        If timestr is a bytes, bytearray or memoryview object, only the
+        given part of it is parsed (by default everything from offset on).
+        Plain ISO dates and times are read straight from the buffer, other
+        strings are decoded as UTF-8 first.
+
     If the passed values exceeds the bounds set by allowpast and allowfuture,
     a chronyk.DateRangeError is raised. If the type of the value is unknown to
     Chronyk, a TypeError is raised. If Chronyk fails to parse a given string,
@@ -179,38 +1038,110 @@ class Chronyk:
 
     Subtracting Chronyk instances from another will yield a ChronykDelta
     object, which in turn can be added to other Chronyk instances.
+
+    Chronyk objects are immutable (except for the timezone attribute, which
+    only affects output) and hashable, so they can be used in sets, as dict
+    keys and as functools.lru_cache arguments. Hashes are consistent with
+    equality against ints and floats.
     """
 
+    __slots__ = ("timezone", "__timestamp__", "__ns__")
+
     def __init__(
             self, timestr=None, timezone=LOCALTZ,
-            allowpast=True, allowfuture=True):
+            allowpast=True, allowfuture=True, exact=False,
+            maxattempts=None, offset=0, length=None):
         """ Converts input to UTC timestamp. """
 
         if timestr is None:
             timestr = time.time()
         self.timezone = timezone
+        ns = None
 
         if type(timestr) == str:
-            self.__timestamp__ = self.__fromstring__(timestr)
+            timestamp = self.__fromstring__(timestr, maxattempts)
+            if exact:
+                # Epochs in nanoseconds need more digits than floats have.
+                ns = _epochns(timestr)
+                if ns is None:
+                    ns = _tons(timestamp)
+                else:
+                    ns += _tons(LOCALTZ)
+
+        elif type(timestr) in _BUFFERTYPES:
+            timestamp = self.__frombuffer__(
+                timestr, offset, length, maxattempts)
+            if exact:
+                # Same as for strings, epochs keep all their digits.
+                ns = _bufferepochns(timestr, offset, length)
+                if ns is None:
+                    ns = _tons(timestamp)
+                else:
+                    ns += _tons(LOCALTZ)
 
         elif type(timestr) in [int, float]:
-            self.__timestamp__ = timestr + self.timezone
+            timestamp = timestr + self.timezone
+            if exact:
+                ns = _tons(timestr) + _tons(self.timezone)
 
         elif type(timestr) in [
                 datetime.datetime, datetime.date, datetime.time]:
-            self.__timestamp__ = _mktime(timestr.timetuple()) + self.timezone
+            timestamp = _mktime(timestr.timetuple()) + self.timezone
+            if exact:
+                ns = _tons(timestamp)
+                if type(timestr) == datetime.datetime:
+                    ns += timestr.microsecond * 1000
 
         elif type(timestr) == time.struct_time:
-            self.__timestamp__ = _mktime(timestr) + self.timezone
+            timestamp = _mktime(timestr) + self.timezone
+            if exact:
+                ns = _tons(timestamp)
 
         else:
             raise TypeError("Failed to recognize given type.")
 
+        if ns is not None:
+            timestamp = ns / _NS
+        self.__ns__ = ns
+        self.__timestamp__ = timestamp
+
         if not allowpast and self.__timestamp__ < currentutc():
             raise DateRangeError("Values from the past are not allowed.")
         if not allowfuture and self.__timestamp__ > currentutc():
             raise DateRangeError("Values from the future are not allowed.")
 
+    @classmethod
+    def fromns(cls, nanoseconds, timezone=LOCALTZ):
+        """Creates an exact Chronyk object from an integer amount of
+        nanoseconds since the epoch.
+
+        :param nanoseconds (required)
+            The timestamp in nanoseconds (int).
+
+        :param timezone = local timezone
+            The timezone (in seconds west of UTC) the given time is in.
+        """
+        if type(nanoseconds) != int:
+            raise TypeError("Failed to recognize given type.")
+        self = cls.__new__(cls)
+        self.timezone = timezone
+        self.__ns__ = nanoseconds + _tons(timezone)
+        self.__timestamp__ = self.__ns__ / _NS
+        return self
+
+    def __setattr__(self, name, value):
+        if name != "timezone" and hasattr(self, name):
+            raise AttributeError("Chronyk objects are immutable.")
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError("Chronyk objects are immutable.")
+
+    def __hash__(self):
+        # Equal exact values always have equal floats, and floats hash like
+        # the ints they are equal to.
+        return hash(self.__timestamp__)
+
     def __repr__(self):
         return "Chronyk({})".format(self.timestring())
 
@@ -225,43 +1156,77 @@ class Chronyk:
         return float(self.timestamp(timezone=0))
 
     # Comparison Operators
-    def __eq__(self, other):
+    def __operands__(self, other):
+        """Returns the pair of values to compare self and other by, as exact
+        integers if both sides allow it. None for unsupported types.
+        """
         if type(other) == Chronyk:
-            return self.__timestamp__ == other.timestamp(timezone=0)
+            if self.__ns__ is not None and other.__ns__ is not None:
+                return (self.__ns__, other.__ns__)
+            return (self.__timestamp__, other.timestamp(timezone=0))
+        if type(other) == int and self.__ns__ is not None:
+            return (self.__ns__, other * _NS)
         if type(other) in [int, float]:
-            return self.__timestamp__ == other
+            return (self.__timestamp__, other)
 
-        return NotImplemented
+        return None
+
+    def __eq__(self, other):
+        operands = self.__operands__(other)
+        if operands is None:
+            return NotImplemented
+        return operands[0] == operands[1]
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __gt__(self, other):
-        if type(other) == Chronyk:
-            return self.__timestamp__ > other.timestamp(timezone=0)
-        if type(other) in [int, float]:
-            return self.__timestamp__ > other
-
-        return NotImplemented
+        operands = self.__operands__(other)
+        if operands is None:
+            return NotImplemented
+        return operands[0] > operands[1]
 
     def __le__(self, other):
         return not self.__gt__(other)
 
     def __lt__(self, other):
-        if type(other) == Chronyk:
-            return self.__timestamp__ < other.timestamp(timezone=0)
-        if type(other) in [int, float]:
-            return self.__timestamp__ < other
-
-        return NotImplemented
+        operands = self.__operands__(other)
+        if operands is None:
+            return NotImplemented
+        return operands[0] < operands[1]
 
     def __ge__(self, other):
         return not self.__lt__(other)
 
     # Arithmetic Operators
+    def __calendar__(self, delta, coef):
+        """Returns the seconds needed to apply the calendar months and years
+        of a ChronykDelta to this time, in this object's timezone.
+        """
+        months = (delta.years * 12 + delta.months) * coef
+        if months == 0:
+            return 0
+        return _monthshift(
+            self.__timestamp__, months, self.timezone + LOCALTZ)
+
     def __add__(self, other):
+        if self.__ns__ is not None:
+            if type(other) == ChronykDelta:
+                shift = self.__calendar__(other, 1)
+                if other.__ns__ is not None:
+                    ns = other.__ns__
+                else:
+                    ns = _tons(other.seconds)
+                return Chronyk.fromns(
+                    self.nanoseconds() + ns + shift * _NS,
+                    timezone=self.timezone)
+            if type(other) in [int, float]:
+                return Chronyk.fromns(
+                    self.nanoseconds() + _tons(other), timezone=self.timezone)
+
         if type(other) == ChronykDelta:
-            newtimest = self.timestamp() + other.seconds
+            shift = self.__calendar__(other, 1)
+            newtimest = self.timestamp() + shift + other.seconds
             return Chronyk(newtimest, timezone=self.timezone)
         if type(other) in [int, float]:
             newtimest = self.timestamp() + other
@@ -270,18 +1235,32 @@ class Chronyk:
         return NotImplemented
 
     def __sub__(self, other):
+        if self.__ns__ is not None:
+            if type(other) == Chronyk and other.exact:
+                return ChronykDelta.fromns(self.__ns__ - other.__ns__)
+            if type(other) == ChronykDelta:
+                return self.__add__(other * -1)
+            if type(other) in [int, float]:
+                return Chronyk.fromns(
+                    self.nanoseconds() - _tons(other), timezone=self.timezone)
+
         if type(other) == Chronyk:
             delta = self.__timestamp__ - other.timestamp(timezone=0)
             return ChronykDelta(delta)
         if type(other) == ChronykDelta:
-            newtimest = self.timestamp() - other.seconds
-            return Chronyk(newtimest, timezone=self.timezone)
+            return self.__add__(other * -1)
         if type(other) in [int, float]:
             newtimest = self.timestamp() - other
             return Chronyk(newtimest, timezone=self.timezone)
 
         return NotImplemented
 
+    @property
+    def exact(self):
+        """True if this time is stored as integer nanoseconds.
+        """
+        return self.__ns__ is not None
+
     # Helpers
     def __fromrelative__(self, timestr):
         timestr = " {} ".format(timestr)
@@ -293,31 +1272,20 @@ class Chronyk:
         coef = 1 if future else -1
         dati = datetime.datetime.utcnow()
 
-        # timedelta does not support years
+        # timedelta does not support years or months
+        months = 0
         if timestr.find(" year") != -1:
-            try:
-                match = re.match(r".*?([0-9]+?) year", timestr)
-                assert match is not None
-                dati = dati.replace(
-                    year=dati.year + int(match.group(1)) * coef
-                )
-            except AssertionError:
-                pass
-
-        # ... or months
+            match = re.match(r".*?([0-9]+?) year", timestr)
+            if match is not None:
+                months += int(match.group(1)) * 12
         if timestr.find(" month") != -1:
-            try:
-                match = re.match(r".*?([0-9]+?) month", timestr)
-                assert match is not None
-                months = int(match.group(1))
-                newyear = dati.year + int(((dati.month - 1) + months * coef) / 12)
-                newmonth = (((dati.month - 1) + months * coef) % 12) + 1
-                newday = dati.day
-                while newday > calendar.monthrange(newyear, newmonth)[1]:
-                    newday -= 1
-                dati = dati.replace(year=newyear, month=newmonth, day=newday)
-            except AssertionError:
-                pass
+            match = re.match(r".*?([0-9]+?) month", timestr)
+            if match is not None:
+                months += int(match.group(1))
+        if months:
+            newyear, newmonth, newday = _shiftmonth(
+                dati.year, dati.month, dati.day, months * coef)
+            dati = dati.replace(year=newyear, month=newmonth, day=newday)
 
         delta = {
             "weeks": 0,
@@ -347,132 +1315,81 @@ class Chronyk:
 
         return _mktime(dati.timetuple())
 
-    def __fromabsolute__(self, timestr):
-        # http://en.wikipedia.org/wiki/Date_format_by_country
-        datetimeformats = [
-            "%Y-%m-%dT%H:%M:%SZ",
-            "%Y-%m-%dT%H:%M:%S%z",
-            "%Y-%m-%dT%H:%M:%S%Z",
-            "%c",
-            "%s"
-        ]
-        dateformats = [
-            # ISO
-            "%Y-%m-%d",
-            # YMD other than ISO
-            "%Y%m%d",
-            "%Y.%m.%d",
-            # Popular MDY formats
-            "%m/%d/%Y",
-            "%m/%d/%y",
-            # DMY with full year
-            "%d %m %Y",
-            "%d-%m-%Y",
-            "%d/%m/%Y",
-            "%d/%m %Y",
-            "%d.%m.%Y",
-            "%d. %m. %Y",
-            "%d %b %Y",
-            "%d %B %Y",
-            "%d. %b %Y",
-            "%d. %B %Y",
-            # MDY with full year
-            "%b %d %Y",
-            "%b %dst %Y",
-            "%b %dnd %Y",
-            "%b %drd %Y",
-            "%b %dth %Y",
-            "%b %d, %Y",
-            "%b %dst, %Y",
-            "%b %dnd, %Y",
-            "%b %drd, %Y",
-            "%b %dth, %Y",
-            "%B %d %Y",
-            "%B %dst %Y",
-            "%B %dnd %Y",
-            "%B %drd %Y",
-            "%B %dth %Y",
-            "%B %d, %Y",
-            "%B %dst, %Y",
-            "%B %dnd, %Y",
-            "%B %drd, %Y",
-            "%B %dth, %Y",
-            # DMY with 2-digit year
-            "%d %m %y",
-            "%d-%m-%y",
-            "%d/%m/%y",
-            "%d/%m-%y",  # why denmark?
-            "%d.%m.%y",
-            "%d. %m. %y",
-            "%d %b %y",
-            "%d %B %y",
-            "%d. %b %y",
-            "%d. %B %y",
-            # MDY with 2-digit year
-            "%b %dst %y",
-            "%b %dnd %y",
-            "%b %drd %y",
-            "%b %dth %y",
-            "%B %dst %y",
-            "%B %dnd %y",
-            "%B %drd %y",
-            "%B %dth %y",
-        ]
-        timeformats = [
-            # 24 hour clock with seconds
-            "%H:%M:%S %z",
-            "%H:%M:%S %z",
-            "%H:%M:%S",
-            # 24 hour clock without seconds
-            "%H:%M %z",
-            "%H:%M %Z",
-            "%H:%M",
-            # 12 hour clock with seconds
-            "%I:%M:%S %p %z",
-            "%I:%M:%S %p %Z",
-            "%I:%M:%S %p",
-            # 12 hour clock without seconds
-            "%I:%M %p %z",
-            "%I:%M %p %Z",
-            "%I:%M %p"
-        ]
-
-        # Prepare combinations
-        for dateformat in dateformats:
-            for timeformat in timeformats:
-                datetimeformats.append("{} {}".format(dateformat, timeformat))
-            datetimeformats.append(dateformat)
+    def __fromabsolute__(self, timestr, maxattempts=None):
+        # Zone names and offsets at the end are looked up in one step, the
+        # formats only have to match the rest.
+        zone = _findzone(timestr)
+        if zone is not None:
+            rest, west = zone
+            match, attempts = self.__matchabsolute__(rest, maxattempts)
+            if match is not None:
+                struct, dateformat = match
+                return float(calendar.timegm(struct) + west + LOCALTZ)
+            if maxattempts is not None:
+                maxattempts -= attempts
+
+        match, attempts = self.__matchabsolute__(timestr, maxattempts)
+        if match is not None:
+            struct, dateformat = match
+            timestamp = _mktime(struct)
+            if "z" not in dateformat.lower():
+                # string doesn't contains timezone information.
+                timestamp += self.timezone
+            return timestamp
+
+    def __matchabsolute__(self, timestr, maxattempts=None):
+        """Returns (match, attempts), where match is (struct_time, format)
+        for the first format matching the string, or None, and attempts is
+        the number of formats that were tried.
+        """
+        # Words no format knows can't match, whatever the digits around
+        # them look like.
+        letterwords = _getletterwords()
+        for word in _LETTERRE.findall(timestr):
+            if word not in letterwords:
+                return (None, 0)
+
+        datetimeformats, timeformats = _formatsfor(timestr)
+        attempts = 0
 
         # Date / Datetime
         for dateformat in datetimeformats:
+            attempts += 1
+            if maxattempts is not None and attempts > maxattempts:
+                raise ValueError("Gave up parsing time string.")
             try:
                 struct = time.strptime(timestr, dateformat)
             except ValueError:
                 pass
             else:
-                timestamp = _mktime(struct)
-                if "z" not in dateformat.lower():
-                    # string doesn't contains timezone information.
-                    timestamp += self.timezone
-                return timestamp
+                return ((struct, dateformat), attempts)
 
         # Time (using today as date)
-        for timeformat in timeformats:
+        if timeformats:
             timestr_full = _strftime("%Y-%m-%d") + " " + timestr
+        for timeformat in timeformats:
+            attempts += 1
+            if maxattempts is not None and attempts > maxattempts:
+                raise ValueError("Gave up parsing time string.")
             format_full = "%Y-%m-%d {}".format(timeformat)
             try:
                 struct = time.strptime(timestr_full, format_full)
             except ValueError:
                 pass
             else:
-                timestamp = _mktime(struct)
-                if "z" not in timeformat.lower():
-                    # string doesn't contains timezone information.
-                    timestamp += self.timezone
-                return timestamp
+                return ((struct, format_full), attempts)
+
+        return (None, attempts)
+
+    def __fromstring__(self, timestr, maxattempts=None):
+        # NUMERIC EPOCHS
+        ns = _epochns(timestr)
+        if ns is not None:
+            return ns / _NS + LOCALTZ
 
-    def __fromstring__(self, timestr):
         timestr = timestr.lower().strip().replace(". ", " ")
+        if timestr in _rejected:
+            raise ValueError("Failed to parse time string.")
 
         # COMMON NAMES FOR TIMES
         if timestr in ["today", "now", "this week", "this month", "this day"]:
@@ -489,12 +1406,34 @@ class Chronyk:
             return relative
 
         # ABSOLUTE TIMES
-        absolute = self.__fromabsolute__(timestr)
+        absolute = self.__fromabsolute__(timestr, maxattempts)
         if absolute is not None:
             return absolute
 
+        _reject(timestr)
         raise ValueError("Failed to parse time string.")
 
+    def __frombuffer__(self, buffer, offset=0, length=None, maxattempts=None):
+        if type(buffer) == memoryview and buffer.format != "B":
+            buffer = buffer.cast("B")
+        end = len(buffer) if length is None else offset + length
+        if not 0 <= offset <= end <= len(buffer):
+            raise ValueError("offset and length exceed the buffer.")
+
+        fields = _scanbuffer(buffer, offset, end)
+        if fields is not None:
+            west = fields[6]
+            struct = fields[:6] + (0, 1, -1)
+            if west is not None:
+                return float(calendar.timegm(struct) + west + LOCALTZ)
+            return _mktime(struct) + self.timezone
+
+        try:
+            timestr = bytes(memoryview(buffer)[offset:end]).decode("utf-8")
+        except UnicodeDecodeError:
+            raise ValueError("Failed to parse time string.")
+        return self.__fromstring__(timestr, maxattempts)
+
     # Methods
     def datetime(self, timezone=None):
         """Returns a datetime object.
@@ -536,8 +1475,26 @@ class Chronyk:
         """
         if timezone is None:
             timezone = self.timezone
+        if self.__ns__ is not None:
+            return (self.__ns__ - _tons(timezone)) / _NS
         return self.__timestamp__ - timezone
 
+    def nanoseconds(self, timezone=None):
+        """Returns an integer timestamp in nanoseconds since the epoch. This
+        is exact for times constructed with exact=True.
+
+        :param timezone = self.timezone
+            The timezone (in seconds west of UTC) to return the value in. By
+            default, the timezone used when constructing the class is used
+            (local one by default). To use UTC, use timezone = 0. To use the
+            local tz, use timezone = chronyk.LOCALTZ.
+        """
+        if timezone is None:
+            timezone = self.timezone
+        if self.__ns__ is not None:
+            return self.__ns__ - _tons(timezone)
+        return _tons(self.__timestamp__ - timezone)
+
     def ctime(self, timezone=None):
         """Returns a ctime string.
 
@@ -627,6 +1584,50 @@ class Chronyk:
         else:
             return "{} ago".format(timestring)
 
+    def relativeexpiry(
+            self, now=None, minimum=10, maximum=3600 * 24 * 30,
+            pattern="%Y-%m-%d", timezone=None, maxunits=1):
+        """Returns a tuple of the relative time string (see relativestring,
+        which takes the same parameters) and the instant at which it changes
+        next, on the same scale as now (time.time() by default). That is
+        float("inf") if the string never changes, e.g. for dates past
+        maximum.
+
+        The string can be cached until that instant:
+
+        >>> text, expires = Chronyk("5 minutes ago").relativeexpiry()
+        >>> cache.set(key, text, ttl=expires - time.time())
+        """
+
+        if now is None:
+            now = time.time()
+        if timezone is None:
+            timezone = self.timezone
+
+        timestring = self.relativestring(
+            now, minimum, maximum, pattern, timezone, maxunits)
+        base = self.__timestamp__ - timezone
+        diff = now - base
+        future = diff < 0
+        diff = abs(diff)
+
+        if diff < minimum:
+            # "just now" on both sides of the instant.
+            return (timestring, base + minimum)
+        if diff > maximum and maximum > 0:
+            if future:
+                return (timestring, base - maximum)
+            return (timestring, float("inf"))
+
+        if future:
+            change = _nextchange(diff, maxunits, downwards=True)
+            change = max(change or 0, minimum, 0)
+            return (timestring, base - change)
+        change = _nextchange(diff, maxunits)
+        if maximum > 0:
+            change = min(change, maximum)
+        return (timestring, base + change)
+
 
 class ChronykDelta:
     """Abstraction for a certain amount of time.
@@ -635,17 +1636,79 @@ class ChronykDelta:
         The amount of time to represent. This can be either a number
         (int / float) or a string, which will be parsed accordingly.
 
+    :param exact = False
+        Stores the amount as integer nanoseconds instead of a float, see
+        chronyk.Chronyk.
+
+    :param months = 0
+        Calendar months to add on top of timestr.
+
+    :param years = 0
+        Calendar years to add on top of timestr.
+
+    Months and years are kept apart from the seconds, so adding a
+    ChronykDelta("1 month") to a Chronyk object moves it to the same day of
+    the next month (clamped to the length of that month) instead of 30 days
+    ahead. Where a single number is needed (ordering, float(), int(),
+    timestring()), a month counts as 30 and a year as 365 days. Equality
+    and hashing keep them apart, so ChronykDelta("1 month") doesn't equal
+    ChronykDelta("30 days").
+
     If you supply an unknown type, a TypeError is raised. If the string you
     passed cannot be parsed, a ValueError is raised.
+
+    ChronykDelta objects are immutable and hashable, just like Chronyk.
     """
 
-    def __init__(self, timestr):
+    __slots__ = ("seconds", "months", "years", "__ns__")
+
+    def __init__(self, timestr, exact=False, months=0, years=0):
         if type(timestr) == str:
-            self.seconds = self.__fromstring__(timestr)
+            seconds, strmonths, stryears = self.__fromstring__(timestr)
+            months += strmonths
+            years += stryears
         elif type(timestr) in [int, float]:
-            self.seconds = timestr
+            seconds = timestr
         else:
             raise TypeError("Failed to recognize given type.")
+        if type(months) != int or type(years) != int:
+            raise TypeError("Months and years have to be integers.")
+
+        ns = None
+        if exact:
+            ns = _tons(seconds)
+            seconds = ns / _NS
+        self.__ns__ = ns
+        self.seconds = seconds
+        self.months = months
+        self.years = years
+
+    @classmethod
+    def fromns(cls, nanoseconds, months=0, years=0):
+        """Creates an exact ChronykDelta from an integer amount of
+        nanoseconds (and optionally calendar months and years).
+        """
+        if type(nanoseconds) != int:
+            raise TypeError("Failed to recognize given type.")
+        self = cls.__new__(cls)
+        self.__ns__ = nanoseconds
+        self.seconds = nanoseconds / _NS
+        self.months = months
+        self.years = years
+        return self
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("ChronykDelta objects are immutable.")
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError("ChronykDelta objects are immutable.")
+
+    def __hash__(self):
+        if self.months or self.years:
+            return hash((self.seconds, self.months, self.years))
+        return hash(self.seconds)
 
     def __repr__(self):
         return "ChronykDelta({})".format(self.timestring())
@@ -655,16 +1718,50 @@ class ChronykDelta:
         return self.timestring()
 
     def __int__(self):
-        return int(self.seconds)
+        return int(self.__approx__())
 
     def __float__(self):
-        return float(self.seconds)
+        return float(self.__approx__())
 
     # Comparison Operators
+    def __approx__(self):
+        """Returns the seconds with months and years folded in."""
+        if self.months or self.years:
+            return self.seconds + self.__calendarseconds__()
+        return self.seconds
+
+    def __calendarseconds__(self):
+        return self.months * _MONTH + self.years * _YEAR
+
+    def __operands__(self, other):
+        """Returns the pair of values to order self and other by, as exact
+        integers if both sides allow it. None for unsupported types.
+        """
+        if type(other) == ChronykDelta:
+            if self.__ns__ is not None and other.__ns__ is not None:
+                return (self.nanoseconds(), other.nanoseconds())
+            return (self.__approx__(), other.__approx__())
+        if type(other) == int and self.__ns__ is not None:
+            return (self.nanoseconds(), other * _NS)
+        if type(other) in [int, float]:
+            return (self.__approx__(), other)
+
+        return None
+
     def __eq__(self, other):
+        # Months and years only equal themselves, "1 month" and "30 days"
+        # end up on different days when added to a Chronyk object.
         if type(other) == ChronykDelta:
+            if (self.months, self.years) != (other.months, other.years):
+                return False
+            if self.__ns__ is not None and other.__ns__ is not None:
+                return self.__ns__ == other.__ns__
             return self.seconds == other.seconds
         if type(other) in [int, float]:
+            if self.months or self.years:
+                return False
+            if type(other) == int and self.__ns__ is not None:
+                return self.__ns__ == other * _NS
             return self.seconds == other
 
         return NotImplemented
@@ -673,55 +1770,69 @@ class ChronykDelta:
         return not self.__eq__(other)
 
     def __gt__(self, other):
-        if type(other) == ChronykDelta:
-            return self.seconds > other.seconds
-        if type(other) in [int, float]:
-            return self.seconds > other
-
-        return NotImplemented
+        operands = self.__operands__(other)
+        if operands is None:
+            return NotImplemented
+        return operands[0] > operands[1]
 
     def __le__(self, other):
         return not self.__gt__(other)
 
     def __lt__(self, other):
-        if type(other) == ChronykDelta:
-            return self.seconds < other.seconds
-        if type(other) in [int, float]:
-            return self.seconds < other
-
-        return NotImplemented
+        operands = self.__operands__(other)
+        if operands is None:
+            return NotImplemented
+        return operands[0] < operands[1]
 
     def __ge__(self, other):
         return not self.__lt__(other)
 
     # Arithmetic Operators
     def __add__(self, other):
-        if type(other) == ChronykDelta:
-            return ChronykDelta(self.seconds + other.seconds)
         if type(other) == Chronyk:
             return other + self
+        if type(other) == ChronykDelta:
+            months = self.months + other.months
+            years = self.years + other.years
+            if self.__ns__ is not None and other.__ns__ is not None:
+                return ChronykDelta.fromns(
+                    self.__ns__ + other.__ns__, months, years)
+            return ChronykDelta(
+                self.seconds + other.seconds, months=months, years=years)
         if type(other) in [int, float]:
-            return ChronykDelta(self.seconds + other)
+            if self.__ns__ is not None:
+                return ChronykDelta.fromns(
+                    self.__ns__ + _tons(other), self.months, self.years)
+            return ChronykDelta(
+                self.seconds + other, months=self.months, years=self.years)
 
         return NotImplemented
 
     def __sub__(self, other):
         if type(other) == ChronykDelta:
-            return ChronykDelta(self.seconds - other.seconds)
+            return self.__add__(other * -1)
         if type(other) in [int, float]:
-            return ChronykDelta(self.seconds - other)
+            return self.__add__(-other)
 
         return NotImplemented
 
     def __mul__(self, other):
-        if type(other) in [int, float]:
-            return ChronykDelta(self.seconds * other)
+        if type(other) == int:
+            months = self.months * other
+            years = self.years * other
+            if self.__ns__ is not None:
+                return ChronykDelta.fromns(self.__ns__ * other, months, years)
+            return ChronykDelta(
+                self.seconds * other, months=months, years=years)
+        if type(other) == float:
+            # Fractions of months don't exist, so fall back to seconds.
+            return ChronykDelta(self.__approx__() * other)
 
         return NotImplemented
 
     def __truediv__(self, other):
         if type(other) in [int, float]:
-            return ChronykDelta(self.seconds / other)
+            return ChronykDelta(self.__approx__() / other)
 
         return NotImplemented
 
@@ -731,9 +1842,26 @@ class ChronykDelta:
 
         return NotImplemented
 
+    @property
+    def exact(self):
+        """True if this amount is stored as integer nanoseconds.
+        """
+        return self.__ns__ is not None
+
+    def nanoseconds(self):
+        """Returns this amount of time as integer nanoseconds, with months
+        and years folded in. This is exact for deltas constructed with
+        exact=True and without months and years.
+        """
+        if self.__ns__ is not None:
+            return self.__ns__ + self.__calendarseconds__() * _NS
+        return _tons(self.__approx__())
+
     # Methods
     def __fromstring__(self, timestr):
         seconds = 0
+        months = 0
+        years = 0
 
         comps = {
             "second": 1,
@@ -741,8 +1869,8 @@ class ChronykDelta:
             "hour": 3600,
             "day": 3600 * 24,
             "week": 3600 * 24 * 7,
-            "month": 3600 * 24 * 30,
-            "year": 3600 * 24 * 365
+            "month": None,
+            "year": None
         }
 
         for k, v in comps.items():
@@ -752,11 +1880,16 @@ class ChronykDelta:
                     timestr
                 )
                 assert match is not None
-                seconds += float(match.group(1)) * v
+                if k == "month":
+                    months += int(match.group(1))
+                elif k == "year":
+                    years += int(match.group(1))
+                else:
+                    seconds += float(match.group(1)) * v
             except AssertionError:
                 pass
 
-        return seconds
+        return (seconds, months, years)
 
     def timestring(self, maxunits=3):
         """Returns a string representation of this amount of time, like:
@@ -778,7 +1911,7 @@ class ChronykDelta:
 
         values = collections.OrderedDict()
 
-        seconds = abs(self.seconds)
+        seconds = abs(self.__approx__())
 
         values["year"] = _round(seconds / (3600 * 24 * 365))
         values["year"] = values["year"] if values["year"] > 0 else 0
@@ -800,7 +1933,7 @@ class ChronykDelta:
         values["minute"] = values["minute"] if values["minute"] > 0 else 0
         values["second"] = _round(seconds - values["minute"] * 60)
 
-        for k, v in values.items():
+        for k, v in list(values.items()):
             if v == 0:
                 values.pop(k)
             else:
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+import re
+import calendar
+
+from .chronyk import LOCALTZ, Chronyk, ChronykDelta
+
+# Longest mention the scanner expects. Chunks of streamed input are cut so
+# that no mention of at most this length is split between two of them.
+MAXLENGTH = 128
+
+_scanner = None
+
+
+def _alternation(words):
+    words = sorted(set(w.lower() for w in words if w), key=len, reverse=True)
+    return "|".join(re.escape(w) for w in words)
+
+
+def _getscanner():
+    """Returns the compiled scanner, building it on first use.
+
+    The scanner is a single regular expression over the vocabulary
+    Chronyk.__fromstring__ understands: month names (from the current locale,
+    like strptime's %b and %B), time units, "ago" / "in", the common names
+    for times and the digit shapes of the absolute formats. Every
+    alternative starts with either a digit or one of those keywords, so text
+    without dates is skipped over quickly.
+    """
+    global _scanner
+    if _scanner is not None:
+        return _scanner
+
+    months = list(calendar.month_name) + list(calendar.month_abbr)
+    named = ["today", "now", "yesterday", "yester day", "yesteryear"]
+    month = "(?:{})".format(_alternation(months))
+    # Every mention starts with one of these, which lets the regex engine
+    # skip most positions after looking at a single character.
+    firsts = set(w[0].lower() for w in months + named + ["in"] if w)
+    unit = r"(?:second|minute|hour|day|week|month|year)s?"
+    amounts = r"\d+ {unit}(?:(?:, | and | )\d+ {unit})*".format(unit=unit)
+    ordinal = r"\d{1,2}(?:st|nd|rd|th)?"
+    clock = r"\d{1,2}:\d{2}(?::\d{2})?(?: ?[ap]m)?"
+
+    absolute = "|".join([
+        # ISO, optionally with time
+        r"\d{4}-\d{2}-\d{2}(?:[t ]\d{1,2}:\d{2}(?::\d{2})?(?:z|[+-]\d{4})?)?",
+        # numeric day / month / year
+        r"\d{1,2}[./-]\d{1,2}[./-](?:\d{4}|\d{2})",
+        # 3. june 2014, 3rd june 2014
+        r"{}\.? {} \d{{4}}".format(ordinal, month),
+        # june 3rd, 2014
+        r"{} {},? \d{{4}}".format(month, ordinal)
+    ])
+
+    pattern = r"""(?ix)
+        (?=[\d{firsts}])\b(?:
+            (?P<relative>
+                in\ {amounts}
+              | {amounts}\ ago
+            )
+          | (?P<absolute>
+                (?:{absolute})(?:\ {clock})?
+            )
+          | (?P<delta>{amounts})
+          | (?P<clock>{clock})
+          | (?P<named>{named})
+        )\b
+    """.format(amounts=amounts.replace(" ", r"\ "),
+               absolute=absolute.replace(" ", r"\ "),
+               clock=clock.replace(" ", r"\ "),
+               named=_alternation(named).replace(" ", r"\ "),
+               firsts=re.escape("".join(sorted(firsts))))
+
+    _scanner = re.compile(pattern)
+    return _scanner
+
+
+def _parse(match, timezone):
+    text = match.group(0)
+    try:
+        if match.group("delta") is not None:
+            return ChronykDelta(text)
+        return Chronyk(text, timezone=timezone)
+    except (ValueError, OverflowError, OSError):
+        # Absurdly large amounts don't fit into the time functions.
+        return None
+
+
+def _chunks(text):
+    if type(text) == str:
+        yield text
+        return
+    for chunk in text:
+        yield chunk
+
+
+def extract(text, timezone=LOCALTZ, deltas=True):
+    """Finds every date or time mentioned in a text in a single pass.
+
+    :param text (required)
+        Either a string, or an iterable of strings (like a file object),
+        which is scanned chunk by chunk without reading it into memory.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) absolute mentions are in.
+
+    :param deltas = True
+        Determines if plain amounts of time ("2 weeks") are reported as
+        ChronykDelta objects.
+
+    Yields (start, end, value) tuples, where start and end are offsets into
+    the whole text and value is a Chronyk or ChronykDelta object. Candidates
+    the parser rejects are skipped.
+    """
+    scanner = _getscanner()
+    buffer = ""
+    # buffer[0] is kept from the previous chunk, so that word boundaries at
+    # the start of the buffer are detected correctly.
+    position = 0
+    offset = 0
+    for chunk in _chunks(text):
+        buffer += chunk
+        # Mentions starting before this point are complete in the buffer.
+        safe = len(buffer) - MAXLENGTH
+        if safe <= position:
+            continue
+        cut = safe
+        for match in scanner.finditer(buffer, position):
+            if match.end() > safe:
+                cut = min(cut, match.start())
+                break
+            if match.group("delta") is not None and not deltas:
+                continue
+            value = _parse(match, timezone)
+            if value is not None:
+                yield (offset + match.start(), offset + match.end(), value)
+        if cut > position:
+            buffer = buffer[cut - 1:]
+            offset += cut - 1
+            position = 1
+
+    for match in scanner.finditer(buffer, position):
+        if match.group("delta") is not None and not deltas:
+            continue
+        value = _parse(match, timezone)
+        if value is not None:
+            yield (offset + match.start(), offset + match.end(), value)
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+
+import re
+import time
+import calendar
+import functools
+
+from .chronyk import (
+    LOCALTZ, TIMEZONES, Chronyk, _mktime, _strftime, _zonelisteners)
+from .arrays import ChronykArray
+
+
+class FormatError(ValueError):
+    """Exception thrown when a string doesn't match a compiled format. The
+    position attribute holds the index of the first character that couldn't
+    be matched.
+    """
+
+    def __init__(self, message, position):
+        ValueError.__init__(
+            self, "{} (at position {})".format(message, position))
+        self.position = position
+
+
+def _names(*names):
+    names = sorted(set(n.lower() for n in names if n), key=len, reverse=True)
+    return "|".join(re.escape(n) for n in names)
+
+
+def _directives():
+    """Returns a dict mapping the supported directives to regexes. These are
+    the directives used in Chronyk's format tables, plus %f and %%.
+    """
+    months = [time.strftime("%b", (2014, m, 1, 0, 0, 0, 0, 1, 0))
+              for m in range(1, 13)]
+    fullmonths = [time.strftime("%B", (2014, m, 1, 0, 0, 0, 0, 1, 0))
+                  for m in range(1, 13)]
+    ampm = [time.strftime("%p", (2014, 1, 1, h, 0, 0, 0, 1, 0))
+            for h in [1, 13]]
+    return {
+        "Y": r"(?P<Y>\d{4})",
+        "y": r"(?P<y>\d\d)",
+        "m": r"(?P<m>1[0-2]|0[1-9]|[1-9])",
+        "d": r"(?P<d>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])",
+        "b": r"(?P<b>{})".format(_names(*months)),
+        "B": r"(?P<B>{})".format(_names(*fullmonths)),
+        "H": r"(?P<H>2[0-3]|[0-1]\d|\d)",
+        "I": r"(?P<I>1[0-2]|0[1-9]|[1-9])",
+        "M": r"(?P<M>[0-5]\d|\d)",
+        "S": r"(?P<S>6[0-1]|[0-5]\d|\d)",
+        "f": r"(?P<f>\d{1,6})",
+        "p": r"(?P<p>{})".format(_names(*ampm)),
+        "z": r"(?P<z>[+-]\d\d(?::?[0-5]\d)?|z)",
+        "Z": r"(?P<Z>{})".format(_names(*_zonenames())),
+        "%": "%"
+    }
+
+
+def _zonenames():
+    """Returns a dict mapping lowercase timezone names to offsets in seconds
+    west of UTC: chronyk.TIMEZONES plus the names of the local zone.
+    """
+    zones = dict(TIMEZONES)
+    zones.setdefault(time.tzname[0].lower(), time.timezone)
+    if time.daylight:
+        zones.setdefault(time.tzname[1].lower(), time.altzone)
+    return zones
+
+
+def _tokenize(pattern, directives):
+    """Splits a pattern into a list of regexes, one per directive, run of
+    whitespace or literal character.
+    """
+    tokens = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "%":
+            directive = pattern[i + 1:i + 2]
+            if directive not in directives:
+                raise ValueError(
+                    "Unsupported directive: %{}".format(directive))
+            tokens.append(directives[directive])
+            i += 2
+        elif char.isspace():
+            while i < len(pattern) and pattern[i].isspace():
+                i += 1
+            tokens.append(r"\s+")
+        else:
+            tokens.append(re.escape(char))
+            i += 1
+    return tokens
+
+
+class CompiledFormat:
+    """A parser for one fixed format, see chronyk.compile_format.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        directives = _directives()
+        self.__tokens__ = _tokenize(pattern, directives)
+        self.__regex__ = re.compile(
+            "".join(self.__tokens__) + r"\Z", re.IGNORECASE)
+        self.__months__ = {}
+        for m in range(1, 13):
+            struct = (2014, m, 1, 0, 0, 0, 0, 1, 0)
+            self.__months__[time.strftime("%b", struct).lower()] = m
+            self.__months__[time.strftime("%B", struct).lower()] = m
+        self.__pm__ = time.strftime(
+            "%p", (2014, 1, 1, 13, 0, 0, 0, 1, 0)).lower()
+        self.__zones__ = _zonenames()
+        groups = self.__regex__.groupindex
+        # Same rule as Chronyk.__fromabsolute__.
+        self.haszone = "z" in pattern.replace("%%", "").lower()
+        # A literal Z at the end means UTC, as it does for Chronyk.
+        literal = pattern.replace("%%", "").rstrip()
+        self.__utc__ = literal[-1:] in ["z", "Z"] and literal[-2:-1] != "%"
+        self.hasdate = any(d in groups for d in "YybBmd")
+        self.__days__ = {}
+
+    def __repr__(self):
+        return "CompiledFormat({!r})".format(self.pattern)
+
+    def __position__(self, timestr):
+        """Returns the position of the first character of timestr that can't
+        be matched by the pattern.
+        """
+        position = 0
+        for i in range(1, len(self.__tokens__) + 1):
+            regex = re.compile("".join(self.__tokens__[:i]), re.IGNORECASE)
+            match = regex.match(timestr)
+            if match is None:
+                break
+            position = match.end()
+        return position
+
+    def __daystart__(self, year, month, day):
+        """Returns the local timestamp of midnight for the given day, or None
+        if the day doesn't have 24 hours (DST changes).
+        """
+        key = (year, month, day)
+        if key not in self.__days__:
+            start = _mktime((year, month, day, 0, 0, 0, 0, 1, -1))
+            end = _mktime((year, month, day, 23, 0, 0, 0, 1, -1))
+            if end - start != 23 * 3600:
+                start = None
+            if len(self.__days__) > 4096:
+                self.__days__.clear()
+            self.__days__[key] = start
+        return self.__days__[key]
+
+    def timestamp(self, timestr, timezone=LOCALTZ):
+        """Parses a string and returns the UTC timestamp (as used by Chronyk
+        comparisons, i.e. float(Chronyk(...))) it represents.
+
+        Raises a chronyk.FormatError (a ValueError) if the string doesn't
+        match.
+        """
+        timestr = timestr.strip()
+        match = self.__regex__.match(timestr)
+        if match is None:
+            raise FormatError(
+                "String doesn't match format {!r}".format(self.pattern),
+                self.__position__(timestr))
+        fields = match.groupdict()
+
+        if self.hasdate:
+            year, month, day = 1900, 1, 1
+        else:
+            # Time only, today is used as date.
+            year, month, day = [int(x) for x in
+                                _strftime("%Y %m %d").split(" ")]
+        if fields.get("Y") is not None:
+            year = int(fields["Y"])
+        elif fields.get("y") is not None:
+            year = int(fields["y"])
+            year += 1900 if year >= 69 else 2000
+        if fields.get("m") is not None:
+            month = int(fields["m"])
+        elif fields.get("b") is not None:
+            month = self.__months__[fields["b"].lower()]
+        elif fields.get("B") is not None:
+            month = self.__months__[fields["B"].lower()]
+        if fields.get("d") is not None:
+            day = int(fields["d"])
+        if day > calendar.monthrange(year, month)[1]:
+            raise FormatError(
+                "Day is out of range for month", match.start("d"))
+
+        hour = 0
+        if fields.get("H") is not None:
+            hour = int(fields["H"])
+        elif fields.get("I") is not None:
+            hour = int(fields["I"]) % 12
+            if (fields.get("p") or "").lower() == self.__pm__:
+                hour += 12
+        minute = int(fields.get("M") or 0)
+        second = int(fields.get("S") or 0)
+        seconds = hour * 3600 + minute * 60 + second
+        if fields.get("f") is not None:
+            seconds += int(fields["f"].ljust(6, "0")) / 1000000
+
+        west = None
+        if fields.get("z") is not None:
+            offset = fields["z"].replace(":", "")
+            if offset.lower() == "z":
+                west = 0
+            else:
+                west = int(offset[1:3]) * 3600 + int(offset[3:5] or 0) * 60
+                if offset[0] == "+":
+                    west = -west
+        elif fields.get("Z") is not None:
+            name = fields["Z"].lower()
+            west = TIMEZONES.get(name, self.__zones__.get(name))
+        elif self.__utc__:
+            west = 0
+        if west is not None:
+            return calendar.timegm(
+                (year, month, day, 0, 0, 0)) + seconds + west + LOCALTZ
+
+        start = self.__daystart__(year, month, day)
+        if start is None:
+            start = _mktime(
+                (year, month, day, hour, minute, second, 0, 1, -1))
+            start -= hour * 3600 + minute * 60 + second
+        if self.haszone:
+            return start + seconds
+        return start + seconds + timezone
+
+    def parse(self, timestr, timezone=LOCALTZ):
+        """Parses a string and returns a Chronyk object.
+
+        :param timestr (required)
+            The string to parse.
+
+        :param timezone = local timezone
+            The timezone (in seconds west of UTC) the string is in. As with
+            Chronyk itself, this is ignored if the pattern contains %z or %Z
+            or ends in a literal Z (UTC).
+        """
+        timestamp = self.timestamp(timestr, timezone)
+        return Chronyk(timestamp - timezone, timezone=timezone)
+
+    def parsebatch(self, timestrs, timezone=LOCALTZ, errors="strict"):
+        """Parses many strings and returns a ChronykArray with their UTC
+        timestamps.
+
+        :param timestrs (required)
+            An iterable of strings.
+
+        :param timezone = local timezone
+            See CompiledFormat.parse.
+
+        :param errors = "strict"
+            "strict" raises a FormatError (or another ValueError, e.g. for
+            dates that don't exist) for the first string that can't be
+            parsed, "nan" stores NaN for it instead and "skip" leaves it out.
+        """
+        if errors not in ["strict", "nan", "skip"]:
+            raise ValueError("Unknown value for errors: {}".format(errors))
+        timestamp = self.timestamp
+        values = []
+        for timestr in timestrs:
+            try:
+                values.append(timestamp(timestr, timezone))
+            except ValueError:
+                if errors == "strict":
+                    raise
+                if errors == "nan":
+                    values.append(float("nan"))
+        result = ChronykArray()
+        result.fromlist([float(v) for v in values])
+        return result
+
+
+@functools.lru_cache(maxsize=256)
+def _compiled(pattern):
+    return CompiledFormat(pattern)
+
+
+# %Z only matches the zone names known at compile time.
+_zonelisteners.append(_compiled.cache_clear)
+
+
+def compile_format(pattern):
+    """Compiles a strptime-style pattern into a reusable parser, so that no
+    format guessing is needed when the format of the input is known.
+
+    :param pattern (required)
+        The format, using the same directives as the formats Chronyk tries
+        when parsing absolute times (%Y %y %m %d %b %B %H %I %M %S %p %z %Z),
+        plus %f for fractions of a second.
+
+    Returns a CompiledFormat object with parse(), timestamp() and
+    parsebatch() methods. The most recently used compiled formats are
+    cached, so calling this repeatedly with the same pattern is cheap.
+    Unsupported directives raise a ValueError.
+    """
+    return _compiled(pattern)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+import heapq
+import bisect
+
+from .chronyk import LOCALTZ, Chronyk, ChronykDelta, guesstype, _toutc
+
+
+class ChronykInterval:
+    """A half-open span of time [start, end).
+
+    :param start (required)
+        The beginning of the span. This can be a Chronyk object, a UTC
+        timestamp or a string that is parsed with Chronyk.
+
+    :param end (required)
+        The end of the span. Same as start, but a ChronykDelta (or a delta
+        string like "2 hours") is also accepted and added to start.
+
+    :param data = None
+        Arbitrary payload that is kept alongside the span.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) strings are parsed in, and
+        whose calendar the months and years of a ChronykDelta end follow.
+
+    If end lies before start, a ValueError is raised.
+    """
+
+    def __init__(self, start, end, data=None, timezone=LOCALTZ):
+        self.timezone = timezone
+        self.start = _toutc(start, timezone)
+        if type(end) == str and type(guesstype(end)) == ChronykDelta:
+            end = ChronykDelta(end)
+        if type(end) == ChronykDelta:
+            # Chronyk applies the calendar months and years of the delta.
+            self.end = (Chronyk(self.start - timezone, timezone=timezone) +
+                        end).timestamp(timezone=0)
+        else:
+            self.end = _toutc(end, timezone)
+        if self.end < self.start:
+            raise ValueError("Intervals can't end before they start.")
+        self.data = data
+
+    def __repr__(self):
+        return "ChronykInterval({} - {})".format(
+            Chronyk(self.start, timezone=0).timestring(),
+            Chronyk(self.end, timezone=0).timestring())
+
+    def __eq__(self, other):
+        if type(other) == ChronykInterval:
+            return (self.start, self.end, self.data) == \
+                (other.start, other.end, other.data)
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((self.start, self.end))
+
+    def __lt__(self, other):
+        if type(other) == ChronykInterval:
+            return (self.start, self.end) < (other.start, other.end)
+
+        return NotImplemented
+
+    def duration(self):
+        """Returns the length of this span as a ChronykDelta.
+        """
+        return ChronykDelta(self.end - self.start)
+
+    def overlaps(self, other):
+        """Checks if this span shares any time with another ChronykInterval.
+        """
+        return self.start < other.end and other.start < self.end
+
+    def contains(self, other):
+        """Checks if this span fully contains another ChronykInterval, or a
+        single point in time.
+        """
+        if type(other) == ChronykInterval:
+            return self.start <= other.start and other.end <= self.end
+        point = _toutc(other, self.timezone)
+        return self.start <= point < self.end
+
+
+class _Block:
+    """A static, start-sorted run of intervals with an implicit augmented
+    binary tree: the node of the range [lo, hi) sits at its middle index and
+    stores the maximum end of that whole range.
+    """
+
+    def __init__(self, intervals):
+        self.intervals = intervals
+        self.starts = [i.start for i in intervals]
+        self.maxends = [0] * len(intervals)
+        if intervals:
+            self.__augment__(0, len(intervals))
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __augment__(self, lo, hi):
+        mid = (lo + hi) // 2
+        maxend = self.intervals[mid].end
+        if lo < mid:
+            maxend = max(maxend, self.__augment__(lo, mid))
+        if mid + 1 < hi:
+            maxend = max(maxend, self.__augment__(mid + 1, hi))
+        self.maxends[mid] = maxend
+        return maxend
+
+    def search(self, endmin, startmax, strict):
+        """Yields, ordered by start, every interval with end > endmin and
+        start < startmax (start <= startmax if strict is False).
+        """
+        intervals = self.intervals
+        maxends = self.maxends
+        # Explicit stack of (lo, hi, visited) for an in-order traversal.
+        stack = [(0, len(intervals), False)]
+        while stack:
+            lo, hi, visited = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if visited:
+                interval = intervals[mid]
+                if interval.end > endmin:
+                    yield interval
+                continue
+            if maxends[mid] <= endmin:
+                continue
+            start = intervals[mid].start
+            if start < startmax or (not strict and start == startmax):
+                stack.append((mid + 1, hi, False))
+                stack.append((lo, hi, True))
+            stack.append((lo, mid, False))
+
+    def within(self, start, end):
+        """Yields, ordered by start, every interval inside [start, end].
+        """
+        lo = bisect.bisect_left(self.starts, start)
+        hi = bisect.bisect_right(self.starts, end)
+        for interval in self.intervals[lo:hi]:
+            if interval.end <= end:
+                yield interval
+
+
+class IntervalIndex:
+    """Index over ChronykIntervals answering overlap, containment and
+    stabbing queries in O(log n + k).
+
+    :param intervals = None
+        Intervals to bulk load. This is considerably faster than inserting
+        them one by one.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) strings passed to the queries
+        are parsed in.
+
+    Internally, the index is a logarithmic set of static augmented interval
+    trees, each at least twice the size of the next one (so there are at
+    most O(log n) of them), and single inserts cost amortized O(log n).
+    All queries are generators and yield their results ordered by start
+    time without materializing them first.
+    """
+
+    def __init__(self, intervals=None, timezone=LOCALTZ):
+        self.timezone = timezone
+        self.__blocks__ = []
+        if intervals is not None:
+            self.update(intervals)
+
+    def __len__(self):
+        return sum(len(block) for block in self.__blocks__)
+
+    def __iter__(self):
+        return heapq.merge(*[iter(b.intervals) for b in self.__blocks__])
+
+    def __merge__(self, block):
+        blocks = self.__blocks__
+        while blocks and len(blocks[-1]) < 2 * len(block):
+            other = blocks.pop()
+            block = _Block(list(heapq.merge(other.intervals, block.intervals)))
+        blocks.append(block)
+
+    def insert(self, interval, end=None, data=None):
+        """Adds a single interval. Either pass a ChronykInterval, or the
+        arguments to construct one.
+        """
+        if type(interval) != ChronykInterval:
+            interval = ChronykInterval(interval, end, data, self.timezone)
+        self.__merge__(_Block([interval]))
+
+    def update(self, intervals):
+        """Bulk loads an iterable of ChronykIntervals.
+        """
+        intervals = sorted(intervals)
+        if intervals:
+            self.__merge__(_Block(intervals))
+
+    def overlapping(self, start, end):
+        """Yields every interval sharing time with [start, end).
+        """
+        start = _toutc(start, self.timezone)
+        end = _toutc(end, self.timezone)
+        if start == end:
+            return self.stabbing(start)
+        return heapq.merge(
+            *[b.search(start, end, True) for b in self.__blocks__])
+
+    def stabbing(self, point):
+        """Yields every interval containing the given point in time.
+        """
+        point = _toutc(point, self.timezone)
+        return heapq.merge(
+            *[b.search(point, point, False) for b in self.__blocks__])
+
+    def within(self, start, end):
+        """Yields every interval that lies completely inside [start, end].
+        """
+        start = _toutc(start, self.timezone)
+        end = _toutc(end, self.timezone)
+        return heapq.merge(*[b.within(start, end) for b in self.__blocks__])
+
+    def enclosing(self, start, end):
+        """Yields every interval that completely contains [start, end].
+        """
+        start = _toutc(start, self.timezone)
+        end = _toutc(end, self.timezone)
+        for interval in self.stabbing(start):
+            if interval.end >= end:
+                yield interval
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+import heapq
+
+from .chronyk import LOCALTZ, Chronyk
+from .formats import CompiledFormat, compile_format
+from .extraction import extract
+
+# Lines without a timestamp held back at the start of a source, waiting for
+# the first one that has a timestamp.
+_MAXLEADING = 4096
+
+
+class LogSource:
+    """A stream of log lines, each starting with (or containing) a timestamp.
+
+    :param lines (required)
+        An iterable of lines, like a file object. It is read lazily.
+
+    :param parser = None
+        How to find the timestamp of a line. This can be either
+        - a strptime-style pattern like "%Y-%m-%d %H:%M:%S" (see
+          chronyk.compile_format), matched against the first words of the
+          line (as many as the pattern has),
+        - a CompiledFormat, used the same way,
+        - a function taking a line and returning a Chronyk object, a UTC
+          timestamp, a string for Chronyk to parse or None,
+        - None, to use the first date or time mentioned anywhere in the line
+          (see chronyk.extract), which is a lot slower.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) the timestamps of this source
+        are in. To use UTC, use timezone=0.
+
+    :param name = None
+        An arbitrary label, e.g. the file name.
+
+    :param lookahead = 0
+        The number of lines kept back to put slightly out of order lines
+        into place. A line is yielded in order as long as no more than this
+        many lines that belong after it come before it.
+
+    Lines without a timestamp (like the rest of a stack trace) keep the one
+    of the line before them, so they stay attached to it. Lines before the
+    first timestamp get that one, unless there are too many of them, in
+    which case they are passed on with a timestamp of -inf. Iterating yields
+    (timestamp, line) tuples with UTC timestamps (as used by Chronyk
+    comparisons, i.e. float(Chronyk(...))).
+    """
+
+    def __init__(
+            self, lines, parser=None, timezone=LOCALTZ, name=None,
+            lookahead=0):
+        self.lines = lines
+        self.timezone = timezone
+        self.name = name
+        if lookahead < 0:
+            raise ValueError("lookahead can't be negative.")
+        self.lookahead = lookahead
+
+        self.parser = parser
+        self.__format__ = None
+        if type(parser) == str:
+            parser = compile_format(parser)
+        if type(parser) == CompiledFormat:
+            self.__format__ = parser
+            self.__words__ = len(parser.pattern.split())
+        elif parser is not None and not callable(parser):
+            raise TypeError("Failed to recognize given type.")
+
+    def __repr__(self):
+        if self.name is not None:
+            return "LogSource({!r})".format(self.name)
+        return "LogSource({!r})".format(self.lines)
+
+    def __timestamp__(self, line):
+        """Returns the UTC timestamp of a line, or None if it has none.
+        """
+        if self.__format__ is not None:
+            words = line.split(None, self.__words__)[:self.__words__]
+            try:
+                return self.__format__.timestamp(" ".join(words), self.timezone)
+            except ValueError:
+                return None
+
+        if self.parser is None:
+            for start, end, value in extract(
+                    line, self.timezone, deltas=False):
+                if type(value) == Chronyk:
+                    return value.timestamp(timezone=0)
+            return None
+
+        value = self.parser(line)
+        if value is None or type(value) in [int, float]:
+            return value
+        if type(value) == str:
+            try:
+                value = Chronyk(value, timezone=self.timezone)
+            except ValueError:
+                return None
+        if type(value) == Chronyk:
+            return value.timestamp(timezone=0)
+        raise TypeError("Failed to recognize given type.")
+
+    def __iter__(self):
+        timestamp = self.__timestamp__
+        lookahead = self.lookahead
+        pending = []
+        # Lines before the first timestamp, they get that one.
+        leading = []
+        last = None
+        count = 0
+        for line in self.lines:
+            found = timestamp(line)
+            if found is None:
+                if last is None:
+                    leading.append(line)
+                    if len(leading) >= _MAXLEADING:
+                        # Don't buffer sources without timestamps whole.
+                        for held in leading:
+                            yield (float("-inf"), held)
+                        leading = []
+                    continue
+                found = last
+            else:
+                last = found
+            for held in leading:
+                heapq.heappush(pending, (found, count, held))
+                count += 1
+            leading = []
+            if not pending and not lookahead:
+                yield (found, line)
+                continue
+            heapq.heappush(pending, (found, count, line))
+            count += 1
+            while len(pending) > lookahead:
+                found, _, line = heapq.heappop(pending)
+                yield (found, line)
+
+        while pending:
+            found, _, line = heapq.heappop(pending)
+            yield (found, line)
+        # Sources without any timestamps come first.
+        for line in leading:
+            yield (float("-inf"), line)
+
+
+def mergelogs(sources):
+    """Interleaves several log streams by time.
+
+    :param sources (required)
+        An iterable of LogSource objects. Anything else (like a plain file
+        object) is wrapped in a LogSource with default arguments.
+
+    Yields (timestamp, source, line) tuples in time order, with UTC
+    timestamps (as used by Chronyk comparisons, i.e. float(Chronyk(...))).
+    Lines with the same timestamp keep the order of their sources.
+
+    Only the next line of every source is held in a heap (plus the lookahead
+    of each source), so merging n lines from k sources takes O(n log k) time
+    and memory doesn't grow with the length of the streams.
+
+    >>> nginx = compile_format("%d/%b/%Y:%H:%M:%S %z")
+    >>> def accesstime(line):
+    ...     # 127.0.0.1 - - [18/Sep/2014:14:00:03 +0200] "GET / HTTP/1.1" ...
+    ...     return nginx.timestamp(line[line.find("[") + 1:line.find("]")])
+    >>> sources = [LogSource(open("app.log"), "%Y-%m-%d %H:%M:%S", 0),
+    ...            LogSource(open("access.log"), accesstime)]
+    >>> for timestamp, source, line in mergelogs(sources):
+    ...     print(source.name, line, end="")
+    """
+    heap = []
+    for index, source in enumerate(sources):
+        if type(source) != LogSource:
+            source = LogSource(source)
+        stream = iter(source)
+        for found, line in stream:
+            heap.append((found, index, line, source, stream))
+            break
+    heapq.heapify(heap)
+    while heap:
+        found, index, line, source, stream = heap[0]
+        yield (found, source, line)
+        for found, line in stream:
+            heapq.heapreplace(heap, (found, index, line, source, stream))
+            break
+        else:
+            heapq.heappop(heap)
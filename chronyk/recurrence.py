@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+
+import re
+import math
+import heapq
+import calendar
+
+from .chronyk import (
+    LOCALTZ, Chronyk, ChronykDelta, currentutc,
+    _monthdays, _daysfromcivil, _civilfromdays, _toutc)
+
+_DAY = 3600 * 24
+
+_UNITS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 3600,
+    "day": _DAY,
+    "week": _DAY * 7
+}
+
+_SHORTHANDS = {
+    "hourly": "every hour",
+    "daily": "every day",
+    "weekly": "every week",
+    "monthly": "every month",
+    "yearly": "every year"
+}
+
+_EVERYRE = re.compile(
+    r"^(?:([0-9]+) )?(second|minute|hour|day|week|month|year)s?$")
+
+_TIMERE = re.compile(
+    r"^([0-9]{1,2})(?::([0-9]{2}))?(?::([0-9]{2}))? ?(am|pm|a\.m\.|p\.m\.)?$")
+
+_MONTHDAYRE = re.compile(r"^([0-9]{1,2})(?:st|nd|rd|th)?$")
+
+# 1970-01-01 was a thursday, weeks start on the monday before that.
+_WEEKORIGIN = -3
+
+# Months without a matching day are skipped, give up after this many.
+_MAXMONTHS = 12 * 400
+
+
+def _list(text):
+    """Splits "a, b and c" into ["a", "b", "c"].
+    """
+    return [x.strip() for x in re.split(r",| and ", text) if x.strip()]
+
+
+def _weekdaynames():
+    names = {}
+    for day in range(7):
+        for name in [calendar.day_name[day], calendar.day_abbr[day]]:
+            names[name.lower()] = day
+            names[name.lower() + "s"] = day
+    return names
+
+
+def _parsetime(text):
+    """Turns "9:00", "9am", "5:30 pm", "noon" or "midnight" into seconds
+    since midnight.
+    """
+    text = text.strip()
+    if text == "noon":
+        return 12 * 3600
+    if text == "midnight":
+        return 0
+    match = _TIMERE.match(text)
+    if match is None:
+        raise ValueError("Failed to parse time of day.")
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    second = int(match.group(3) or 0)
+    if match.group(4) is not None:
+        if not 1 <= hour <= 12:
+            raise ValueError("Failed to parse time of day.")
+        hour = hour % 12 + (12 if match.group(4)[0] == "p" else 0)
+    if hour > 23 or minute > 59 or second > 59:
+        raise ValueError("Failed to parse time of day.")
+    return hour * 3600 + minute * 60 + second
+
+
+class Recurrence:
+    """A recurring schedule, expanded lazily.
+
+    :param rule = None
+        A phrase like "every monday at 9:00", "every weekday at 8:30 and
+        13:00", "every 15 minutes", "every 2 days at noon", "every month on
+        the 1st and 15th at 6pm" or "daily at 7am".
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) the times of day are in. To
+        use UTC, use timezone=0.
+
+    :param start = None
+        Occurrences before this instant (Chronyk object, UTC timestamp or
+        string in the given timezone) are left out. Rules with a fixed
+        interval ("every 15 minutes", "every 2 days") count from start, or
+        from the epoch (or a monday, for whole weeks) if there is none.
+
+    :param end = None
+        Occurrences at or after this instant are left out.
+
+    Instead of a phrase, rules can also be built with keyword arguments:
+    every (a ChronykDelta, string like "2 days" or number of seconds),
+    weekdays (monday is 0), monthdays and times (strings like "9:00" or
+    seconds since midnight).
+
+    The first occurrence after any instant is computed directly, without
+    going through the ones before it.
+    """
+
+    def __init__(
+            self, rule=None, timezone=LOCALTZ, start=None, end=None,
+            every=None, weekdays=None, monthdays=None, times=None):
+        self.rule = rule
+        self.timezone = timezone
+        # Same shift Chronyk.timestring() applies to get to the wall clock.
+        self.__offset__ = timezone + LOCALTZ
+        self.start = None if start is None else _toutc(start, timezone)
+        self.end = None if end is None else _toutc(end, timezone)
+
+        if rule is not None:
+            if type(rule) != str:
+                raise TypeError("Failed to recognize given type.")
+            every, weekdays, monthdays, times = self.__fromstring__(rule)
+
+        self.seconds = None
+        self.days = None
+        self.months = None
+        self.weekdays = None
+        self.monthdays = None
+        self.__origin__ = 0
+
+        if type(every) == str:
+            every = ChronykDelta(every)
+        if type(every) == ChronykDelta:
+            if every.months or every.years:
+                if every.seconds:
+                    raise ValueError("Can't mix months and seconds.")
+                self.months = every.years * 12 + every.months
+            else:
+                every = every.seconds
+        if type(every) in [int, float]:
+            if every <= 0:
+                raise ValueError("Intervals have to be positive.")
+            if weekdays is not None or monthdays is not None:
+                raise ValueError(
+                    "Intervals can't be combined with weekdays or monthdays.")
+            if every % _DAY == 0:
+                self.days = int(every // _DAY)
+                if self.start is not None:
+                    self.__origin__ = int(
+                        (self.start - self.__offset__) // _DAY)
+                elif self.days % 7 == 0:
+                    self.__origin__ = _WEEKORIGIN
+            elif times is not None:
+                raise ValueError(
+                    "Times of day need intervals of whole days.")
+            else:
+                self.seconds = every
+        elif every is not None and self.months is None:
+            raise TypeError("Failed to recognize given type.")
+
+        if weekdays is not None:
+            self.weekdays = frozenset(weekdays)
+            if not self.weekdays or not self.weekdays <= set(range(7)):
+                raise ValueError("Weekdays have to be between 0 and 6.")
+        if monthdays is not None:
+            self.monthdays = tuple(sorted(set(monthdays)))
+            if not self.monthdays or self.monthdays[0] < 1 or \
+                    self.monthdays[-1] > 31:
+                raise ValueError("Days of the month have to be 1 to 31.")
+            if self.months is None:
+                self.months = 1
+        elif self.months is not None:
+            self.monthdays = (1,)
+
+        if self.seconds is None and self.days is None and \
+                self.weekdays is None and self.months is None:
+            raise ValueError("Rules need an interval, weekdays or monthdays.")
+        if times is None:
+            times = [0]
+        self.times = tuple(sorted(set(
+            t if type(t) in [int, float] else _parsetime(t) for t in times)))
+        if self.times[0] < 0 or self.times[-1] >= _DAY:
+            raise ValueError("Times of day have to lie within one day.")
+
+    def __repr__(self):
+        if self.rule is not None:
+            return "Recurrence({!r})".format(self.rule)
+        return "Recurrence(every={}, weekdays={}, monthdays={}, times={})" \
+            .format(self.seconds or self.days or self.months,
+                    None if self.weekdays is None else sorted(self.weekdays),
+                    self.monthdays, list(self.times))
+
+    def __fromstring__(self, rule):
+        """Returns (every, weekdays, monthdays, times) for a phrase.
+        """
+        rule = rule.lower().strip()
+        for shorthand, full in _SHORTHANDS.items():
+            if rule == shorthand or rule.startswith(shorthand + " "):
+                rule = full + rule[len(shorthand):]
+        if not rule.startswith("every "):
+            raise ValueError("Failed to parse recurrence rule.")
+        rule = rule[len("every "):]
+
+        times = None
+        if " at " in rule:
+            rule, timestr = rule.split(" at ", 1)
+            times = [_parsetime(t) for t in _list(timestr)]
+        monthdays = None
+        if " on the " in rule:
+            rule, daystr = rule.split(" on the ", 1)
+            monthdays = []
+            for day in _list(daystr):
+                match = _MONTHDAYRE.match(day)
+                if match is None:
+                    raise ValueError("Failed to parse recurrence rule.")
+                monthdays.append(int(match.group(1)))
+
+        match = _EVERYRE.match(rule)
+        if match is not None:
+            amount = int(match.group(1) or 1)
+            unit = match.group(2)
+            if monthdays is not None and unit not in ["month", "year"]:
+                raise ValueError("Failed to parse recurrence rule.")
+            if unit == "month":
+                return (ChronykDelta(0, months=amount), None,
+                        monthdays, times)
+            if unit == "year":
+                return (ChronykDelta(0, years=amount), None,
+                        monthdays, times)
+            if unit == "week" and amount == 1:
+                return (None, [0], None, times)
+            return (amount * _UNITS[unit], None, None, times)
+
+        if monthdays is not None:
+            raise ValueError("Failed to parse recurrence rule.")
+        if rule in ["weekday", "weekdays", "workday", "workdays"]:
+            return (None, [0, 1, 2, 3, 4], None, times)
+        if rule in ["weekend", "weekends"]:
+            return (None, [5, 6], None, times)
+        names = _weekdaynames()
+        weekdays = []
+        for name in _list(rule):
+            if name not in names:
+                raise ValueError("Failed to parse recurrence rule.")
+            weekdays.append(names[name])
+        return (None, weekdays, None, times)
+
+    def __dayafter__(self, local, day, inclusive):
+        """Returns the first local time of an occurrence on the given day
+        that lies after (or at, if inclusive) local, or None.
+        """
+        for t in self.times:
+            if day * _DAY + t > local or inclusive and day * _DAY + t == local:
+                return day * _DAY + t
+        return None
+
+    def __following__(self, utc, inclusive=False):
+        """Returns the UTC timestamp of the first occurrence after (or at, if
+        inclusive) the given UTC timestamp, ignoring start and end.
+        """
+        offset = self.__offset__
+        local = utc - offset
+
+        if self.seconds is not None:
+            anchor = 0 if self.start is None else self.start - offset
+            if inclusive:
+                count = math.ceil((local - anchor) / self.seconds)
+            else:
+                count = math.floor((local - anchor) / self.seconds) + 1
+            return anchor + count * self.seconds + offset
+
+        day = int(local // _DAY)
+        if self.days is not None:
+            step = self.days
+            day += (self.__origin__ - day) % step
+            found = self.__dayafter__(local, day, inclusive)
+            if found is None:
+                found = self.__dayafter__(local, day + step, inclusive)
+            return found + offset
+
+        if self.weekdays is not None:
+            for d in range(day, day + 8):
+                if (d - _WEEKORIGIN) % 7 in self.weekdays:
+                    found = self.__dayafter__(local, d, inclusive)
+                    if found is not None:
+                        return found + offset
+
+        year, month, _ = _civilfromdays(day)
+        index = year * 12 + month - 1
+        index += -(index - 1970 * 12) % self.months
+        for _ in range(_MAXMONTHS // self.months):
+            year, month = divmod(index, 12)
+            month += 1
+            length = _monthdays(year, month)
+            for monthday in self.monthdays:
+                if monthday > length:
+                    break
+                found = self.__dayafter__(
+                    local, _daysfromcivil(year, month, monthday), inclusive)
+                if found is not None:
+                    return found + offset
+            index += self.months
+        return None
+
+    def timestamps(self, after=None, before=None):
+        """Yields the UTC timestamps of the occurrences after the given
+        instant (Chronyk object, UTC timestamp or string in the rule's
+        timezone) and before the second one. If after is None, the
+        occurrences start at the start of the rule, or now if it has none.
+        """
+        inclusive = False
+        if after is None:
+            if self.start is not None:
+                after, inclusive = self.start, True
+            else:
+                after = currentutc()
+        else:
+            after = _toutc(after, self.timezone)
+            if self.start is not None and after < self.start:
+                after, inclusive = self.start, True
+        bound = self.end
+        if before is not None:
+            before = _toutc(before, self.timezone)
+            bound = before if bound is None else min(bound, before)
+
+        found = self.__following__(after, inclusive)
+        while found is not None and (bound is None or found < bound):
+            yield found
+            found = self.__following__(found)
+
+    def occurrences(self, after=None, before=None):
+        """Yields Chronyk objects for the occurrences, see timestamps().
+        """
+        timezone = self.timezone
+        for found in self.timestamps(after, before):
+            yield Chronyk(found - timezone, timezone=timezone)
+
+    def next(self, after=None):
+        """Returns the first occurrence after the given instant (or now) as
+        a Chronyk object, or None if there is none.
+        """
+        for occurrence in self.occurrences(after):
+            return occurrence
+        return None
+
+
+def occurrences(rules, after=None, before=None):
+    """Merges the occurrences of many rules into a single lazy stream.
+
+    :param rules (required)
+        An iterable of Recurrence objects.
+
+    :param after, before = None
+        See Recurrence.timestamps.
+
+    Yields (Chronyk object, rule) tuples in time order. Only the next
+    occurrence of every rule is kept in a heap, so the first one across
+    thousands of rules costs one pass over the rules, and every one after it
+    O(log n).
+    """
+    heap = []
+    for i, rule in enumerate(rules):
+        stream = rule.timestamps(after, before)
+        for found in stream:
+            heap.append((found, i, rule, stream))
+            break
+    heapq.heapify(heap)
+    while heap:
+        found, i, rule, stream = heap[0]
+        yield (Chronyk(found - rule.timezone, timezone=rule.timezone), rule)
+        following = next(stream, None)
+        if following is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (following, i, rule, stream))
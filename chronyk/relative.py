@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+import time
+import collections
+
+from .chronyk import LOCALTZ, Chronyk
+
+
+class RelativeStringCache:
+    """Keeps rendered relative time strings ("5 minutes ago") around until
+    they change, so pages listing many timestamps don't re-render all of
+    them on every request.
+
+    :param size = 4096
+        The number of strings kept. The least recently used ones are dropped
+        first.
+
+    :param clock = time.time
+        A function returning the current time on the scale of the now
+        parameter of Chronyk.relativestring.
+
+    :param minimum, maximum, pattern, timezone, maxunits
+        Passed on to Chronyk.relativeexpiry for every string, see
+        Chronyk.relativestring.
+
+    Every entry is stored with the instant its string changes next and is
+    served until then.
+    """
+
+    def __init__(
+            self, size=4096, clock=time.time, minimum=10,
+            maximum=3600 * 24 * 30, pattern="%Y-%m-%d", timezone=None,
+            maxunits=1):
+        if type(size) != int:
+            raise TypeError("Failed to recognize given type.")
+        if size < 1:
+            raise ValueError("The cache size has to be positive.")
+        self.size = size
+        self.clock = clock
+        self.minimum = minimum
+        self.maximum = maximum
+        self.pattern = pattern
+        self.timezone = timezone
+        self.maxunits = maxunits
+        self.hits = 0
+        self.misses = 0
+        self.__entries__ = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.__entries__)
+
+    def clear(self):
+        self.__entries__.clear()
+
+    def render(self, value, now=None):
+        """Returns a tuple of the relative time string for a Chronyk object
+        (or UTC timestamp) and the instant at which it changes, see
+        Chronyk.relativeexpiry.
+        """
+        if now is None:
+            now = self.clock()
+        if type(value) in [int, float]:
+            timezone = LOCALTZ if self.timezone is None else self.timezone
+            value = Chronyk(value - timezone, timezone=timezone)
+        elif type(value) != Chronyk:
+            raise TypeError("Failed to recognize given type.")
+
+        entries = self.__entries__
+        key = (value.timestamp(timezone=0), value.timezone)
+        entry = entries.get(key)
+        if entry is not None and entry[2] <= now < entry[1]:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entry[:2]
+
+        self.misses += 1
+        timestring, expires = value.relativeexpiry(
+            now, self.minimum, self.maximum, self.pattern, self.timezone,
+            self.maxunits)
+        entries[key] = (timestring, expires, now)
+        entries.move_to_end(key)
+        if len(entries) > self.size:
+            entries.popitem(last=False)
+        return (timestring, expires)
+
+    def relativestring(self, value, now=None):
+        """Returns the relative time string for a Chronyk object (or UTC
+        timestamp), rendering it only if the cached one has expired.
+        """
+        return self.render(value, now)[0]
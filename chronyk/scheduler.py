@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+import math
+
+from .chronyk import (
+    LOCALTZ, Chronyk, ChronykDelta, DateRangeError, currentutc, guesstype)
+
+
+class Timer:
+    """A deadline scheduled on a TimingWheel. deadline is the UTC timestamp
+    (as used by Chronyk comparisons, i.e. float(Chronyk(...))) and data the
+    payload passed to TimingWheel.schedule.
+    """
+
+    __slots__ = ("deadline", "data", "__tick__", "__slot__", "__level__",
+                 "__wheel__")
+
+    def __init__(self, deadline, data, tick, wheel):
+        self.deadline = deadline
+        self.data = data
+        self.__tick__ = tick
+        self.__slot__ = None
+        self.__level__ = None
+        self.__wheel__ = wheel
+
+    def __repr__(self):
+        return "Timer({}, data={!r})".format(
+            Chronyk(self.deadline, timezone=0).timestring(), self.data)
+
+    @property
+    def pending(self):
+        return self.__slot__ is not None
+
+    def cancel(self):
+        """Removes the timer from its wheel in O(1). Returns False if it
+        already expired or was cancelled before.
+        """
+        if self.__slot__ is None:
+            return False
+        self.__wheel__.__remove__(self)
+        return True
+
+
+class TimingWheel:
+    """Hierarchical timing wheel for large numbers of reminders and timeouts.
+
+    :param resolution = 1
+        The length of a tick in seconds. Timers expire on the first tick at
+        or after their deadline.
+
+    :param slots = 64
+        The number of slots per wheel.
+
+    :param levels = 6
+        The number of wheels. Each one covers slots times the span of the one
+        below it; deadlines beyond the last one are kept aside until they get
+        close enough.
+
+    :param clock = chronyk.currentutc
+        A function returning the current UTC timestamp (as used by Chronyk
+        comparisons, i.e. float(Chronyk(...))).
+
+    Scheduling and cancelling are O(1). advance() processes the ticks that
+    passed since the last call and returns the expired timers in one batch,
+    skipping over stretches without any timers.
+
+    >>> wheel = TimingWheel()
+    >>> timer = wheel.schedule("in 3 hours", data=reminder)
+    >>> for timer in wheel.advance():
+    ...     send(timer.data)
+    """
+
+    def __init__(self, resolution=1, slots=64, levels=6, clock=currentutc):
+        if resolution <= 0:
+            raise ValueError("The resolution has to be positive.")
+        if slots < 2 or levels < 1:
+            raise ValueError("Wheels need at least 2 slots and 1 level.")
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self.clock = clock
+        # Number of ticks covered by a single slot of every level.
+        self.__spans__ = [slots ** level for level in range(levels + 1)]
+        self.__wheels__ = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.__counts__ = [0] * levels
+        self.__overflow__ = {}
+        self.__due__ = {}
+        self.__current__ = int(math.floor(clock() / resolution))
+
+    def __len__(self):
+        return sum(self.__counts__) + len(self.__overflow__) + \
+            len(self.__due__)
+
+    def __deadline__(self, when):
+        """Turns a Chronyk object, ChronykDelta, string or UTC timestamp into
+        a UTC timestamp. Deltas and relative strings count from the clock.
+        """
+        if type(when) == str:
+            padded = " {} ".format(when.lower())
+            if padded.find(" in ") != -1:
+                when = ChronykDelta(when)
+            elif padded.find(" ago ") != -1:
+                when = ChronykDelta(when) * -1
+            else:
+                when = guesstype(when)
+        if type(when) == ChronykDelta:
+            # Chronyk applies the calendar months and years of the delta.
+            now = Chronyk(self.clock() - LOCALTZ)
+            return (now + when).timestamp(timezone=0)
+        if type(when) == Chronyk:
+            return when.timestamp(timezone=0)
+        if type(when) in [int, float]:
+            return when
+        raise TypeError("Failed to recognize given type.")
+
+    def __insert__(self, timer):
+        tick = timer.__tick__
+        current = self.__current__
+        if tick <= current:
+            slot, level = self.__due__, None
+        else:
+            slots = self.slots
+            for level in range(self.levels):
+                # Timers go into the lowest wheel whose current rotation
+                # contains their tick. tick and current are in units of the
+                # level's slots here.
+                ticks, currents = tick // slots, current // slots
+                if ticks == currents:
+                    slot = self.__wheels__[level][tick - ticks * slots]
+                    self.__counts__[level] += 1
+                    break
+                tick, current = ticks, currents
+            else:
+                slot, level = self.__overflow__, None
+        slot[timer] = None
+        timer.__slot__ = slot
+        timer.__level__ = level
+
+    def __remove__(self, timer):
+        del timer.__slot__[timer]
+        if timer.__level__ is not None:
+            self.__counts__[timer.__level__] -= 1
+        timer.__slot__ = None
+
+    def __take__(self, slot, level):
+        """Empties a slot and returns its timers.
+        """
+        timers = list(slot)
+        slot.clear()
+        if level is not None:
+            self.__counts__[level] -= len(timers)
+        for timer in timers:
+            timer.__slot__ = None
+        return timers
+
+    def schedule(self, when, data=None, allowpast=True):
+        """Schedules a timer and returns it.
+
+        :param when (required)
+            The deadline. This can be a Chronyk object, a UTC timestamp, a
+            ChronykDelta or a string like "in 3 hours", "2 days" or
+            "2014-09-18 12:00". Deltas and relative strings are counted from
+            the wheel's clock.
+
+        :param data = None
+            Arbitrary payload that is kept on the timer.
+
+        :param allowpast = True
+            Determines if deadlines in the past are allowed. They expire on
+            the next call to advance(). If they aren't allowed, a
+            chronyk.DateRangeError is raised.
+        """
+        deadline = self.__deadline__(when)
+        if not allowpast and deadline < self.clock():
+            raise DateRangeError("Values from the past are not allowed.")
+        tick = int(math.ceil(deadline / self.resolution))
+        timer = Timer(deadline, data, tick, self)
+        self.__insert__(timer)
+        return timer
+
+    def advance(self, now=None):
+        """Moves the wheel forward to the given UTC timestamp (or Chronyk
+        object), or to the clock's current time if none is given, and returns
+        the list of timers that expired on the way, in order of their ticks.
+        """
+        if now is None:
+            now = self.clock()
+        elif type(now) == Chronyk:
+            now = now.timestamp(timezone=0)
+        target = int(math.floor(now / self.resolution))
+        spans = self.__spans__
+        counts = self.__counts__
+        wheels = self.__wheels__
+        expired = self.__take__(self.__due__, None)
+
+        while self.__current__ < target:
+            current = self.__current__
+            for lowest in range(self.levels):
+                if counts[lowest]:
+                    break
+            else:
+                lowest = self.levels if self.__overflow__ else None
+            if lowest is None:
+                self.__current__ = target
+                break
+            if lowest == 0:
+                tick = current + 1
+            else:
+                # Nothing happens before the next slot of the lowest
+                # non-empty wheel comes up.
+                span = spans[lowest]
+                tick = (current // span + 1) * span
+                if lowest == self.levels:
+                    # Only far away timers are left, skip whole rotations.
+                    first = min(t.__tick__ for t in self.__overflow__)
+                    tick = max(tick, first // span * span)
+                tick = min(target, tick)
+            self.__current__ = tick
+
+            if tick % spans[self.levels] == 0:
+                for timer in self.__take__(self.__overflow__, None):
+                    self.__insert__(timer)
+            for level in range(self.levels - 1, 0, -1):
+                if tick % spans[level] == 0:
+                    slot = wheels[level][tick // spans[level] % self.slots]
+                    if slot:
+                        for timer in self.__take__(slot, level):
+                            self.__insert__(timer)
+            slot = wheels[0][tick % self.slots]
+            if slot:
+                expired.extend(self.__take__(slot, 0))
+            if self.__due__:
+                expired.extend(self.__take__(self.__due__, None))
+
+        return expired
+
+    def run(self, callback, loop=None):
+        """Advances the wheel once per tick on an asyncio event loop and
+        passes every non-empty batch of expired timers to callback, which can
+        be a function or a coroutine function. Returns an asyncio.Future that
+        stops the wheel when it is cancelled, and carries any exception the
+        callback raises.
+
+        :param loop = the current event loop
+            The event loop to run on.
+        """
+        # Imported here (and written with plain callbacks) so the module
+        # stays usable on Pythons without asyncio.
+        import asyncio
+
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        stopped = asyncio.Future(loop=loop)
+        handle = [None]
+
+        def tick():
+            try:
+                expired = self.advance()
+                if expired:
+                    result = callback(expired)
+                    if asyncio.iscoroutine(result):
+                        loop.create_task(result)
+            except Exception as e:
+                stopped.set_exception(e)
+                return
+            nexttick = (self.__current__ + 1) * self.resolution
+            delay = min(max(nexttick - self.clock(), 0), self.resolution)
+            handle[0] = loop.call_later(delay, tick)
+
+        handle[0] = loop.call_soon(tick)
+        stopped.add_done_callback(lambda future: handle[0].cancel())
+        return stopped
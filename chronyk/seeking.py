@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+import os
+import bisect
+
+from .chronyk import LOCALTZ, _toutc
+from .merging import LogSource
+
+# First line of index files, followed by the interval and the indexed size.
+_HEADER = "chronyk-index 1"
+
+# Lines read after a sample point to find one with a timestamp.
+_MAXPROBE = 16
+
+
+class LogIndex:
+    """A sparse index over a large, time-ordered log file, to read the lines
+    of a time range without scanning the file from the start.
+
+    :param path (required)
+        The path of the log file.
+
+    :param parser = None
+        How to find the timestamp of a line, see chronyk.LogSource.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) the timestamps in the file,
+        and strings passed to seek() and lines(), are in.
+
+    :param interval = 65536
+        The distance in bytes between two samples. Reading a range parses at
+        most about this many bytes of lines before its start.
+
+    :param indexpath = None
+        Where to store the index, e.g. path + ".idx". It is loaded from
+        there if it exists and saved after every update. By default, the
+        index is only kept in memory.
+
+    The index holds (byte offset, timestamp) pairs, one per interval, taken
+    by seeking into the file and parsing the first few lines there. Looking
+    up a time is a binary search over them followed by a short scan, so it
+    costs about log(file size) parses. update() only samples what was
+    appended since the last call.
+
+    >>> index = LogIndex("/var/log/app.log", "%Y-%m-%d %H:%M:%S")
+    >>> for line in index.lines(Chronyk("2 hours ago"), Chronyk("1 hour ago")):
+    ...     print(line, end="")
+    """
+
+    def __init__(
+            self, path, parser=None, timezone=LOCALTZ, interval=65536,
+            indexpath=None):
+        if interval < 1:
+            raise ValueError("The interval has to be positive.")
+        self.path = path
+        self.interval = interval
+        self.timezone = timezone
+        self.indexpath = indexpath
+        self.__source__ = LogSource([], parser, timezone)
+        self.__offsets__ = []
+        self.__times__ = []
+        self.__size__ = 0
+        if self.indexpath and os.path.exists(self.indexpath):
+            self.__load__()
+        self.update()
+
+    def __len__(self):
+        return len(self.__offsets__)
+
+    def __timestamp__(self, line):
+        return self.__source__.__timestamp__(
+            line.decode("utf-8", "replace"))
+
+    def __load__(self):
+        with open(self.indexpath) as file:
+            header = file.readline().split()
+            if " ".join(header[:2]) != _HEADER or len(header) != 4 or \
+                    int(header[2]) != self.interval:
+                return
+            for line in file:
+                offset, timestamp = line.split()
+                self.__offsets__.append(int(offset))
+                self.__times__.append(float(timestamp))
+            self.__size__ = int(header[3])
+
+    def save(self):
+        """Writes the index to indexpath.
+        """
+        if not self.indexpath:
+            raise ValueError("The index has no indexpath to be saved to.")
+        with open(self.indexpath, "w") as file:
+            file.write("{} {} {}\n".format(
+                _HEADER, self.interval, self.__size__))
+            file.write("".join(
+                "{} {!r}\n".format(offset, timestamp)
+                for offset, timestamp in zip(
+                    self.__offsets__, self.__times__)))
+
+    def rebuild(self):
+        """Drops the index and samples the whole file again.
+        """
+        self.__offsets__ = []
+        self.__times__ = []
+        self.__size__ = 0
+        return self.update()
+
+    def update(self):
+        """Samples the part of the file written since the last update and
+        returns the number of new samples. If the file got smaller (e.g.
+        because it was rotated), the index is rebuilt.
+        """
+        size = os.path.getsize(self.path)
+        if size < self.__size__:
+            return self.rebuild()
+        if size == self.__size__:
+            return 0
+
+        offsets, times = self.__offsets__, self.__times__
+        interval = self.interval
+        if offsets:
+            position = (offsets[-1] // interval + 1) * interval
+        else:
+            position = 0
+        added = 0
+        with open(self.path, "rb") as file:
+            while position < size:
+                file.seek(position)
+                if position:
+                    # Skip the rest of the line the position falls into.
+                    file.readline()
+                for _ in range(_MAXPROBE):
+                    offset = file.tell()
+                    line = file.readline()
+                    # Lines still being written are sampled next time.
+                    if not line.endswith(b"\n"):
+                        break
+                    timestamp = self.__timestamp__(line)
+                    if timestamp is None:
+                        continue
+                    if not offsets or offset > offsets[-1]:
+                        offsets.append(offset)
+                        times.append(timestamp)
+                        added += 1
+                    break
+                position += interval
+        self.__size__ = size
+        if self.indexpath:
+            self.save()
+        return added
+
+    def seek(self, when):
+        """Returns the byte offset of the first line with a timestamp at or
+        after the given Chronyk object (or UTC timestamp), or the size of the
+        file if there is none.
+        """
+        with open(self.path, "rb") as file:
+            return self.__seek__(file, _toutc(when, self.timezone))
+
+    def __seek__(self, file, start):
+        i = bisect.bisect_left(self.__times__, start)
+        offset = self.__offsets__[i - 1] if i else 0
+        file.seek(offset)
+        for line in iter(file.readline, b""):
+            timestamp = self.__timestamp__(line)
+            if timestamp is not None and timestamp >= start:
+                break
+            offset += len(line)
+        file.seek(offset)
+        return offset
+
+    def lines(self, start=None, end=None):
+        """Yields the lines (as strings) with timestamps from start up to,
+        but not including, end (Chronyk objects or UTC timestamps). Lines
+        without a timestamp are yielded with the line before them.
+        """
+        with open(self.path, "rb") as file:
+            if start is not None:
+                self.__seek__(file, _toutc(start, self.timezone))
+            if end is not None:
+                end = _toutc(end, self.timezone)
+            for line in iter(file.readline, b""):
+                if end is not None:
+                    timestamp = self.__timestamp__(line)
+                    if timestamp is not None and timestamp >= end:
+                        break
+                yield line.decode("utf-8", "replace")
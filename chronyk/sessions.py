@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+import collections
+
+from .chronyk import LOCALTZ, ChronykDelta, _toutc, _toseconds
+
+
+class Session(collections.namedtuple(
+        "Session", ["key", "start", "end", "count"])):
+    """A closed session: the UTC timestamps (as used by Chronyk comparisons,
+    i.e. float(Chronyk(...))) of its first and last event and the number of
+    events in it.
+    """
+
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        return ChronykDelta(self.end - self.start)
+
+
+class Sessionizer:
+    """Splits time-ordered events into sessions separated by inactivity, in
+    a single pass.
+
+    :param gap (required)
+        The inactivity that ends a session. This can be either a
+        ChronykDelta, a string like "30 minutes" or a number of seconds. A
+        new session starts when more than this passes between two events
+        of the same key.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) strings are parsed in.
+
+    Only the open session of every key is kept. Since the input is sorted,
+    every event also closes the sessions of all keys that have been idle for
+    longer than gap, so memory stays bounded by the number of keys active
+    within one gap, however long the input is.
+
+    >>> sessionizer = Sessionizer("30 minutes")
+    >>> for session in sessionizer.feed(pairs):
+    ...     print(session.key, session.count, session.duration.timestring())
+    >>> closed = sessionizer.flush()
+    """
+
+    def __init__(self, gap, timezone=LOCALTZ):
+        self.gap = _toseconds(gap, "Gaps")
+        self.timezone = timezone
+        # key -> [start, end, count], least recently active first.
+        self.__open__ = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.__open__)
+
+    def __expire__(self, now, closed):
+        """Closes the sessions that have been idle for longer than gap at
+        now, appending them to closed.
+        """
+        sessions = self.__open__
+        limit = now - self.gap
+        while sessions:
+            key = next(iter(sessions))
+            state = sessions[key]
+            if state[1] >= limit:
+                break
+            del sessions[key]
+            closed.append(Session(key, state[0], state[1], state[2]))
+
+    def add(self, timestamp, key=None):
+        """Adds an event at the given UTC timestamp (or Chronyk object or
+        string) for the given key. Returns the list of sessions this closes,
+        which can include those of other, idle keys.
+        """
+        timestamp = _toutc(timestamp, self.timezone)
+        closed = []
+        self.__expire__(timestamp, closed)
+        sessions = self.__open__
+        state = sessions.get(key)
+        if state is not None and timestamp - state[1] > self.gap:
+            # Left over by out of order input.
+            del sessions[key]
+            closed.append(Session(key, state[0], state[1], state[2]))
+            state = None
+        if state is None:
+            sessions[key] = [timestamp, timestamp, 1]
+            return closed
+        if timestamp < state[0]:
+            state[0] = timestamp
+        if timestamp > state[1]:
+            state[1] = timestamp
+        state[2] += 1
+        sessions.move_to_end(key)
+        return closed
+
+    def feed(self, events):
+        """Adds many events and yields the sessions they close. Events are
+        either timestamps (UTC timestamps, Chronyk objects or strings) or
+        (key, timestamp) pairs.
+        """
+        sessions = self.__open__
+        gap = self.gap
+        timezone = self.timezone
+        closed = []
+        # Nothing expires before this, the least recently active session
+        # ends at least a gap before it.
+        horizon = None
+        for event in events:
+            if type(event) == tuple:
+                key, timestamp = event
+            else:
+                key, timestamp = None, event
+            if type(timestamp) not in [float, int]:
+                timestamp = _toutc(timestamp, timezone)
+
+            # Inlined version of add().
+            if horizon is None or timestamp > horizon:
+                self.__expire__(timestamp, closed)
+                for session in closed:
+                    yield session
+                closed = []
+                horizon = None
+                for first in sessions.values():
+                    horizon = first[1] + gap
+                    break
+            state = sessions.get(key)
+            if state is not None and timestamp - state[1] > gap:
+                del sessions[key]
+                yield Session(key, state[0], state[1], state[2])
+                state = None
+            if state is None:
+                sessions[key] = [timestamp, timestamp, 1]
+                continue
+            if timestamp < state[0]:
+                state[0] = timestamp
+            if timestamp > state[1]:
+                state[1] = timestamp
+            state[2] += 1
+            sessions.move_to_end(key)
+
+    def flush(self, now=None):
+        """Closes and returns the sessions that have been idle for longer
+        than gap at the given UTC timestamp (or Chronyk object or string),
+        or all open sessions if now is None, e.g. at the end of the input.
+        """
+        closed = []
+        if now is None:
+            for key, state in self.__open__.items():
+                closed.append(Session(key, state[0], state[1], state[2]))
+            self.__open__.clear()
+        else:
+            self.__expire__(_toutc(now, self.timezone), closed)
+        return closed
+
+
+def sessionize(events, gap, timezone=LOCALTZ):
+    """Yields all sessions of the given events, see Sessionizer.feed. The
+    sessions still open at the end of the input come last.
+    """
+    sessionizer = Sessionizer(gap, timezone)
+    for session in sessionizer.feed(events):
+        yield session
+    for session in sessionizer.flush():
+        yield session
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+import math
+
+from .chronyk import Chronyk, currentutc, _toseconds
+
+
+class SlidingWindow:
+    """Counts and sums events over the most recent stretch of time, e.g. for
+    rate limiting ("at most 100 requests in 15 minutes").
+
+    :param window (required)
+        The length of the window. This can be either a ChronykDelta, a
+        string like "15 minutes" or a number of seconds.
+
+    :param resolution = window / 60
+        The width of the buckets events are grouped into. Events expire a
+        whole bucket at a time, so the window effectively covers between
+        window - resolution and window seconds.
+
+    :param clock = chronyk.currentutc
+        A function returning the current UTC timestamp (as used by Chronyk
+        comparisons, i.e. float(Chronyk(...))). It is used whenever no
+        timestamp is passed.
+
+    Events are kept in a ring buffer of buckets, so memory only depends on
+    the number of buckets, and adding or querying is O(1) amortized.
+
+    >>> window = SlidingWindow("15 minutes", resolution="1 minute")
+    >>> window.add()
+    >>> if window.count() > 100:
+    ...     reject()
+    """
+
+    def __init__(self, window, resolution=None, clock=currentutc):
+        self.window = _toseconds(window, "Window lengths")
+        if resolution is None:
+            resolution = self.window / 60
+        self.resolution = _toseconds(resolution, "Resolutions")
+        self.clock = clock
+        self.size = max(1, int(math.ceil(self.window / self.resolution)))
+        self.__counts__ = [0] * self.size
+        self.__sums__ = [0] * self.size
+        self.__head__ = None
+        self.__count__ = 0
+        self.__sum__ = 0
+
+    def __len__(self):
+        return self.count()
+
+    def __bucket__(self, timestamp):
+        if timestamp is None:
+            timestamp = self.clock()
+        elif type(timestamp) == Chronyk:
+            timestamp = timestamp.timestamp(timezone=0)
+        return int(timestamp // self.resolution)
+
+    def __advance__(self, bucket):
+        """Moves the newest bucket forward, expiring everything that falls
+        out of the window on the way.
+        """
+        head = self.__head__
+        if head is not None and bucket <= head:
+            return
+        if head is None or bucket - head >= self.size:
+            self.__counts__ = [0] * self.size
+            self.__sums__ = [0] * self.size
+            self.__count__ = 0
+            self.__sum__ = 0
+        else:
+            counts, sums, size = self.__counts__, self.__sums__, self.size
+            for b in range(head + 1, bucket + 1):
+                slot = b % size
+                self.__count__ -= counts[slot]
+                self.__sum__ -= sums[slot]
+                counts[slot] = 0
+                sums[slot] = 0
+            if not self.__count__:
+                # Don't let float errors pile up.
+                self.__sum__ = 0
+        self.__head__ = bucket
+
+    def add(self, timestamp=None, value=1):
+        """Adds an event at the given UTC timestamp (or Chronyk object), or
+        now if none is given. Returns False if the event is already older
+        than the window and was dropped, True otherwise.
+        """
+        bucket = self.__bucket__(timestamp)
+        self.__advance__(bucket)
+        if bucket <= self.__head__ - self.size:
+            return False
+        slot = bucket % self.size
+        self.__counts__[slot] += 1
+        self.__sums__[slot] += value
+        self.__count__ += 1
+        self.__sum__ += value
+        return True
+
+    def count(self, now=None):
+        """Returns the number of events in the window ending at the given
+        UTC timestamp (or Chronyk object), or now if none is given.
+        """
+        if self.__head__ is None:
+            return 0
+        self.__advance__(self.__bucket__(now))
+        return self.__count__
+
+    def sum(self, now=None):
+        """Returns the sum of the values of the events in the window ending
+        at the given UTC timestamp (or Chronyk object), or now if none is
+        given.
+        """
+        if self.__head__ is None:
+            return 0
+        self.__advance__(self.__bucket__(now))
+        return self.__sum__
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+import io
+import csv
+import json
+import math
+
+from .chronyk import LOCALTZ, Chronyk, _strftime, _gmtime
+
+# Number of rows formatted before they are written out at once
+CHUNKSIZE = 4096
+
+# Directives whose output only changes on the hour
+_HOURLY = set("aAbBCdDeFgGhHIjklmnpuUVwWyYzZt%")
+
+
+def _split(pattern):
+    """Splits a pattern at its %M and %S directives. Returns the list of
+    pieces between them and the list of the directives themselves, or None if
+    the pattern contains directives that change more often than hourly
+    (%s, %c, %T, ...).
+    """
+    pieces = [""]
+    fields = []
+    chars = iter(pattern)
+    for char in chars:
+        if char != "%":
+            pieces[-1] += char
+            continue
+        directive = next(chars, "")
+        if directive in ["M", "S"]:
+            fields.append(directive)
+            pieces.append("")
+        elif directive in _HOURLY:
+            pieces[-1] += char + directive
+        else:
+            return None
+    return pieces, fields
+
+
+class TimestringFormatter:
+    """Formats many UTC timestamps (as used by Chronyk comparisons, i.e.
+    float(Chronyk(...))) with the same pattern and timezone. The output is
+    identical to Chronyk(timestamp, timezone=0).timestring(pattern, timezone).
+
+    :param pattern = "%Y-%m-%d %H:%M:%S"
+        The strftime pattern, see Chronyk.timestring.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) to return the values in. To use
+        UTC, use timezone=0.
+
+    Everything except the minutes and seconds is rendered once per hour and
+    reused, so sorted input only costs two integer formats per row. Patterns
+    with directives that change more often than that (like %T or %c) fall
+    back to strftime for every row.
+    """
+
+    def __init__(self, pattern="%Y-%m-%d %H:%M:%S", timezone=LOCALTZ):
+        self.pattern = pattern
+        self.timezone = timezone
+        # Same shift Chronyk.timestring() applies to get to the wall clock.
+        self.__offset__ = timezone + LOCALTZ
+        self.__split__ = _split(pattern)
+        self.__lasthour__ = None
+        self.__lastpieces__ = None
+
+    def __pieces__(self, hour):
+        if hour != self.__lasthour__:
+            struct = _gmtime(hour)
+            self.__lastpieces__ = [
+                _strftime(piece, struct) if piece else ""
+                for piece in self.__split__[0]]
+            self.__lasthour__ = hour
+        return self.__lastpieces__
+
+    def timestring(self, timestamp):
+        """Returns the time string for a single UTC timestamp (or Chronyk
+        object). NaN timestamps yield an empty string.
+        """
+        if type(timestamp) == Chronyk:
+            timestamp = timestamp.timestamp(timezone=0)
+        if timestamp != timestamp:
+            return ""
+        local = math.floor(timestamp - self.__offset__)
+        if self.__split__ is None:
+            return _strftime(self.pattern, _gmtime(local))
+
+        within = local % 3600
+        pieces = self.__pieces__(local - within)
+        fields = self.__split__[1]
+        if not fields:
+            return pieces[0]
+        values = {"M": "%02d" % (within // 60), "S": "%02d" % (within % 60)}
+        result = [pieces[0]]
+        for field, piece in zip(fields, pieces[1:]):
+            result.append(values[field])
+            result.append(piece)
+        return "".join(result)
+
+    def timestrings(self, timestamps):
+        """Yields the time string for every given UTC timestamp (or Chronyk
+        object).
+        """
+        timestring = self.timestring
+        if self.__split__ is None or self.__split__[1] != ["M", "S"]:
+            for timestamp in timestamps:
+                yield timestring(timestamp)
+            return
+
+        # Inlined version of timestring() for the common "...%M...%S..."
+        # patterns.
+        offset = self.__offset__
+        floor = math.floor
+        hour = None
+        for timestamp in timestamps:
+            if type(timestamp) == Chronyk:
+                timestamp = timestamp.timestamp(timezone=0)
+            if timestamp != timestamp:
+                yield ""
+                continue
+            local = floor(timestamp - offset)
+            within = local % 3600
+            if local - within != hour:
+                hour = local - within
+                first, middle, last = self.__pieces__(hour)
+            yield "%s%02d%s%02d%s" % (
+                first, within // 60, middle, within % 60, last)
+
+
+def _write(file, lines):
+    """Writes lines to a file object in chunks. Returns the number of lines.
+    """
+    count = 0
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= CHUNKSIZE:
+            file.write("".join(chunk))
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        file.write("".join(chunk))
+        count += len(chunk)
+    return count
+
+
+def writecsv(
+        file, timestamps, pattern="%Y-%m-%d %H:%M:%S", timezone=LOCALTZ,
+        rows=None, header=None, delimiter=","):
+    """Writes formatted timestamps as CSV to a file object opened in text
+    mode (with newline="" for files on disk, as the csv module expects).
+
+    :param file (required)
+        The file object to write to.
+
+    :param timestamps (required)
+        An iterable of UTC timestamps (like a ChronykArray) or Chronyk
+        objects, ideally sorted.
+
+    :param pattern = "%Y-%m-%d %H:%M:%S"
+        The strftime pattern for the first column.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) the output is in.
+
+    :param rows = None
+        An iterable of sequences with further columns for every row.
+
+    :param header = None
+        A sequence of column names written as the first line.
+
+    :param delimiter = ","
+        The character separating the columns.
+
+    Returns the number of rows written, not counting the header.
+    """
+    formatter = TimestringFormatter(pattern, timezone)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\r\n")
+
+    def quote(record):
+        writer.writerow(record)
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    def lines():
+        if header is not None:
+            yield quote(header)
+        if rows is not None:
+            for timestr, row in zip(formatter.timestrings(timestamps), rows):
+                yield quote([timestr] + list(row))
+            return
+        # Time strings rarely need quoting, so the csv module is skipped for
+        # the ones that don't.
+        special = [delimiter, '"', "\r", "\n"]
+        for timestr in formatter.timestrings(timestamps):
+            for char in special:
+                if char in timestr:
+                    yield quote([timestr])
+                    break
+            else:
+                yield timestr + "\r\n"
+
+    count = _write(file, lines())
+    return count - 1 if header is not None else count
+
+
+def writejsonl(
+        file, timestamps, pattern="%Y-%m-%d %H:%M:%S", timezone=LOCALTZ,
+        records=None, key="time"):
+    """Writes formatted timestamps as JSON Lines to a file object opened in
+    text mode, one object per line.
+
+    :param file (required)
+        The file object to write to.
+
+    :param timestamps (required)
+        An iterable of UTC timestamps (like a ChronykArray) or Chronyk
+        objects, ideally sorted.
+
+    :param pattern = "%Y-%m-%d %H:%M:%S"
+        The strftime pattern for the time strings.
+
+    :param timezone = local timezone
+        The timezone (in seconds west of UTC) the output is in.
+
+    :param records = None
+        An iterable of dicts with further fields for every line.
+
+    :param key = "time"
+        The name of the field holding the time string. It replaces a field
+        of the same name in the records.
+
+    Returns the number of lines written.
+    """
+    formatter = TimestringFormatter(pattern, timezone)
+    prefix = "{{{}: ".format(json.dumps(key))
+    # What json.dumps uses for strings, without its per-call overhead.
+    encode = json.encoder.encode_basestring_ascii
+    dumps = json.dumps
+
+    def lines():
+        if records is None:
+            for timestr in formatter.timestrings(timestamps):
+                yield prefix + encode(timestr) + "}\n"
+            return
+        for timestr, record in zip(formatter.timestrings(timestamps), records):
+            line = {key: timestr}
+            line.update(record)
+            # The time string wins over a field of the same name.
+            line[key] = timestr
+            yield dumps(line) + "\n"
+
+    return _write(file, lines())
@@ -2,12 +2,28 @@
 
 import pytest
 
+import os
 import sys
 import time
 import calendar
 import datetime
 
 from chronyk import LOCALTZ, Chronyk, ChronykDelta, currentutc, guesstype, DateRangeError
+from chronyk import setrejectcache, setepochrange, TIMEZONES
+from chronyk import Bucketer, BucketAggregator, truncate, bucket
+from chronyk import ChronykInterval, IntervalIndex
+from chronyk import ChronykArray, parseepochs
+from chronyk import extract
+from chronyk import compile_format, FormatError
+from chronyk import TimestringFormatter, writecsv, writejsonl
+from chronyk import SlidingWindow
+from chronyk import TimingWheel
+from chronyk import BusinessCalendar
+from chronyk import Recurrence, occurrences
+from chronyk import LogSource, mergelogs
+from chronyk import RelativeStringCache
+from chronyk import Session, Sessionizer, sessionize
+from chronyk import LogIndex
 
 def isEqual(time1, time2):
     return abs(time1 - time2) < 0.1
@@ -68,6 +84,11 @@ def test_absolute_written_2():
     t = Chronyk("2. August 2010")
     assert t.ctime() == "Mon Aug  2 00:00:00 2010"
 
+def test_absolute_families():
+    expected = Chronyk("2014-09-18").timestamp()
+    for timestr in ["20140918", "2014.09.18", "09/18/2014", "18/09-14", "18. 9. 2014", "sep 18th, 2014"]:
+        assert Chronyk(timestr).timestamp() == expected
+
 def test_absolute_12hr():
     t = Chronyk("11:14 am")
     assert t.ctime()[11:-5] == "11:14:00"
@@ -88,6 +109,90 @@ def test_absolute_value():
     with pytest.raises(ValueError):
         Chronyk("warglblargl")
 
+def test_absolute_offsets():
+    expected = calendar.timegm((2014, 9, 18, 10, 0, 0)) + LOCALTZ
+    for timestr in ["2014-09-18 12:00:00 +0200", "2014-09-18 12:00:00+02:00", "2014-09-18 12:00 +02", "18.09.2014 11:00 +01:00"]:
+        assert Chronyk(timestr, timezone=-3600).timestamp(timezone=0) == expected
+    assert Chronyk("2014-09-18 05:00 -05", timezone=0).timestamp(timezone=0) == expected
+    # Without an offset, the given timezone is used.
+    assert Chronyk("2014-09-18", timezone=-7200).timestamp(timezone=0) == Chronyk("2014-09-18", timezone=0).timestamp(timezone=0) - 7200
+
+def test_absolute_zonenames():
+    expected = calendar.timegm((2014, 9, 18, 10, 0, 0)) + LOCALTZ
+    for timestr in ["2014-09-18 10:00:00 UTC", "2014-09-18 12:00 CEST", "Sep 18, 2014 06:00 am EDT", "2014-09-18 03:00 PDT"]:
+        assert Chronyk(timestr, timezone=-3600).timestamp(timezone=0) == expected
+        assert type(Chronyk(timestr).timestamp()) == float
+    with pytest.raises(ValueError):
+        Chronyk("2014-09-18 12:00 xyz")
+
+def test_absolute_zonetable():
+    assert Chronyk("2014-09-18 12:00 ist", timezone=0).timestamp(timezone=0) == calendar.timegm((2014, 9, 18, 6, 30, 0)) + LOCALTZ
+    TIMEZONES["ist"] = -7200
+    try:
+        assert Chronyk("2014-09-18 12:00 ist", timezone=0).timestamp(timezone=0) == calendar.timegm((2014, 9, 18, 10, 0, 0)) + LOCALTZ
+    finally:
+        TIMEZONES["ist"] = -19800
+
+def test_absolute_rejection():
+    from chronyk.chronyk import _formatsfor
+    for timestr in ["asdf qwer", "1 2 3 4 5 6 7 8", "12/12/12/12"]:
+        datetimeformats, timeformats = _formatsfor(timestr)
+        assert "%Y-%m-%d" not in datetimeformats
+        assert timeformats == ()
+        with pytest.raises(ValueError):
+            Chronyk(timestr)
+    assert "%Y-%m-%d" in _formatsfor("2014-09-18")[0]
+
+def test_absolute_rejectcache():
+    from chronyk.chronyk import _rejected
+    with pytest.raises(ValueError):
+        Chronyk("blargl 2014")
+    assert "blargl 2014" in _rejected
+    with pytest.raises(ValueError):
+        Chronyk("Blargl 2014 ")
+    setrejectcache(0)
+    assert len(_rejected) == 0
+    with pytest.raises(ValueError):
+        Chronyk("blargl 2014")
+    assert "blargl 2014" not in _rejected
+    setrejectcache(1024)
+    with pytest.raises(ValueError):
+        setrejectcache(-1)
+
+def test_absolute_rejectcache_zones():
+    with pytest.raises(ValueError):
+        Chronyk("2014-09-18 12:00 xyzt", timezone=0)
+    TIMEZONES["xyzt"] = 0
+    try:
+        assert Chronyk("2014-09-18 12:00 xyzt", timezone=0).timestamp(timezone=0) == calendar.timegm((2014, 9, 18, 12, 0, 0)) + LOCALTZ
+    finally:
+        del TIMEZONES["xyzt"]
+    with pytest.raises(ValueError):
+        Chronyk("2014-09-18 12:00 xyzt", timezone=0)
+
+def test_absolute_unknown_words(monkeypatch):
+    calls = []
+    strptime = time.strptime
+    monkeypatch.setattr(time, "strptime", lambda *args: calls.append(args) or strptime(*args))
+    for word in ["qqqqq", "qqqqr", "septembre"]:
+        with pytest.raises(ValueError):
+            Chronyk("31 {} 2014 12:00:00 pm".format(word))
+    assert calls == []
+
+def test_absolute_maxattempts():
+    expected = Chronyk("2014-09-18").timestamp()
+    assert Chronyk("2014-09-18", maxattempts=3).timestamp() == expected
+    with pytest.raises(ValueError):
+        Chronyk("18. september 2014", maxattempts=3)
+    assert Chronyk("18. september 2014", maxattempts=None).timestamp() == expected
+
+def test_absolute_attempts_counted():
+    t = Chronyk(0)
+    match, attempts = t.__matchabsolute__("2014-09-18")
+    assert match[1] == "%Y-%m-%d" and 1 <= attempts <= 3
+    assert t.__matchabsolute__("warglblargl 2014") == (None, 0)
+    assert t.__matchabsolute__("2014-13-45")[0] is None
+
 # RELATIVE STRINGS
 
 def test_relative_now():
@@ -302,5 +407,892 @@ def test_delta_operators_mul():
 def test_delta_operators_div():
     assert ChronykDelta(10) / 2 == 5
 
+# EXACT MODE
+
+def test_exact_con():
+    t = Chronyk(1410508814.5, timezone=-3600, exact=True)
+    assert t.exact and not Chronyk(1410508814.5).exact
+    assert t.nanoseconds() == 1410508814500000000
+    assert t.nanoseconds(timezone=0) == 1410505214500000000
+    assert t == Chronyk(1410508814.5, timezone=-3600)
+    t = Chronyk(datetime.datetime(2014, 9, 12, 10, 0, 14, 295184), exact=True)
+    assert t.nanoseconds() % 10 ** 9 == 295184000
+
+def test_exact_fromns():
+    t = Chronyk.fromns(5 * 10 ** 9, timezone=0)
+    assert t == 5 and t.timestamp() == 5.0 and float(t) == 5.0
+    with pytest.raises(TypeError):
+        Chronyk.fromns(5.0)
+
+def test_exact_compare():
+    t1 = Chronyk.fromns(1410508814295184123, timezone=0)
+    t2 = Chronyk.fromns(1410508814295184124, timezone=0)
+    assert float(t1) == float(t2)
+    assert t1 != t2 and t1 < t2 and t2 > t1 and t1 <= t2
+    assert sorted([t2, t1]) == [t1, t2]
+
+def test_exact_arithmetic():
+    t1 = Chronyk.fromns(1410508814295184123, timezone=0)
+    t2 = Chronyk.fromns(1410508814295184124, timezone=0)
+    delta = t2 - t1
+    assert delta.exact and delta.nanoseconds() == 1
+    assert (t1 + delta) == t2
+    assert (t1 + 1).nanoseconds() == 1410508815295184123
+    assert (t1 - ChronykDelta(1)).nanoseconds() == 1410508813295184123
+
+def test_exact_delta():
+    d = ChronykDelta(0.1, exact=True) + ChronykDelta(0.2, exact=True)
+    assert d == ChronykDelta(0.3, exact=True)
+    assert ChronykDelta("2 hours", exact=True) == 7200
+    assert (ChronykDelta.fromns(3) * 3).nanoseconds() == 9
+
+# CALENDAR DELTAS
+
+def _utc(*fields, exact=False):
+    return Chronyk(calendar.timegm(fields + (0,) * (6 - len(fields))) + LOCALTZ, timezone=0, exact=exact)
+
+def test_delta_calendar_components():
+    d = ChronykDelta("1 year, 2 months and 3 days")
+    assert d.years == 1 and d.months == 2 and d.seconds == 3 * 24 * 3600
+    assert float(ChronykDelta("1 month")) == 30 * 24 * 3600
+    assert ChronykDelta("1 month") > ChronykDelta("29 days")
+    assert ChronykDelta("1 year").timestring() == "1 year"
+    with pytest.raises(TypeError):
+        ChronykDelta(0, months=1.5)
+
+def test_delta_calendar_add():
+    t = _utc(2014, 1, 31, 10)
+    assert (t + ChronykDelta("1 month")).timestring(timezone=0) == "2014-02-28 10:00:00"
+    assert (t + ChronykDelta("1 month and 2 hours")).timestring(timezone=0) == "2014-02-28 12:00:00"
+    assert (t - ChronykDelta("2 months")).timestring(timezone=0) == "2013-11-30 10:00:00"
+    assert (t + ChronykDelta("1 year") * 2).timestring(timezone=0) == "2016-01-31 10:00:00"
+    assert (ChronykDelta(0, months=13) + t).timestring(timezone=0) == "2015-02-28 10:00:00"
+
+def test_delta_calendar_exact():
+    t = _utc(2016, 2, 29, exact=True) + ChronykDelta("1 year")
+    assert t.exact and t.timestring(timezone=0) == "2017-02-28 00:00:00"
+
+def test_delta_calendar_arithmetic():
+    d = ChronykDelta("1 month") + ChronykDelta("1 year") - ChronykDelta(0, months=3)
+    assert d.months == -2 and d.years == 1
+    assert (ChronykDelta("2 months") * 3).months == 6
+
+def test_delta_calendar_array():
+    starts = [_utc(2014, 1, 31), _utc(2014, 1, 31, 12), _utc(2014, 3, 15), _utc(2015, 12, 31)]
+    shifted = ChronykArray(starts).addmonths(1, timezone=0)
+    assert [Chronyk(v, timezone=0).timestring(timezone=0) for v in shifted] == [
+        "2014-02-28 00:00:00", "2014-02-28 12:00:00", "2014-04-15 00:00:00", "2016-01-31 00:00:00"]
+    back = ChronykArray(starts).addmonths(-14, timezone=0)
+    assert [(s + ChronykDelta(0, months=-14)).timestamp(timezone=0) for s in starts] == list(back)
+
+def test_delta_calendar_bucket():
+    t = calendar.timegm((2014, 9, 12, 10, 47, 13)) + LOCALTZ
+    assert truncate(t, ChronykDelta("3 months"), timezone=0) == calendar.timegm((2014, 7, 1, 0, 0, 0)) + LOCALTZ
+
+def test_delta_calendar_equality():
+    assert ChronykDelta("1 month") != ChronykDelta("30 days")
+    assert ChronykDelta("1 year") != 365 * 24 * 3600
+    assert len({ChronykDelta("1 month"), ChronykDelta("30 days")}) == 2
+    assert ChronykDelta("1 month and 2 hours") == ChronykDelta(7200, months=1)
+    d1 = ChronykDelta.fromns(1410508814295184123, months=2, years=1)
+    d2 = ChronykDelta(0, exact=True, months=2, years=1) + ChronykDelta.fromns(1410508814295184123)
+    assert d1 == d2 and hash(d1) == hash(d2)
+    assert d1 != ChronykDelta.fromns(1410508814295184124, months=2, years=1)
+
+# HASHING
+
+def test_hash_con():
+    timest = time.time()
+    assert hash(Chronyk(timest)) == hash(Chronyk(timest))
+    assert len({Chronyk(timest), Chronyk(timest), Chronyk(timest + 1)}) == 2
+    assert {Chronyk(5, timezone=0): "x"}[5] == "x"
+    assert {Chronyk.fromns(5 * 10 ** 9, timezone=0): "x"}[5.0] == "x"
+
+def test_hash_delta():
+    assert len({ChronykDelta(5), ChronykDelta("5 seconds"), ChronykDelta(5, exact=True), 5}) == 1
+    assert ChronykDelta(5) in {5.0}
+
+def test_hash_lru_cache():
+    import functools
+    calls = []
+    @functools.lru_cache(maxsize=None)
+    def day(t):
+        calls.append(t)
+        return t.timestring("%Y-%m-%d")
+    timest = time.time()
+    day(Chronyk(timest))
+    day(Chronyk(timest))
+    assert len(calls) == 1
+
+def test_immutable():
+    t = Chronyk(5, timezone=0)
+    with pytest.raises(AttributeError):
+        t.__timestamp__ = 6
+    with pytest.raises(AttributeError):
+        del t.timezone
+    with pytest.raises(AttributeError):
+        ChronykDelta(5).seconds = 6
+    t.timezone = -3600
+    assert t == 5
+
+def test_immutable_pickle():
+    import pickle
+    t = Chronyk(5, timezone=-3600, exact=True)
+    u = pickle.loads(pickle.dumps(t))
+    assert u == t and u.exact and u.timezone == -3600
+    assert pickle.loads(pickle.dumps(ChronykDelta(5))) == 5
+
+# BUCKETING
+
+def test_bucket_fixed():
+    t = calendar.timegm((2014, 9, 12, 10, 47, 13)) + LOCALTZ
+    assert truncate(t, "15 minutes", timezone=0) == calendar.timegm((2014, 9, 12, 10, 45, 0)) + LOCALTZ
+    assert truncate(t, ChronykDelta("1 hour"), timezone=0) == calendar.timegm((2014, 9, 12, 10, 0, 0)) + LOCALTZ
+    assert truncate(t, "day", timezone=-7200) == calendar.timegm((2014, 9, 11, 22, 0, 0)) + LOCALTZ
+
+def test_bucket_week():
+    t = calendar.timegm((2014, 9, 12, 10, 47, 13)) + LOCALTZ
+    assert truncate(t, "1 week", timezone=0) == calendar.timegm((2014, 9, 8, 0, 0, 0)) + LOCALTZ
+
+def test_bucket_month():
+    t = calendar.timegm((2014, 9, 12, 10, 47, 13)) + LOCALTZ
+    assert truncate(t, "month", timezone=0) == calendar.timegm((2014, 9, 1, 0, 0, 0)) + LOCALTZ
+    assert truncate(t, "3 months", timezone=0) == calendar.timegm((2014, 7, 1, 0, 0, 0)) + LOCALTZ
+    assert truncate(Chronyk(t, timezone=0), "year", timezone=0) == calendar.timegm((2014, 1, 1, 0, 0, 0)) + LOCALTZ
+
+def test_bucket_array():
+    t = calendar.timegm((2014, 9, 12, 10, 0, 0)) + LOCALTZ
+    starts = bucket([t + 10, t + 3599, t + 3600, Chronyk(t + 7201, timezone=0)], "hour", timezone=0)
+    assert list(starts) == [t, t, t + 3600, t + 7200]
+
+def test_bucket_width():
+    with pytest.raises(ValueError):
+        Bucketer("0 hours")
+    with pytest.raises(ValueError):
+        Bucketer("fortnight")
+    with pytest.raises(TypeError):
+        Bucketer([1])
+
+def test_bucket_aggregator():
+    t = calendar.timegm((2014, 9, 12, 10, 0, 0)) + LOCALTZ
+    agg = BucketAggregator("1 hour", timezone=0)
+    agg.update([t + 5, t + 10, t + 3700], [3, 1, 7])
+    agg.add(t + 20, 5)
+    assert len(agg) == 2
+    assert list(agg.buckets()) == [(t, 3, 9, 1, 5), (t + 3600, 1, 7, 7, 7)]
+    assert agg.get(t + 3599).count == 3
+    assert agg.get(t - 1) is None
+
+# INTERVALS
+
+def test_interval_con():
+    i = ChronykInterval(Chronyk(100, timezone=0), "2 hours")
+    assert i.start == 100 and i.end == 7300
+    assert i.duration() == ChronykDelta("2 hours")
+    i = ChronykInterval("2014-09-18 12:00", "2 hours", timezone=19800)
+    assert i.start == Chronyk("2014-09-18 12:00", timezone=19800).timestamp(timezone=0)
+    assert list(IntervalIndex([i], timezone=19800).stabbing("2014-09-18 13:00")) == [i]
+    assert i.contains("2014-09-18 12:00") and not i.contains("2014-09-18 14:00")
+    assert ChronykInterval("2014-09-18 12:00", "2014-09-18 14:00", timezone=19800) == i
+    # Local midnight of Feb 1st in UTC+1, a month later is March 1st there.
+    i = ChronykInterval(_utc(2014, 1, 31, 23), "1 month", timezone=-3600)
+    assert i.end == _utc(2014, 2, 28, 23).timestamp(timezone=0)
+    with pytest.raises(ValueError):
+        ChronykInterval(200, 100)
+
+def test_interval_relations():
+    i = ChronykInterval(100, 200)
+    assert i.overlaps(ChronykInterval(150, 300))
+    assert not i.overlaps(ChronykInterval(200, 300))
+    assert i.contains(ChronykInterval(120, 200))
+    assert i.contains(100) and not i.contains(200)
+
+def test_interval_hash():
+    assert len({ChronykInterval(100, 200), ChronykInterval(100, 200), ChronykInterval(100, 300)}) == 2
+    assert {ChronykInterval(100, 200): 1}[ChronykInterval(100, 200)] == 1
+
+def _brute_index():
+    import random
+    rand = random.Random(42)
+    spans = []
+    for n in range(500):
+        start = rand.randint(0, 10000)
+        spans.append(ChronykInterval(start, start + rand.randint(0, 500), n))
+    return spans
+
+def test_interval_index_overlapping():
+    spans = _brute_index()
+    index = IntervalIndex(spans[:300])
+    for span in spans[300:]:
+        index.insert(span)
+    assert len(index) == 500
+    sizes = [len(block) for block in index.__blocks__]
+    assert all(a >= 2 * b for a, b in zip(sizes, sizes[1:]))
+    for start, end in [(0, 10), (5000, 5200), (9990, 20000), (-5, 0)]:
+        expected = sorted(s for s in spans if s.start < end and s.end > start)
+        assert list(index.overlapping(start, end)) == expected
+
+def test_interval_index_stabbing():
+    spans = _brute_index()
+    index = IntervalIndex(spans)
+    for point in [0, 1234, 5000, 10499]:
+        expected = sorted(s for s in spans if s.start <= point < s.end)
+        assert list(index.stabbing(point)) == expected
+
+def test_interval_index_containment():
+    spans = _brute_index()
+    index = IntervalIndex()
+    for span in spans:
+        index.insert(span)
+    expected = sorted(s for s in spans if s.start >= 2000 and s.end <= 4000)
+    assert list(index.within(2000, 4000)) == expected
+    expected = sorted(s for s in spans if s.start <= 3000 and s.end >= 3100)
+    assert list(index.enclosing(3000, 3100)) == expected
+    assert list(index) == sorted(spans)
+
+# ARRAYS
+
+def test_array_con():
+    a = ChronykArray([1.5, Chronyk(10, timezone=0), 3])
+    assert list(a) == [1.5, 10.0, 3.0]
+    assert Chronyk(10, timezone=0) in a
+    a.append(Chronyk(20, timezone=0))
+    assert a[-1] == 20
+    with pytest.raises(ValueError):
+        ChronykArray(typecode="b")
+
+def test_array_buffer():
+    a = ChronykArray([1.0, 2.0, 3.0])
+    view = memoryview(a)
+    assert view.format == "d" and view.nbytes == 24
+    interface = a.__array_interface__
+    assert interface["shape"] == (3,) and interface["typestr"][1:] == "f8"
+    assert interface["data"][0] == a.buffer_info()[0]
+
+def test_array_frombuffer():
+    import array
+    a = ChronykArray.frombuffer(array.array("q", [1, 2, 3]))
+    assert a.typecode == "q" and list(a) == [1, 2, 3]
+    a = ChronykArray.frombuffer(memoryview(array.array("d", [1.5, 2.5, 3.5]))[::2])
+    assert list(a) == [1.5, 3.5]
+    a = ChronykArray.frombuffer(array.array("f", [1.5]))
+    assert a.typecode == "d" and list(a) == [1.5]
+    with pytest.raises(TypeError):
+        ChronykArray.frombuffer(b"abc")
+
+def test_array_frombuffer_byteorder():
+    import ctypes
+    for ctype in [ctypes.c_double, ctypes.c_float, ctypes.c_int32, ctypes.c_int64]:
+        for swapped in [ctype.__ctype_be__, ctype.__ctype_le__]:
+            a = ChronykArray.frombuffer((swapped * 3)(1, 2, 1 << 20))
+            assert list(a) == [1, 2, 1 << 20]
+
+def test_array_chronyks():
+    a = ChronykArray([100, 200])
+    assert list(a.chronyks(timezone=-3600)) == [Chronyk(100, timezone=0), Chronyk(200, timezone=0)]
+    assert list(a.timestamps(timezone=-3600)) == [3700, 3800]
+    assert type(bucket([10, 20], 60)) == ChronykArray
+
+# EXTRACTION
+
+EXTRACT_TEXT = "We met on June 3rd, 2014 at the office. Let's talk again in 2 weeks, " \
+    "maybe at 14:30. The migration took 3 days and 2 hours and ended 2014-09-18 11:24:47. " \
+    "Nothing here: version 12, room 4b."
+
+def test_extract_spans():
+    spans = [(EXTRACT_TEXT[s:e], v) for s, e, v in extract(EXTRACT_TEXT, timezone=0)]
+    assert [text for text, _ in spans] == ["June 3rd, 2014", "in 2 weeks", "14:30", "3 days and 2 hours", "2014-09-18 11:24:47"]
+    assert spans[0][1] == Chronyk("2014-06-03", timezone=0)
+    assert spans[3][1] == ChronykDelta("3 days and 2 hours")
+    assert spans[4][1] == Chronyk("2014-09-18 11:24:47", timezone=0)
+
+def test_extract_no_deltas():
+    spans = [EXTRACT_TEXT[s:e] for s, e, v in extract(EXTRACT_TEXT, deltas=False)]
+    assert "3 days and 2 hours" not in spans
+
+def test_extract_stream():
+    text = (EXTRACT_TEXT + " ") * 50
+    expected = [(s, e) for s, e, v in extract(text)]
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    assert [(s, e) for s, e, v in extract(iter(chunks))] == expected
+    assert len(expected) == 250
+
+def test_extract_nothing():
+    assert list(extract("lorem ipsum dolor sit amet " * 100)) == []
+
+def test_extract_overflow():
+    text = "see you in 99999999999 days, 9999999999 weeks ago or on 2014-09-18"
+    spans = [text[s:e] for s, e, v in extract(text, timezone=0, deltas=False)]
+    assert spans == ["2014-09-18"]
+
+# COMPILED FORMATS
+
+def test_compiled_same_as_guessing():
+    for pattern, timestr in [
+            ("%d/%m/%Y %H:%M", "18/09/2014 11:24"),
+            ("%B %dth, %Y", "September 18th, 2014"),
+            ("%d.%m.%y", "18.09.14"),
+            ("%I:%M:%S %p", "11:14:32 pm"),
+            ("%Y-%m-%dT%H:%M:%SZ", "2014-09-18T11:24:47Z")]:
+        assert compile_format(pattern).parse(timestr, timezone=-3600) == Chronyk(timestr, timezone=-3600)
+
+def test_compiled_offset():
+    f = compile_format("%Y-%m-%dT%H:%M:%S%z")
+    assert f.timestamp("2014-09-18T11:24:47+0200") == calendar.timegm((2014, 9, 18, 9, 24, 47)) + LOCALTZ
+    assert f.timestamp("2014-09-18T11:24:47+02") == calendar.timegm((2014, 9, 18, 9, 24, 47)) + LOCALTZ
+    assert compile_format("%d.%m.%Y %H:%M %Z").timestamp("18.09.2014 11:24 CEST") == calendar.timegm((2014, 9, 18, 9, 24, 0)) + LOCALTZ
+    assert f.timestamp("2014-09-18T11:24:47-02:30") == calendar.timegm((2014, 9, 18, 13, 54, 47)) + LOCALTZ
+
+def test_compiled_literal_utc(monkeypatch):
+    f = compile_format("%Y-%m-%dT%H:%M:%SZ")
+    # The local zone must not leak into strings marked as UTC, in winter
+    # or in summer.
+    monkeypatch.setenv("TZ", "EST5EDT,M3.2.0,M11.1.0")
+    time.tzset()
+    try:
+        for fields in [(2014, 1, 18, 11, 24, 47), (2014, 7, 18, 11, 24, 47)]:
+            timestr = "{:04}-{:02}-{:02}T{:02}:{:02}:{:02}Z".format(*fields)
+            expected = calendar.timegm(fields) + LOCALTZ
+            assert f.timestamp(timestr) == expected
+            assert f.timestamp(timestr, timezone=-3600) == expected
+            assert Chronyk(timestr).timestamp(timezone=0) == expected
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+def test_compiled_zone_changes():
+    f = compile_format("%d.%m.%Y %H:%M %Z")
+    expected = calendar.timegm((2014, 9, 18, 9, 24, 0)) + LOCALTZ
+    assert f.timestamp("18.09.2014 11:24 CEST") == expected
+    TIMEZONES["xyzt"] = -7200
+    try:
+        assert compile_format("%d.%m.%Y %H:%M %Z").timestamp("18.09.2014 11:24 XYZT") == expected
+        TIMEZONES["cest"] = -3600
+        assert f.timestamp("18.09.2014 11:24 CEST") == expected + 3600
+    finally:
+        del TIMEZONES["xyzt"]
+        TIMEZONES["cest"] = -7200
+    assert compile_format("%d.%m.%Y %H:%M %Z").timestamp("18.09.2014 11:24 CEST") == expected
+
+def test_compiled_fraction():
+    f = compile_format("%Y-%m-%d %H:%M:%S.%f")
+    assert f.timestamp("2014-09-18 11:24:47.25", timezone=0) == Chronyk("2014-09-18 11:24:47", timezone=0).timestamp(timezone=0) + 0.25
+
+def test_compiled_errors():
+    f = compile_format("%d/%m/%Y %H:%M")
+    with pytest.raises(FormatError) as excinfo:
+        f.parse("18/09/2014 1x:24")
+    assert excinfo.value.position == 12
+    with pytest.raises(ValueError):
+        f.parse("31/02/2014 11:24")
+    with pytest.raises(ValueError):
+        compile_format("%d %q")
+    assert compile_format("%d/%m/%Y %H:%M") is f
+
+def test_compiled_batch():
+    f = compile_format("%d/%m/%Y")
+    result = f.parsebatch(["18/09/2014", "garbage", "19/09/2014"], timezone=0, errors="skip")
+    assert type(result) == ChronykArray
+    assert list(result) == [Chronyk("2014-09-18", timezone=0).timestamp(timezone=0), Chronyk("2014-09-19", timezone=0).timestamp(timezone=0)]
+    result = f.parsebatch(["garbage", "31/09/2014"], errors="nan")
+    assert len(result) == 2 and all(r != r for r in result)
+    assert len(f.parsebatch(["31/09/2014"], errors="skip")) == 0
+    with pytest.raises(FormatError):
+        f.parsebatch(["garbage"])
+
+# COMMAND LINE
+
+def _run_cli(args, stdin):
+    import subprocess
+    proc = subprocess.run(
+        [sys.executable, "-m", "chronyk"] + args, input=stdin,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    return proc.returncode, proc.stdout, proc.stderr
+
+def test_cli_timestamp():
+    code, out, err = _run_cli(["-t", "0"], "2014-09-18 11:24:47\nMay 2nd, 2015\n")
+    assert code == 0
+    expected = [Chronyk("2014-09-18 11:24:47", timezone=0).timestamp(timezone=0), Chronyk("May 2nd, 2015", timezone=0).timestamp(timezone=0)]
+    assert out == "{}\n{}\n".format(*expected)
+    code, out, err = _run_cli(["-t", "-7200", "-T", "0"], "2014-09-18 11:24:47\n")
+    assert code == 0 and float(out) == expected[0] - 7200
+
+def test_cli_errors():
+    code, out, err = _run_cli(["-t", "0"], "2014-09-18\nwarglblargl\n")
+    assert code == 1 and "line 2" in err
+    code, out, err = _run_cli(["-e", "keep", "-o", "string", "-p", "%d.%m.%Y", "--stats"], "2014-09-18\nwarglblargl\n")
+    assert code == 0 and out == "18.09.2014\nwarglblargl\n"
+    assert "rows: 2" in err and "failures: 1" in err
+
+def test_cli_workers():
+    code, out, err = _run_cli(["-j", "2", "-e", "skip", "-o", "string", "-p", "%Y"], "2014-09-18 12:00\nwarglblargl\n2015-01-01 12:00\n")
+    assert code == 0 and out == "2014\n2015\n"
+    code, out, err = _run_cli(["-j", "0"], "2014-09-18\n")
+    assert code == 2 and "--workers" in err
+
+def test_cli_keeps_streams_open(monkeypatch):
+    import io
+    from chronyk.__main__ import main
+    stdin = io.TextIOWrapper(io.BytesIO(b"2014-09-18\n"), encoding="utf-8")
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    monkeypatch.setattr(sys, "stdin", stdin)
+    monkeypatch.setattr(sys, "stdout", stdout)
+    assert main(["-o", "string", "-p", "%Y"]) == 0
+    assert not stdin.buffer.closed and not stdout.buffer.closed
+    assert stdout.buffer.getvalue() == b"2014\n"
+
+# WRITERS
+
+def test_formatter_matches_timestring():
+    timestamps = [1410508814.0, 1410508814.9, 1410512399.0, 1410512400.0, -3600.5, 0]
+    for pattern in ["%Y-%m-%d %H:%M:%S", "%b %d, %Y %I:%M %p", "%S %M %%M", "%T", "%Y"]:
+        for timezone in [0, -7200, 19800, LOCALTZ]:
+            f = TimestringFormatter(pattern, timezone)
+            expected = [Chronyk(t, timezone=0).timestring(pattern, timezone) for t in timestamps]
+            assert list(f.timestrings(timestamps)) == expected
+            assert [f.timestring(t) for t in timestamps] == expected
+
+def test_formatter_inputs():
+    f = TimestringFormatter("%Y-%m-%d %H:%M:%S", timezone=0)
+    assert f.timestring(Chronyk(calendar.timegm((2014, 9, 18, 11, 24, 47)) + LOCALTZ, timezone=0)) == "2014-09-18 11:24:47"
+    assert f.timestring(float("nan")) == ""
+    array = ChronykArray([1410508814 + LOCALTZ, 1410508815 + LOCALTZ], typecode="q")
+    assert list(f.timestrings(array)) == ["2014-09-12 08:00:14", "2014-09-12 08:00:15"]
+
+def test_writecsv():
+    import io
+    import csv
+    out = io.StringIO()
+    count = writecsv(out, [1410508814, 1410595214], "%b %d, %Y", timezone=0, rows=[[1, "a"], [2, "b,c"]], header=["date", "n", "s"])
+    assert count == 2
+    out.seek(0)
+    assert list(csv.reader(out)) == [["date", "n", "s"], ["Sep 12, 2014", "1", "a"], ["Sep 13, 2014", "2", "b,c"]]
+    out = io.StringIO()
+    writecsv(out, [1410508814], "%b %d, %Y", timezone=0)
+    assert out.getvalue() == '"Sep 12, 2014"\r\n'
+
+def test_writecsv_chunks():
+    import io
+    from chronyk import writers
+    out = io.StringIO()
+    count = writecsv(out, range(LOCALTZ, LOCALTZ + writers.CHUNKSIZE * 2 + 5), "%H:%M:%S", timezone=0)
+    assert count == writers.CHUNKSIZE * 2 + 5
+    lines = out.getvalue().split("\r\n")
+    assert lines[0] == "00:00:00" and lines[-2] == "02:16:36" and lines[-1] == ""
+
+def test_writejsonl():
+    import io
+    import json
+    out = io.StringIO()
+    assert writejsonl(out, [1410508814 + LOCALTZ, float("nan")], timezone=0) == 2
+    assert [json.loads(l) for l in out.getvalue().splitlines()] == [{"time": "2014-09-12 08:00:14"}, {"time": ""}]
+    out = io.StringIO()
+    writejsonl(out, [1410508814 + LOCALTZ], "%Y", timezone=0, records=[{"n": 1}], key="year")
+    assert json.loads(out.getvalue()) == {"year": "2014", "n": 1}
+    out = io.StringIO()
+    writejsonl(out, [1410508814 + LOCALTZ], "%Y", timezone=0, records=[{"year": 1999, "n": 1}], key="year")
+    assert json.loads(out.getvalue()) == {"year": "2014", "n": 1}
+
+# SLIDING WINDOWS
+
+def test_window_expiry():
+    now = [1000.0]
+    w = SlidingWindow("1 minute", resolution=10, clock=lambda: now[0])
+    assert w.size == 6 and w.count() == 0
+    for t in [1000, 1005, 1030, 1055]:
+        now[0] = t
+        assert w.add(value=2)
+    assert w.count() == 4 and w.sum() == 8 and len(w) == 4
+    now[0] = 1060
+    assert w.count() == 2
+    now[0] = 1100
+    assert w.count() == 1 and w.sum() == 2
+    now[0] = 5000
+    assert w.count() == 0 and w.sum() == 0
+
+def test_window_timestamps():
+    w = SlidingWindow(ChronykDelta("15 minutes"), resolution="1 minute")
+    assert w.window == 900 and w.resolution == 60
+    assert w.add(Chronyk(1410508814, timezone=0))
+    assert w.add(1410508814 - 60)
+    assert not w.add(1410508814 - 3600)
+    assert w.count(1410508814) == 2
+    assert w.count(1410508814 + 900) == 0
+
+def test_window_values():
+    with pytest.raises(ValueError):
+        SlidingWindow("1 month")
+    with pytest.raises(ValueError):
+        SlidingWindow(0)
+    with pytest.raises(TypeError):
+        SlidingWindow([60])
+    assert SlidingWindow(3600).resolution == 60
+
+# TIMING WHEEL
+
+def test_wheel_expiry():
+    now = [1000.0]
+    wheel = TimingWheel(resolution=1, slots=4, levels=2, clock=lambda: now[0])
+    timers = [wheel.schedule(t, data=t) for t in [1002.5, 1001, 1017, 1100, 999]]
+    assert len(wheel) == 5
+    assert [t.data for t in wheel.advance()] == [999]
+    now[0] = 1003
+    assert [t.data for t in wheel.advance()] == [1001, 1002.5]
+    assert [t.data for t in wheel.advance(1050)] == [1017]
+    assert [t.data for t in wheel.advance(10 ** 6)] == [1100]
+    assert len(wheel) == 0 and not timers[0].pending
+
+def test_wheel_cancel():
+    now = [0.0]
+    wheel = TimingWheel(clock=lambda: now[0])
+    timers = [wheel.schedule(t) for t in range(1, 101)]
+    assert all(t.cancel() for t in timers[::2])
+    assert not timers[0].cancel()
+    assert len(wheel) == 50
+    assert wheel.advance(1000) == timers[1::2]
+
+def test_wheel_inputs():
+    now = [1410508814.0]
+    wheel = TimingWheel(clock=lambda: now[0])
+    assert wheel.schedule("in 3 hours").deadline == now[0] + 3 * 3600
+    assert wheel.schedule("2 days").deadline == now[0] + 2 * 24 * 3600
+    assert wheel.schedule(ChronykDelta("1 minute")).deadline == now[0] + 60
+    assert wheel.schedule(Chronyk(1410508900, timezone=0)).deadline == 1410508900
+    with pytest.raises(DateRangeError):
+        wheel.schedule("2 hours ago", allowpast=False)
+    with pytest.raises(TypeError):
+        wheel.schedule([1])
+
+@pytest.mark.skipif(sys.version_info < (3, 4), reason="asyncio needs 3.4")
+def test_wheel_asyncio():
+    import asyncio
+    wheel = TimingWheel(resolution=0.01)
+    wheel.schedule(currentutc() + 0.03, data="a")
+    wheel.schedule(currentutc() + 0.03, data="b")
+    batches = []
+
+    loop = asyncio.new_event_loop()
+    stopped = wheel.run(batches.append, loop=loop)
+    loop.call_later(0.2, stopped.cancel)
+    with pytest.raises(asyncio.CancelledError):
+        loop.run_until_complete(stopped)
+    loop.close()
+    assert [[t.data for t in batch] for batch in batches] == [["a", "b"]]
+
+@pytest.mark.skipif(sys.version_info < (3, 4), reason="asyncio needs 3.4")
+def test_wheel_asyncio_errors():
+    import asyncio
+    wheel = TimingWheel(resolution=0.01)
+    wheel.schedule(currentutc(), data="a")
+
+    def callback(expired):
+        raise RuntimeError(expired[0].data)
+
+    loop = asyncio.new_event_loop()
+    with pytest.raises(RuntimeError):
+        loop.run_until_complete(wheel.run(callback, loop=loop))
+    loop.close()
+
+# BUSINESS CALENDAR
+
+def test_business_between():
+    cal = BusinessCalendar(holidays=["2014-09-22"], timezone=0)
+    # friday 2014-09-19 16:00 to tuesday 2014-09-23 10:00, monday is a holiday
+    start = _utc(2014, 9, 19, 16)
+    end = _utc(2014, 9, 23, 10)
+    assert cal.between(start, end).seconds == 2 * 3600
+    assert cal.between(end, start).seconds == -2 * 3600
+    assert cal.between("2014-09-01", "2014-10-01").seconds == 21 * 8 * 3600
+    assert cal.workdays("2014-09-01", "2014-10-01") == 21
+
+def test_business_add():
+    cal = BusinessCalendar(holidays=[datetime.date(2014, 9, 22)], timezone=0)
+    start = _utc(2014, 9, 19, 16)
+    assert cal.add(start, "1 hour").timestring() == "2014-09-19 17:00:00"
+    assert cal.add(start, ChronykDelta("3 hours")).timestring() == "2014-09-23 11:00:00"
+    assert cal.add(_utc(2014, 9, 20, 12), 60).timestring() == "2014-09-23 09:01:00"
+    assert cal.add(start, -8 * 3600).timestring() == "2014-09-18 16:00:00"
+    with pytest.raises(ValueError):
+        cal.add(start, "1 month")
+
+def test_business_adddays():
+    cal = BusinessCalendar(weekends=[4, 5], hours=None, timezone=0)
+    assert cal.isworkday("2014-09-21") and not cal.isworkday("2014-09-19")
+    assert cal.adddays(_utc(2014, 9, 18, 13), 1).timestring() == "2014-09-21 13:00:00"
+    assert cal.adddays(_utc(2014, 9, 19, 13), 1).timestring() == "2014-09-21 13:00:00"
+    assert cal.adddays(_utc(2014, 9, 21, 13), -1).timestring() == "2014-09-18 13:00:00"
+    assert cal.between(_utc(2014, 9, 18, 23), _utc(2014, 9, 21, 1)).seconds == 2 * 3600
+
+def test_business_batch():
+    cal = BusinessCalendar(timezone=0)
+    starts = ChronykArray([_utc(2014, 9, 19, 16), _utc(2014, 9, 22, 9)])
+    ends = [_utc(2014, 9, 22, 10), _utc(2014, 9, 22, 9, 30)]
+    assert cal.betweenbatch(starts, ends).tolist() == [2 * 3600, 1800]
+    results = cal.addbatch(starts, "2 hours")
+    assert [Chronyk(t, timezone=0).timestring() for t in results] == ["2014-09-22 10:00:00", "2014-09-22 11:00:00"]
+    with pytest.raises(ValueError):
+        BusinessCalendar(weekends=range(7))
+    with pytest.raises(ValueError):
+        BusinessCalendar(hours=("17:00", "9:00"))
+
+# RECURRENCE
+
+def test_recurrence_weekdays():
+    rule = Recurrence("every monday and friday at 9:00 and 5:30 pm", timezone=0)
+    found = [c.timestring("%a %H:%M") for c in rule.occurrences("2014-09-18 12:00", "2014-09-23")]
+    assert found == ["Fri 09:00", "Fri 17:30", "Mon 09:00", "Mon 17:30"]
+    assert rule.next(Chronyk("2014-09-19 09:00", timezone=0)).timestring() == "2014-09-19 17:30:00"
+    rule = Recurrence("every weekday at 8:30", timezone=0)
+    assert rule.next("2014-09-19 09:00").timestring() == "2014-09-22 08:30:00"
+
+def test_recurrence_intervals():
+    rule = Recurrence("every 15 minutes", timezone=0)
+    assert rule.next(_utc(2014, 9, 18, 14, 7)).timestring() == "2014-09-18 14:15:00"
+    rule = Recurrence(every="2 days", times=["noon"], timezone=0, start=_utc(2014, 9, 18, 12))
+    found = [c.timestring() for c in rule.occurrences(before="2014-09-23")]
+    assert found == ["2014-09-18 12:00:00", "2014-09-20 12:00:00", "2014-09-22 12:00:00"]
+    rule = Recurrence("daily at 7am", timezone=-7200)
+    assert rule.next("2014-09-18 12:00").timestring("%Y-%m-%d %H:%M", timezone=-7200) == "2014-09-19 07:00"
+    rule = Recurrence("every 15 minutes", timezone=19800)
+    assert rule.next("2014-09-18 14:07") == rule.next(Chronyk("2014-09-18 14:07", timezone=19800))
+    assert rule.next("2014-09-18 14:07") == Chronyk("2014-09-18 14:15", timezone=19800)
+
+def test_recurrence_months():
+    rule = Recurrence("every month on the 31st at 6pm", timezone=0, end="2015-03-01")
+    found = [c.timestring("%Y-%m-%d") for c in rule.occurrences("2014-09-18")]
+    assert found == ["2014-10-31", "2014-12-31", "2015-01-31"]
+    rule = Recurrence("monthly on the 1st and 15th", timezone=0)
+    assert rule.next("2014-09-18").timestring() == "2014-10-01 00:00:00"
+    with pytest.raises(ValueError):
+        Recurrence("every blue moon")
+    with pytest.raises(ValueError):
+        Recurrence(every=3600, weekdays=[0])
+
+def test_recurrence_merge():
+    rules = [Recurrence("every monday at 9:00", timezone=0), Recurrence("every 6 hours", timezone=0)]
+    merged = occurrences(rules, after="2014-09-21 12:00", before="2014-09-22 13:00")
+    found = [(c.timestring("%d %H:%M"), rules.index(rule)) for c, rule in merged]
+    assert found == [("21 18:00", 1), ("22 00:00", 1), ("22 06:00", 1), ("22 09:00", 0), ("22 12:00", 1)]
+
+# LOG MERGING
+
+def test_mergelogs_order():
+    app = ["2014-09-18 12:00:00 start\n", "2014-09-18 12:00:05 error\n", "Traceback\n", "2014-09-18 12:00:09 done\n"]
+    web = ["[18/Sep/2014:14:00:03] GET /\n", "[18/Sep/2014:14:00:07] GET /a\n"]
+    sources = [LogSource(app, "%Y-%m-%d %H:%M:%S", 0, name="app"), LogSource(web, "[%d/%b/%Y:%H:%M:%S]", -7200, name="web")]
+    merged = list(mergelogs(sources))
+    assert [(source.name, line.split()[-1]) for t, source, line in merged] == [
+        ("app", "start"), ("web", "/"), ("app", "error"), ("app", "Traceback"), ("web", "/a"), ("app", "done")]
+    expected = [Chronyk("2014-09-18 12:00:0{}".format(s), timezone=0).timestamp(timezone=0) for s in [0, 3, 5, 5, 7, 9]]
+    assert [t for t, source, line in merged] == expected
+
+def test_mergelogs_timezones():
+    east = LogSource(["2014-09-18 14:00:00 east"], "%Y-%m-%d %H:%M:%S", timezone=-7200)
+    west = LogSource(["2014-09-18 07:30:00 west"], "%Y-%m-%d %H:%M:%S", timezone=18000)
+    utc = LogSource(["x", "2014-09-18 12:15:00 utc"], lambda line: line[:19] if line[0] == "2" else None, timezone=0)
+    assert [line.split()[-1] for t, s, line in mergelogs([east, west, utc])] == ["east", "x", "utc", "west"]
+
+def test_mergelogs_lookahead():
+    lines = ["2014-09-18 12:00:0{} l{}".format(s, s) for s in [0, 2, 1, 3, 5, 4]]
+    ordered = [line[-2:] for t, line in LogSource(lines, "%Y-%m-%d %H:%M:%S", 0, lookahead=1)]
+    assert ordered == ["l0", "l1", "l2", "l3", "l4", "l5"]
+    unordered = [line[-2:] for t, line in LogSource(lines, "%Y-%m-%d %H:%M:%S", 0)]
+    assert unordered == ["l0", "l2", "l1", "l3", "l5", "l4"]
+    with pytest.raises(ValueError):
+        LogSource(lines, lookahead=-1)
+    with pytest.raises(TypeError):
+        LogSource(lines, parser=5)
+
+def test_mergelogs_leading(monkeypatch):
+    import itertools
+    import chronyk.merging
+    monkeypatch.setattr(chronyk.merging, "_MAXLEADING", 3)
+    lines = ["a", "b", "c", "d", "2014-09-18 12:00:00 e"]
+    result = [(t, line[-1]) for t, line in LogSource(lines, "%Y-%m-%d %H:%M:%S", 0)]
+    t = Chronyk("2014-09-18 12:00:00", timezone=0).timestamp(timezone=0)
+    assert result == [(float("-inf"), "a"), (float("-inf"), "b"), (float("-inf"), "c"), (t, "d"), (t, "e")]
+    endless = LogSource(itertools.repeat("no timestamp"), lambda line: None)
+    assert len(list(itertools.islice(endless, 10))) == 10
+
+# RELATIVE EXPIRY
+
+def test_relativeexpiry_past():
+    base = calendar.timegm((2014, 5, 13, 16, 53, 20)) + LOCALTZ
+    t = Chronyk(base, timezone=0)
+    assert t.relativeexpiry(base + 5) == ("just now", base + 10)
+    text, expires = t.relativeexpiry(base + 125)
+    assert text == "2 minutes ago" and expires == base + 168
+    assert t.relativestring(expires) == text and t.relativestring(expires + 0.01) == "3 minutes ago"
+    assert t.relativeexpiry(base + 40 * 86400) == ("2014-05-13", float("inf"))
+    assert t.relativeexpiry(base + 3725, maxunits=2) == ("1 hour and 2 minutes ago", base + 3768)
+
+def test_relativeexpiry_future():
+    base = calendar.timegm((2014, 5, 13, 16, 53, 20)) + LOCALTZ
+    t = Chronyk(base, timezone=0)
+    text, expires = t.relativeexpiry(base - 125)
+    assert text == "in 2 minutes" and expires == base - 108
+    assert t.relativestring(expires - 0.01) == text and t.relativestring(expires) == "in 1 minute"
+    assert t.relativeexpiry(base - 40 * 86400) == ("2014-05-13", base - 30 * 86400)
+
+def test_relativecache():
+    clock = [1400000125]
+    cache = RelativeStringCache(size=2, clock=lambda: clock[0], timezone=0)
+    t = Chronyk(1400000000, timezone=0)
+    assert cache.relativestring(t) == "2 minutes ago"
+    clock[0] = 1400000160
+    assert cache.render(t) == ("2 minutes ago", 1400000168)
+    assert (cache.hits, cache.misses) == (1, 1)
+    clock[0] = 1400000170
+    assert cache.relativestring(t) == "3 minutes ago"
+    assert cache.relativestring(1400000000) == "3 minutes ago"
+    assert cache.misses == 2
+    cache.relativestring(1300000000)
+    cache.relativestring(1200000000)
+    assert len(cache) == 2
+    with pytest.raises(TypeError):
+        cache.relativestring("yesterday")
+
+# SESSIONS
+
+def test_sessionize_single():
+    times = [0, 60, 100, 2000, 2100, 9000]
+    sessions = list(sessionize(times, "30 minutes"))
+    assert [(s.start, s.end, s.count) for s in sessions] == [(0, 100, 3), (2000, 2100, 2), (9000, 9000, 1)]
+    assert sessions[0].duration == ChronykDelta("100 seconds")
+    assert sessions[0].key is None
+    sessions = list(sessionize(["2014-09-18 12:00", "2014-09-18 12:10"], "30 minutes", timezone=19800))
+    assert sessions == [Session(None, Chronyk("2014-09-18 12:00", timezone=19800).timestamp(timezone=0), Chronyk("2014-09-18 12:10", timezone=19800).timestamp(timezone=0), 2)]
+
+def test_sessionize_keys():
+    day = Chronyk("2014-09-18", timezone=0).timestamp(timezone=0)
+    events = [("a", day), ("b", day + 10), ("a", Chronyk(day + 500, timezone=0)), ("b", day + 2000), ("a", day + 2100)]
+    sessions = list(sessionize(events, ChronykDelta("10 minutes")))
+    assert sessions == [
+        Session("b", day + 10, day + 10, 1), Session("a", day, day + 500, 2),
+        Session("b", day + 2000, day + 2000, 1), Session("a", day + 2100, day + 2100, 1)]
+
+def test_sessionizer_flush():
+    sessionizer = Sessionizer(60)
+    assert sessionizer.add(0, "a") == [] and sessionizer.add(10, "b") == []
+    assert len(sessionizer) == 2
+    assert sessionizer.add(65, "b") == [Session("a", 0, 0, 1)]
+    assert sessionizer.flush(100) == []
+    assert sessionizer.flush(200) == [Session("b", 10, 65, 2)]
+    assert len(sessionizer) == 0
+    with pytest.raises(ValueError):
+        Sessionizer("1 month")
+    with pytest.raises(TypeError):
+        Sessionizer([60])
+
+# BUFFERS
+
+def test_buffer_types():
+    expected = Chronyk("2014-09-18 12:00:00", timezone=0)
+    assert Chronyk(b"2014-09-18 12:00:00", timezone=0) == expected
+    assert Chronyk(bytearray(b" 2014-09-18 12:00:00\n"), timezone=0) == expected
+    assert Chronyk(memoryview(b"2014-09-18 12:00:00"), timezone=0) == expected
+    assert Chronyk(b"2014-09-18T12:00:00Z", timezone=3600) == _utc(2014, 9, 18, 12)
+    assert Chronyk(b"2014-09-18 14:00:00 +02:00", timezone=3600) == _utc(2014, 9, 18, 12)
+    for timestr in ["2014-09-18T12:00:00Z", "2014-09-18 14:00:00 +02:00", "2014-09-18 12:00:00"]:
+        value = Chronyk(timestr.encode()).timestamp()
+        assert type(value) == float and value == Chronyk(timestr).timestamp()
+
+def test_buffer_offset():
+    line = b"INFO 2014-09-18T12:00:00+0200 started"
+    assert Chronyk(line, offset=5, length=24, timezone=0).timestring() == "2014-09-18 10:00:00"
+    assert Chronyk(memoryview(line), offset=5, length=10, timezone=0) == Chronyk("2014-09-18", timezone=0)
+    with pytest.raises(ValueError):
+        Chronyk(line, offset=30, length=24)
+
+def test_buffer_fallback():
+    assert Chronyk(b"  Sep 18, 2014 ", timezone=0) == Chronyk("Sep 18, 2014", timezone=0)
+    assert Chronyk(b"in 2 days").relativestring() == "in 2 days"
+    assert Chronyk("2014-09-18T12:00:00+02:00", timezone=0) == Chronyk(b"2014-09-18T12:00:00+02:00", timezone=0)
+    with pytest.raises(ValueError):
+        Chronyk(b"2014-09-31 12:00:00")
+    with pytest.raises(ValueError):
+        Chronyk(b"\xff\xfe")
+
+# LOG INDEX
+
+def _writelog(path, start, count, step=10):
+    with open(path, "a") as file:
+        for i in range(count):
+            timestamp = Chronyk(start + i * step, timezone=0).timestring("%Y-%m-%dT%H:%M:%SZ")
+            file.write("{} event {}\n".format(timestamp, i))
+            if i % 7 == 0:
+                file.write("    continued\n")
+
+def test_logindex_range(tmp_path):
+    path = str(tmp_path / "app.log")
+    start = _utc(2014, 9, 18).timestamp(timezone=0)
+    _writelog(path, start, 5000)
+    index = LogIndex(path, "%Y-%m-%dT%H:%M:%SZ", interval=2048)
+    assert len(index) > 50
+    lines = list(index.lines(start + 10000, Chronyk(start + 10050, timezone=0)))
+    assert [line.split()[-1] for line in lines] == ["1000", "1001", "continued", "1002", "1003", "1004"]
+    assert index.seek(start + 5 * 3600 * 24) == os.path.getsize(path)
+    assert index.seek(start - 1) == 0
+
+def test_logindex_update(tmp_path):
+    path = str(tmp_path / "app.log")
+    start = _utc(2014, 9, 18).timestamp(timezone=0)
+    _writelog(path, start, 2000)
+    index = LogIndex(path, "%Y-%m-%dT%H:%M:%SZ", interval=2048)
+    assert os.listdir(str(tmp_path)) == ["app.log"]
+    with pytest.raises(ValueError):
+        index.save()
+    index = LogIndex(path, "%Y-%m-%dT%H:%M:%SZ", interval=2048, indexpath=path + ".idx")
+    assert os.path.exists(path + ".idx")
+    samples = len(index)
+    _writelog(path, start + 20000, 2000)
+    assert index.update() > 0 and index.update() == 0
+    reloaded = LogIndex(path, "%Y-%m-%dT%H:%M:%SZ", interval=2048, indexpath=path + ".idx")
+    assert len(reloaded) == len(index) > samples
+    assert next(reloaded.lines(start + 30000)).split()[-1] == "1000"
+    with open(path, "w") as file:
+        file.write("2014-09-18T00:00:00Z rotated\n")
+    assert reloaded.update() == 1 and len(reloaded) == 1
+
+# EPOCHS
+
+def test_epoch_units():
+    expected = Chronyk(1410508814 + LOCALTZ, timezone=0)
+    assert Chronyk("1410508814", timezone=0) == expected
+    assert Chronyk(" 1410508814295 ", timezone=0).timestamp(timezone=0) == 1410508814.295 + LOCALTZ
+    assert Chronyk("1410508814295123", timezone=0).timestring() == "2014-09-12 08:00:14"
+    assert Chronyk("1410508814.5", timezone=0).timestamp(timezone=0) == 1410508814.5 + LOCALTZ
+    assert Chronyk("1410508814295123456", exact=True).nanoseconds(timezone=0) == 1410508814295123456 + LOCALTZ * 10 ** 9
+    assert Chronyk(b"1410508814", timezone=0) == expected
+    for buffer in [b"1410508814295184123", bytearray(b" 1410508814295184123\n"), memoryview(b"x1410508814295184123")[1:]]:
+        assert Chronyk(buffer, exact=True).nanoseconds() == Chronyk("1410508814295184123", exact=True).nanoseconds()
+    assert Chronyk(b"t=1410508814295184123;", offset=2, length=19, exact=True).nanoseconds(timezone=0) == 1410508814295184123 + LOCALTZ * 10 ** 9
+
+def test_epoch_range():
+    # 8 digits are still dates, not epochs
+    assert Chronyk("20140918", timezone=0) == Chronyk("2014-09-18", timezone=0)
+    with pytest.raises(ValueError):
+        Chronyk("123")
+    try:
+        setepochrange(Chronyk("1900-01-01", timezone=0), 10 ** 9)
+        assert Chronyk("-86400", timezone=0).timestring() == "1969-12-31 00:00:00"
+        assert Chronyk("123", timezone=0).timestamp(timezone=0) == 123 + LOCALTZ
+    finally:
+        setepochrange(10 ** 8, 10 ** 10)
+    with pytest.raises(ValueError):
+        setepochrange(10, 5)
+
+def test_epoch_bulk():
+    values = ["1410508814", b"1410508814295", 1410508814295123, 1410508814.5, "x", "\u00b2", "\u0663" * 10]
+    result = parseepochs(values, errors="nan")
+    assert result.tolist()[:4] == [1410508814.0 + LOCALTZ, 1410508814.295 + LOCALTZ, 1410508814.295123 + LOCALTZ, 1410508814.5 + LOCALTZ]
+    assert len(result) == 7 and all(r != r for r in result[4:])
+    assert parseepochs(values, errors="skip").tolist() == result.tolist()[:4]
+    assert parseepochs(["5", "7000"], unit="ms").tolist() == [0.005 + LOCALTZ, 7.0 + LOCALTZ]
+    with pytest.raises(ValueError):
+        parseepochs(values)
+    with pytest.raises(ValueError):
+        parseepochs(values, unit="days")
+
 if __name__ == "__main__":
     sys.exit(pytest.main())